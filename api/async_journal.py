@@ -0,0 +1,326 @@
+from functools import wraps
+from sqlalchemy import exc, select, update, delete
+from sqlalchemy.exc import IntegrityError
+from starlette.responses import Response
+from werkzeug.http import http_date, parse_etags, quote_etag
+from models.models import Journal, Category
+from .schema import (
+    journal_schema,
+    journal_update_schema,
+    category_schema,
+    category_update_schema,
+)
+from .utils import decode_cursor, make_snippet, count_words
+from .search import search_index, search_text
+from .cache import journal_cache
+from .journal import (
+    category_summary,
+    category_listing,
+    category_journals,
+    journal_detail,
+    journal_message,
+    journal_page,
+    page_limit,
+    page_listing,
+    requested_fields,
+    journal_fields,
+)
+from .conditional import (
+    bump_content_version,
+    content_etag,
+    content_state_query,
+    content_version_query,
+    current_content_version,
+)
+from .sync import tombstones
+from .stats import DailyStatsDelta, journal_days
+from .users import extract_error_message
+from main.aio import async_session, jsonify
+
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+async def search_index_version(session, user_id):
+    """like api.journal.search_index_version, on the async session"""
+    if search_index.is_loaded(user_id):
+        return await session.scalar(content_version_query(user_id))
+
+
+def conditional_read(scope):
+    """
+    conditional_get and journal_cache for the async reads: the same tags,
+    headers and cache entries as the flask endpoints of `scope`
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(request, user_id, *args):
+            async with async_session() as session:
+                row = (await session.execute(content_state_query(user_id))).first()
+            if row is None:
+                return await fn(request, user_id, *args)
+            query = request.query_params.multi_items()
+            etag = content_etag(scope, user_id, row.content_version, args, query)
+            if parse_etags(request.headers.get("if-none-match")).contains_weak(etag):
+                response = Response(status_code=304)
+            else:
+                key = journal_cache.key(
+                    scope, user_id, row.content_version, args, query
+                )
+                body = journal_cache.get(key)
+                if body is not None:
+                    response = Response(body, media_type="application/json")
+                else:
+                    response = await fn(request, user_id, *args)
+                    if response.status_code != 200:
+                        return response
+                    journal_cache.set(key, response.body)
+            response.headers["ETag"] = quote_etag(etag)
+            if row.content_modified is not None:
+                response.headers["Last-Modified"] = http_date(row.content_modified)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+class AsyncJournalHandler:
+    """
+    async twin of JournalHandler for the ASGI mode, same payloads and
+    status codes but every round trip goes through the async engine.
+    """
+
+    async def create_journal(self, request, user_id):
+        data = await read_json(request)
+        validated_data, error_messages = journal_schema.serialize_data(data)
+        if error_messages:
+            return jsonify({"error": error_messages}, 400)
+        journal = Journal(
+            title=validated_data["title"],
+            content=validated_data["content"],
+            category_id=validated_data.get("category_id"),
+            user_id=user_id,
+            sync_version=current_content_version(user_id),
+        )
+        async with async_session() as session:
+            try:
+                await session.execute(bump_content_version(user_id))
+                session.add(journal)
+                # date_created and word_count are filled in by the insert
+                await session.flush()
+                stats = DailyStatsDelta(user_id)
+                stats.add(journal.date_created, 1, journal.word_count)
+                await session.execute(stats.statement())
+                version = await search_index_version(session, user_id)
+                await session.commit()
+            except exc.SQLAlchemyError as e:
+                await session.rollback()
+                return jsonify(
+                    {"error": f"journal couldn't be created due to {e}"}, 400
+                )
+        search_index.add(user_id, version, journal.id, journal.title, journal.content)
+        return jsonify({"message": "journal entry was added successfully"}, 201)
+
+    async def create_category(self, request, user_id):
+        data = await read_json(request)
+        validated_data, error_messages = category_schema.serialize_data(data)
+        if error_messages:
+            return jsonify({"error": error_messages}, 400)
+        async with async_session() as session:
+            try:
+                await session.execute(bump_content_version(user_id))
+                session.add(
+                    Category(
+                        name=validated_data["name"],
+                        user_id=user_id,
+                        sync_version=current_content_version(user_id),
+                    )
+                )
+                await session.commit()
+            except IntegrityError as e:
+                await session.rollback()
+                return jsonify({"error": extract_error_message(e)}, 400)
+        return jsonify({"message": "journal entry was added successfully"}, 201)
+
+    async def update_journal_entry(self, request, user_id, journal_id):
+        data = await read_json(request)
+        validated_data, error_messages = journal_update_schema.serialize_data(
+            data
+        )  # Noqa
+        if error_messages:
+            return jsonify({"error": error_messages}, 400)
+        journal_data = {
+            key: validated_data[key]
+            for key in ("title", "content", "category_id")
+            if key in validated_data
+        }
+        if "content" in journal_data:
+            journal_data["snippet"] = make_snippet(journal_data["content"])
+            journal_data["search_text"] = search_text(journal_data["content"])
+            journal_data["word_count"] = count_words(journal_data["content"])
+        async with async_session() as session:
+            try:
+                if journal_data:
+                    await session.execute(bump_content_version(user_id))
+                    journal_data["sync_version"] = current_content_version(user_id)
+                if "word_count" in journal_data:
+                    stats = DailyStatsDelta(user_id)
+                    for old in await session.execute(
+                        journal_days(user_id, [journal_id])
+                    ):
+                        stats.add(
+                            old.date_created,
+                            0,
+                            journal_data["word_count"] - (old.word_count or 0),
+                        )
+                    if stats:
+                        await session.execute(stats.statement())
+                if journal_data:
+                    await session.execute(
+                        update(Journal)
+                        .where(Journal.id == journal_id, Journal.user_id == user_id)
+                        .values(**journal_data)
+                    )
+                version = await search_index_version(session, user_id)
+                indexed = None
+                if version is not None:
+                    indexed = (
+                        await session.execute(
+                            select(Journal.title, Journal.content).where(
+                                Journal.id == journal_id, Journal.user_id == user_id
+                            )
+                        )
+                    ).first()
+                await session.commit()
+            except IntegrityError as e:
+                await session.rollback()
+                return jsonify({"error": extract_error_message(e)}, 400)
+            if indexed is not None:
+                search_index.add(
+                    user_id, version, journal_id, indexed.title, indexed.content
+                )
+        return jsonify({"message": "journal updated successfully"}, 200)
+
+    async def update_journal_category(self, request, user_id, category_id):
+        data = await read_json(request)
+        validated_data, error_messages = category_update_schema.serialize_data(
+            data
+        )  # Noqa
+        if error_messages:
+            return jsonify({"error": error_messages}, 400)
+        async with async_session() as session:
+            try:
+                if "name" in validated_data:
+                    await session.execute(bump_content_version(user_id))
+                    await session.execute(
+                        update(Category)
+                        .where(Category.id == category_id, Category.user_id == user_id)
+                        .values(
+                            name=validated_data["name"],
+                            sync_version=current_content_version(user_id),
+                        )
+                    )
+                await session.commit()
+            except IntegrityError as e:
+                await session.rollback()
+                return jsonify({"error": extract_error_message(e)}, 400)
+        return jsonify({"message": "category updated successfully"}, 200)
+
+    @conditional_read("journals")
+    async def fetch_journals(request, user_id):
+        limit, error = page_limit(request.query_params.get("limit"))
+        if error:
+            return jsonify({"error": error}, 400)
+        fields, error = requested_fields(
+            request.query_params.get("fields"),
+            ("id", "title", "category", "content", "date"),
+        )
+        if error:
+            return jsonify({"error": error}, 400)
+        position = None
+        cursor = request.query_params.get("cursor")
+        if cursor:
+            position = decode_cursor(cursor)
+            if position is None:
+                return jsonify({"error": "invalid cursor"}, 400)
+        async with async_session() as session:
+            journals = (
+                await session.scalars(journal_page(user_id, fields, limit, position))
+            ).all()
+        return jsonify(page_listing(journals, fields, limit), 200)
+
+    @conditional_read("journal")
+    async def fetch_journal(request, user_id, journal_id):
+        async with async_session() as session:
+            journal = (
+                await session.scalars(journal_detail(user_id, journal_id))
+            ).first()
+        if journal is None:
+            return jsonify({"error": "No such journal"}, 404)
+        return jsonify({"message": journal_message(journal)}, 200)
+
+    @conditional_read("category_journals")
+    async def fetch_journal_by_category(request, user_id, category_id):
+        fields, error = requested_fields(
+            request.query_params.get("fields"), ("title", "category", "content")
+        )
+        if error:
+            return jsonify({"error": error}, 400)
+        async with async_session() as session:
+            journals = (
+                await session.scalars(category_journals(user_id, category_id, fields))
+            ).all()
+        journal_entries = [
+            {"message": journal_fields(journal, fields)} for journal in journals
+        ]
+        return jsonify({"message": journal_entries}, 200)
+
+    @conditional_read("categories")
+    async def fetch_category_details(request, user_id):
+        async with async_session() as session:
+            rows = (await session.execute(category_summary(user_id))).all()
+        return jsonify(category_listing(rows), 200)
+
+    async def delete_journal(user_id, journal_id):
+        async with async_session() as session:
+            await session.execute(bump_content_version(user_id))
+            found = (await session.execute(journal_days(user_id, [journal_id]))).all()
+            stats = DailyStatsDelta(user_id)
+            for old in found:
+                stats.add(old.date_created, -1, -(old.word_count or 0))
+            await session.execute(
+                delete(Journal).where(
+                    Journal.id == journal_id, Journal.user_id == user_id
+                )
+            )
+            if found:
+                await session.execute(stats.statement())
+                await session.execute(
+                    tombstones(user_id, "journal", [old.id for old in found])
+                )
+            version = await search_index_version(session, user_id)
+            await session.commit()
+        search_index.remove(user_id, version, journal_id)
+        return jsonify({"message": "journal deleted successfully"}, 200)
+
+    async def delete_category(user_id, category_id):
+        async with async_session() as session:
+            await session.execute(bump_content_version(user_id))
+            deleted = await session.execute(
+                delete(Category).where(
+                    Category.id == category_id, Category.user_id == user_id
+                )
+            )
+            if deleted.rowcount:
+                await session.execute(
+                    tombstones(user_id, "category", [int(category_id)])
+                )
+            await session.commit()
+        return jsonify({"message": "category deleted successfully"}, 200)
@@ -0,0 +1,166 @@
+from datetime import datetime
+import time
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from models.models import User
+from auth.jwt import create_token
+from .schema import (
+    login_schema,
+    register_schema,
+    password_reset_schema,
+    update_user_schema,
+)
+from .users import extract_error_message
+from .conditional import bump_content_version
+from .async_journal import read_json
+from main import app, hasher
+from main.aio import async_session, jsonify
+
+
+def login_message(message, user):
+    # flask_jwt_extended reads its settings from the flask app
+    with app.app_context():
+        access_token, refresh_token = create_token(user)
+    return {
+        "message": message,
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "user_id": user.id,
+        "user_email": user.email,
+    }
+
+
+class AsyncUsers:
+    """async twin of Users for the ASGI mode"""
+
+    async def login(self, request):
+        data = await read_json(request)
+        validated_data, error_messages = login_schema.serialize_login_data(  # noqa
+            data
+        )  # noqa
+        if error_messages:
+            return jsonify({"error": error_messages}, 400)
+        password = validated_data["password"]
+        async with async_session() as session:
+            user = (
+                await session.scalars(
+                    select(User).where(User.email == validated_data["email"])
+                )
+            ).first()
+            if user is None:
+                return jsonify({"error": "User not Found"}, 401)
+            if not await hasher.check_password_hash_async(
+                user.hash_password, password
+            ):
+                return jsonify({"error": "Invalid Credentials"}, 401)
+            if hasher.needs_rehash(user.hash_password):
+                user.hash_password = await hasher.generate_password_hash_async(
+                    password
+                )
+                await session.commit()
+        return jsonify(login_message("Successful Login", user), 200)
+
+    async def register(self, request):
+        data = await read_json(request)
+        validated_data, error_messages = register_schema.serialize_register_data(data)
+        if error_messages:
+            return jsonify({"error": error_messages}, 400)
+        password_hash = await hasher.generate_password_hash_async(
+            validated_data["password"]
+        )
+        user = User(
+            email=validated_data["email"],
+            username=validated_data["username"],
+            hash_password=password_hash,
+            contact=validated_data["phone_number"],
+            activation_date_created=datetime.fromtimestamp(time.time()),
+        )
+        async with async_session() as session:
+            try:
+                session.add(user)
+                await session.commit()
+            except IntegrityError as e:
+                await session.rollback()
+                return jsonify({"error": extract_error_message(e)}, 400)
+        return jsonify({"message": "Creation of Account was successful"}, 201)
+
+    async def password_reset(self, request, email):
+        data = await read_json(request)
+        validated_data, error_messages = (
+            password_reset_schema.serialize_password_reset_data(data)
+        )  # Noqa
+        if error_messages:
+            return jsonify({"error": error_messages}, 400)
+        old_password = validated_data["old_password"]
+        new_password = validated_data["new_password"]
+        async with async_session() as session:
+            user = (
+                await session.scalars(select(User).where(User.email == email))
+            ).first()
+            if user is None:
+                return jsonify({"error": "User not Found"}, 401)
+            if not await hasher.check_password_hash_async(
+                user.hash_password, old_password
+            ):
+                message = {
+                    "error": "This isn't your previous password, check again",
+                }
+                return jsonify(message, 400)
+            if await hasher.check_password_hash_async(
+                user.hash_password, new_password
+            ):
+                message = {
+                    "error": "You can't use previous password as new password",
+                }
+                return jsonify(message, 400)
+            user.hash_password = await hasher.generate_password_hash_async(
+                new_password
+            )
+            await session.commit()
+        return jsonify({"message": "Password updated successfully"}, 200)
+
+    async def update_user_details(self, request, user_id):
+        data = await read_json(request)
+        validated_data, error_messages = update_user_schema.serialize_user_data(
+            data
+        )  # Noqa
+        if error_messages:
+            return jsonify({"error": error_messages}, 400)
+        user_data = {}
+        if "email" in validated_data:
+            user_data["email"] = validated_data["email"]
+        if "username" in validated_data:
+            user_data["username"] = validated_data["username"]
+        if "phone_number" in validated_data:
+            user_data["contact"] = validated_data["phone_number"]
+        async with async_session() as session:
+            try:
+                if user_data:
+                    await session.execute(
+                        update(User).where(User.id == user_id).values(**user_data)
+                    )
+                # like api.users, moves the ETags and cached reads on
+                await session.execute(bump_content_version(user_id))
+                await session.commit()
+            except IntegrityError as e:
+                await session.rollback()
+                return jsonify({"error": extract_error_message(e)}, 400)
+        return jsonify({"message": "user details updated successfully"}, 200)
+
+    async def fetch_user_details(user_id):
+        async with async_session() as session:
+            user = (await session.scalars(select(User).where(User.id == user_id))).first()
+        if user is None:
+            return jsonify({"error": "User not Found"}, 401)
+        message = {
+            "email": user.email,
+            "username": user.username,
+            "phone_number": user.contact,
+            "date_created": user.created_date,
+        }
+        return jsonify(message, 200)
+
+    async def refresh_token(user_id):
+        async with async_session() as session:
+            user = (await session.scalars(select(User).where(User.id == user_id))).first()
+        return jsonify(login_message("token refresh was successful", user), 200)
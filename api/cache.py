@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, Response
+from main import CACHE_REDIS_URL, CACHE_KEY_PREFIX, CACHE_TTL, CACHE_MAX_ENTRIES
+from .conditional import content_state
+
+
+class LRUBackend:
+    """in-process store bounded both by entry count and by age"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class RedisBackend:
+    """shared store, every worker process fills and reads the same entries"""
+
+    def __init__(self, url, ttl, prefix):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_REDIS_URL is set but redis is not installed")
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        # the database may be shared with other apps
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + repr(key))
+
+    def set(self, key, value):
+        self.client.set(self.prefix + repr(key), value, ex=self.ttl)
+
+
+class ResponseCache:
+    """
+    read-through cache for the per-user read endpoints.
+
+    entries are keyed by scope, user, the user's content version, the
+    handler arguments and the query string. every journal or category
+    write moves the content version on in the database, so a write in any
+    worker process orphans the user's entries everywhere and nothing has
+    to be deleted; orphans age out of the backend.
+    """
+
+    def __init__(self, backend, version):
+        self.backend = backend
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def key(self, scope, user_id, version, args, query):
+        return (
+            (scope, str(user_id), version)
+            + tuple(str(arg) for arg in args)
+            + tuple(sorted(query))
+        )
+
+    def get(self, key):
+        body = self.backend.get(key)
+        self.record(body is not None)
+        return body
+
+    def set(self, key, body):
+        self.backend.set(key, body)
+
+    def record(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        with self.lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / total if total else 0.0,
+        }
+
+    def __call__(self, scope):
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(user_id, *args):
+                # the version has to be read before querying, a write landing
+                # mid-request then only ever stores newer rows under it
+                key = self.key(
+                    scope,
+                    user_id,
+                    self.version(user_id),
+                    args,
+                    request.args.items(multi=True),
+                )
+                body = self.get(key)
+                if body is not None:
+                    return Response(body, mimetype="application/json"), 200
+                response, status = fn(user_id, *args)
+                if status == 200:
+                    self.set(key, response.get_data())
+                return response, status
+
+            return wrapper
+
+        return decorator
+
+
+def content_version(user_id):
+    row = content_state(user_id)
+    return None if row is None else row.content_version
+
+
+if CACHE_REDIS_URL:
+    journal_cache = ResponseCache(
+        RedisBackend(CACHE_REDIS_URL, CACHE_TTL, CACHE_KEY_PREFIX), content_version
+    )
+else:
+    journal_cache = ResponseCache(
+        LRUBackend(CACHE_MAX_ENTRIES, CACHE_TTL), content_version
+    )
@@ -0,0 +1,121 @@
+from datetime import datetime, timezone
+from functools import wraps
+from flask import g, request, Response
+from sqlalchemy import update, select
+from werkzeug.http import generate_etag
+from models.models import User
+from main import session
+
+
+def bump_content_version(user_id):
+    """
+    statement that moves the user's content version on, run it in the same
+    transaction as the journal or category write it stands for
+    """
+    return (
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            content_version=User.content_version + 1,
+            # stored as naive UTC, it only ever feeds the Last-Modified header
+            content_modified=datetime.now(timezone.utc).replace(tzinfo=None),
+        )
+    )
+
+
+def content_version_query(user_id):
+    """
+    the user's content_version. run after bump_content_version, in the same
+    transaction, it is the version that transaction commits
+    """
+    return select(User.content_version).where(User.id == user_id)
+
+
+def current_content_version(user_id):
+    """
+    the version bump_content_version moved the user to, as a subquery to
+    stamp the rows the same transaction writes with. run the bump first,
+    it also holds the user's row lock so versions commit in order
+    """
+    return content_version_query(user_id).scalar_subquery()
+
+
+def content_state_query(user_id):
+    return select(User.content_version, User.content_modified).where(
+        User.id == user_id
+    )
+
+
+def content_etag(scope, user_id, version, args, query):
+    """the tag of a read at `version`, `query` is the query string as pairs"""
+    return generate_etag(
+        repr(
+            (
+                scope,
+                str(user_id),
+                version,
+                tuple(str(arg) for arg in args),
+                sorted(query),
+            )
+        ).encode()
+    )
+
+
+def content_state(user_id):
+    """
+    the user's content_version and content_modified, None for an unknown
+    user. read once per request, conditional_get and the response cache
+    both key on it
+    """
+    cached = g.get("content_state")
+    if cached is not None and cached[0] == str(user_id):
+        return cached[1]
+    try:
+        row = session.execute(content_state_query(user_id)).first()
+    finally:
+        session.close()
+    g.content_state = (str(user_id), row)
+    return row
+
+
+def conditional_get(scope):
+    """
+    ETag / Last-Modified for the per-user read endpoints.
+
+    the tag is derived from the user's content version, the handler
+    arguments and the query string, so a matching If-None-Match is answered
+    with a 304 after a single primary key lookup and without loading rows.
+    If-Modified-Since is not honoured, Last-Modified only has one second
+    resolution and two writes within the same second would look unchanged.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(user_id, *args):
+            row = content_state(user_id)
+            if row is None:
+                return fn(user_id, *args)
+            etag = content_etag(
+                scope,
+                user_id,
+                row.content_version,
+                args,
+                request.args.items(multi=True),
+            )
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response, status = fn(user_id, *args)
+                if status != 200:
+                    return response, status
+            response.set_etag(etag)
+            if row.content_modified is not None:
+                response.last_modified = row.content_modified
+            # clients may keep the body but have to revalidate every time
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response, response.status_code
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+import zlib
+from sqlalchemy import select
+from models.models import Journal, Category
+from const.constants import JOURNAL_EXPORT_BATCH_SIZE, JOURNAL_EXPORT_CHUNK_SIZE
+import main
+from main.json_provider import isoformat
+
+EXPORT_COLUMNS = ("id", "title", "category", "content", "date")
+
+
+def export_rows(user_id):
+    """
+    the user's journal, oldest first, read through a server-side cursor in
+    batches. the connection goes back to the pool as soon as the last row
+    is read, or when the client goes away mid-download
+    """
+    query = (
+        select(
+            Journal.id,
+            Journal.title,
+            Category.name,
+            Journal.content,
+            Journal.date_created,
+        )
+        .outerjoin(Category, Category.id == Journal.category_id)
+        .where(Journal.user_id == user_id)
+        .order_by(Journal.date_created, Journal.id)
+    )
+    with main.engine.connect() as connection:
+        result = connection.execution_options(
+            yield_per=JOURNAL_EXPORT_BATCH_SIZE
+        ).execute(query)
+        for row in result:
+            yield row[:4] + (isoformat(row[4]),)
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n"
+
+
+def csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def chunked(lines, size=JOURNAL_EXPORT_CHUNK_SIZE):
+    """joins lines into ~size byte chunks, one write per chunk not per row"""
+    chunk, length = [], 0
+    for line in lines:
+        data = line.encode()
+        chunk.append(data)
+        length += len(data)
+        if length >= size:
+            yield b"".join(chunk)
+            chunk, length = [], 0
+    if chunk:
+        yield b"".join(chunk)
+
+
+def gzipped(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+EXPORT_FORMATS = {
+    "ndjson": (ndjson_lines, "application/x-ndjson"),
+    "csv": (csv_lines, "text/csv"),
+}
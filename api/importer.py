@@ -0,0 +1,319 @@
+import csv
+import fcntl
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import exc, insert
+from models.models import Journal, Category
+from .schema import journal_schema
+from .conditional import bump_content_version, current_content_version
+from .stats import DailyStatsDelta
+from .utils import count_words
+from const.constants import (
+    JOURNAL_IMPORT_CHUNK_SIZE,
+    JOURNAL_IMPORT_MAX_ERRORS,
+    JOURNAL_IMPORT_DEFAULT_CATEGORY,
+)
+from main import session, IMPORT_UPLOAD_DIR, IMPORT_MAX_SIZE, IMPORT_UPLOAD_TTL
+
+TITLE_LENGTH = Journal.__table__.c.title.type.length
+
+
+def ndjson_records(stream):
+    """(line number, record or error) for every non-blank line"""
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, f"invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, "expected a JSON object"
+            continue
+        yield line_no, record
+
+
+def csv_records(stream):
+    # quoted fields may span lines, csv pulls the next one when it needs it
+    reader = csv.DictReader(line.decode("utf-8") for line in stream)
+    try:
+        for record in reader:
+            yield reader.line_num, {
+                key: value for key, value in record.items() if value not in ("", None)
+            }
+    except (csv.Error, UnicodeDecodeError) as e:
+        yield reader.line_num + 1, f"unreadable CSV: {e}"
+
+
+IMPORT_FORMATS = {"ndjson": ndjson_records, "csv": csv_records}
+
+
+class CategoryMap:
+    """the user's categories by name, missing ones are created on first use"""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.ids = {}
+        self.created = 0
+        for category_id, name in session.query(Category.id, Category.name).filter_by(
+            user_id=user_id
+        ):
+            self.ids.setdefault(name, category_id)
+        self.owned = set(self.ids.values())
+
+    def resolve(self, name):
+        category_id = self.ids.get(name)
+        if category_id is None:
+            # committed on its own, so a failing journal chunk can't roll
+            # back a category the map already handed out
+            session.execute(bump_content_version(self.user_id))
+            result = session.execute(
+                insert(Category).values(
+                    name=name,
+                    user_id=self.user_id,
+                    sync_version=current_content_version(self.user_id),
+                )
+            )
+            session.commit()
+            category_id = result.inserted_primary_key[0]
+            self.ids[name] = category_id
+            self.owned.add(category_id)
+            self.created += 1
+        return category_id
+
+
+def journal_row(user_id, record, categories):
+    """(row, None) ready for the bulk insert, or (None, error message)"""
+    record = dict(record)
+    # exports carry these, so an export can be imported again as it is
+    record.pop("id", None)
+    category = record.pop("category", None)
+    date = record.pop("date", None)
+    validated_data, error_messages = journal_schema.serialize_data(record)
+    if error_messages:
+        return None, error_messages
+    if len(validated_data["title"]) > TITLE_LENGTH:
+        return None, {"title": [f"Longer than {TITLE_LENGTH} characters."]}
+    category_id = validated_data.get("category_id")
+    if category_id is not None:
+        if category_id not in categories.owned:
+            return None, {"category_id": ["No such category."]}
+    else:
+        category_id = categories.resolve(
+            str(category).strip() if category else JOURNAL_IMPORT_DEFAULT_CATEGORY
+        )
+    row = {
+        "user_id": user_id,
+        "title": validated_data["title"],
+        "content": validated_data["content"],
+        "category_id": category_id,
+        "word_count": count_words(validated_data["content"]),
+        "date_created": datetime.now(),
+    }
+    if date:
+        try:
+            date_created = datetime.fromisoformat(str(date))
+        except ValueError:
+            return None, {"date": ["Not a valid ISO 8601 datetime."]}
+        # stored naive in UTC, which is how exports and responses read it
+        if date_created.tzinfo is not None:
+            date_created = date_created.astimezone(timezone.utc).replace(tzinfo=None)
+        row["date_created"] = date_created
+    return row, None
+
+
+def import_journals(user_id, records, progress=None):
+    """
+    validates `records` one by one and inserts the good ones in bulk, one
+    transaction per JOURNAL_IMPORT_CHUNK_SIZE rows. only the current chunk
+    is held in memory. returns the counts and the per-row errors, `progress`
+    gets the counts so far after every chunk
+    """
+    categories = CategoryMap(user_id)
+    report = {"imported": 0, "failed": 0, "errors": []}
+
+    def fail(line_no, error):
+        report["failed"] += 1
+        if len(report["errors"]) < JOURNAL_IMPORT_MAX_ERRORS:
+            report["errors"].append({"line": line_no, "error": error})
+
+    def flush(chunk):
+        try:
+            session.execute(bump_content_version(user_id))
+            session.execute(
+                insert(Journal).values(sync_version=current_content_version(user_id)),
+                [row for _, row in chunk],
+            )
+            stats = DailyStatsDelta(user_id)
+            for _, row in chunk:
+                stats.add(row["date_created"], 1, row["word_count"])
+            session.execute(stats.statement())
+            session.commit()
+            report["imported"] += len(chunk)
+        except exc.SQLAlchemyError as e:
+            session.rollback()
+            for line_no, _ in chunk:
+                fail(line_no, f"chunk couldn't be inserted due to {e}")
+        if progress is not None:
+            progress({"imported": report["imported"], "failed": report["failed"]})
+
+    chunk = []
+    try:
+        for line_no, record in records:
+            if isinstance(record, str):
+                fail(line_no, record)
+                continue
+            row, error = journal_row(user_id, record, categories)
+            if error:
+                fail(line_no, error)
+                continue
+            chunk.append((line_no, row))
+            if len(chunk) == JOURNAL_IMPORT_CHUNK_SIZE:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+    finally:
+        session.close()
+    report["categories_created"] = categories.created
+    report["errors_truncated"] = report["failed"] > len(report["errors"])
+    return report
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UploadStore:
+    """
+    resumable uploads for imports bigger than MAX_CONTENT_LENGTH. the client
+    appends chunks at the offset the server reports and, after a dropped
+    connection, asks for the offset again and carries on from there.
+    parts live on disk as <user_id>-<upload_id>.part, a completed upload is
+    renamed to .import while a job imports it and the job's progress is
+    kept in .json, so every worker process can report it
+    """
+
+    def __init__(self, directory, max_size, ttl):
+        self.directory = directory
+        self.max_size = max_size
+        self.ttl = ttl
+
+    def path(self, user_id, upload_id, suffix="part"):
+        try:
+            upload_id = uuid.UUID(str(upload_id)).hex
+        except ValueError:
+            return None
+        return os.path.join(self.directory, f"{user_id}-{upload_id}.{suffix}")
+
+    def create(self, user_id):
+        os.makedirs(self.directory, exist_ok=True)
+        self.expire()
+        upload_id = uuid.uuid4().hex
+        open(self.path(user_id, upload_id), "xb").close()
+        return upload_id
+
+    def offset(self, user_id, upload_id):
+        """bytes received so far, None for an unknown upload"""
+        path = self.path(user_id, upload_id)
+        if path is None or not os.path.exists(path):
+            return None
+        return os.path.getsize(path)
+
+    def append(self, user_id, upload_id, offset, stream):
+        """
+        writes `stream` at `offset` and returns the new size, or None when
+        `offset` isn't where the upload currently ends or another chunk is
+        being written. raises FileNotFoundError once the upload is completed
+        """
+        path = self.path(user_id, upload_id)
+        # no O_CREAT, a completed upload must not come back as a new part
+        with open(os.open(path, os.O_WRONLY | os.O_APPEND), "ab") as f:
+            # the lock is shared with every worker process writing this part
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            if os.fstat(f.fileno()).st_ino != os.stat(path).st_ino:
+                raise FileNotFoundError(path)
+            if f.seek(0, os.SEEK_END) != offset:
+                return None
+            copied = 0
+            while True:
+                data = stream.read(64 * 1024)
+                if not data:
+                    break
+                copied += len(data)
+                if offset + copied > self.max_size:
+                    f.truncate(offset)
+                    raise UploadTooLarge()
+                f.write(data)
+            f.flush()
+            return f.tell()
+
+    def claim(self, user_id, upload_id):
+        """
+        moves a finished upload out of the way of further appends, waiting
+        for a chunk that is still being written. False for an unknown upload
+        """
+        path = self.path(user_id, upload_id)
+        if path is None:
+            return False
+        try:
+            with open(path, "rb") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                os.rename(path, self.path(user_id, upload_id, "import"))
+        except FileNotFoundError:
+            return False
+        self.set_status(user_id, upload_id, {"state": "importing"})
+        return True
+
+    def release(self, user_id, upload_id):
+        """undoes claim(), the upload can be completed again"""
+        os.rename(
+            self.path(user_id, upload_id, "import"), self.path(user_id, upload_id)
+        )
+        os.remove(self.path(user_id, upload_id, "json"))
+
+    def open(self, user_id, upload_id):
+        return open(self.path(user_id, upload_id, "import"), "rb")
+
+    def status(self, user_id, upload_id):
+        path = self.path(user_id, upload_id, "json")
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (TypeError, FileNotFoundError):
+            return None
+
+    def set_status(self, user_id, upload_id, status):
+        path = self.path(user_id, upload_id, "json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(status, f)
+        os.replace(path + ".tmp", path)
+
+    def discard(self, user_id, upload_id):
+        for suffix in ("part", "import"):
+            try:
+                os.remove(self.path(user_id, upload_id, suffix))
+            except FileNotFoundError:
+                pass
+
+    def expire(self):
+        cutoff = time.time() - self.ttl
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith((".part", ".import", ".json")):
+                continue
+            # a finishing import may remove its files while this runs
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+import_uploads = UploadStore(IMPORT_UPLOAD_DIR, IMPORT_MAX_SIZE, IMPORT_UPLOAD_TTL)
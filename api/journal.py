@@ -1,27 +1,324 @@
+from datetime import datetime
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import exc
-from flask import request, jsonify
+from sqlalchemy import exc, or_, and_, insert, update, delete
+from sqlalchemy import type_coerce, LargeBinary, select, func, null, union_all
+from flask import request, jsonify, Response
 from models.models import Journal, Category
-from sqlalchemy.orm import joinedload
+from models.types import decompress_text, is_compressed
+from sqlalchemy.orm import joinedload, load_only, undefer
+from sqlalchemy.dialects.mysql import match
 from .schema import (
-    JournalSchema,
-    JournalUpdateSchema,
-    CategorySchema,
-    CategoryUpdateSchema,
+    journal_schema,
+    journal_update_schema,
+    category_schema,
+    category_update_schema,
 )
+from .utils import encode_cursor, decode_cursor, make_snippet, count_words
+from .search import search_index, search_text, fulltext_search
+from .cache import journal_cache
+from .replica import replica_reads
+from .conditional import (
+    bump_content_version,
+    conditional_get,
+    content_state,
+    content_version_query,
+    current_content_version,
+)
+from .sync import tombstones, parse_sync_token, sync_changes
+from .stats import DailyStatsDelta, journal_days, daily_stats
+from .export import export_rows, chunked, gzipped, EXPORT_FORMATS
+from .importer import (
+    import_journals,
+    import_uploads,
+    UploadTooLarge,
+    IMPORT_FORMATS,
+)
+from const.constants import (
+    JOURNAL_PAGE_SIZE,
+    JOURNAL_MAX_PAGE_SIZE,
+    JOURNAL_MAX_BATCH_SIZE,
+)
+from jobs.job_handler import executor, JobRejected
 from main import session
 
 
-class JournalHandler:
-    def __init__(self):
-        self.journ_schema = JournalSchema()
-        self.category_schema = CategorySchema()
-        self.journ_upd_schema = JournalUpdateSchema()
-        self.category_upd_schema = CategoryUpdateSchema()
+# ?fields= names on the list routes and the attribute each one loads
+LIST_FIELDS = {
+    "id": Journal.id,
+    "title": Journal.title,
+    "category": Journal.category,
+    "content": Journal.content,
+    "snippet": Journal.snippet,
+    "date": Journal.date_created,
+}
+
+
+def requested_fields(raw, default):
+    """(fields, None) from a comma separated ?fields=, or (None, error)"""
+    if raw is None:
+        return default, None
+    fields = tuple(dict.fromkeys(name.strip() for name in raw.split(",") if name))
+    unknown = [name for name in fields if name not in LIST_FIELDS]
+    if unknown or not fields:
+        return None, f"fields must be a comma separated subset of {', '.join(LIST_FIELDS)}"
+    return fields, None
+
+
+def field_options(fields):
+    """loader options selecting only the columns behind `fields`"""
+    # id and date_created are always read, the page cursor is built from them
+    columns = [LIST_FIELDS[name] for name in fields if name != "category"]
+    options = [load_only(Journal.id, Journal.date_created, *columns)]
+    if "category" in fields:
+        options.append(joinedload(Journal.category).load_only(Category.name))
+    return options
+
+
+def journal_fields(journal, fields):
+    values = {
+        "id": lambda: journal.id,
+        "title": lambda: journal.title,
+        "category": lambda: journal.category.name if journal.category else None,
+        "content": lambda: journal.content,
+        "snippet": lambda: journal.snippet,
+        "date": lambda: journal.date_created,
+    }
+    return {name: values[name]() for name in fields}
+
+
+def category_summary(user_id):
+    """
+    the category listing in one statement: every category of the user with
+    its entry count and latest entry, then a row with a NULL id for entries
+    without a category. both halves only read
+    ix_journal_user_id_category_id_date_created
+    """
+    counts = (
+        select(
+            Journal.category_id,
+            func.count().label("journal_count"),
+            func.max(Journal.date_created).label("latest_entry"),
+        )
+        .where(Journal.user_id == user_id)
+        .group_by(Journal.category_id)
+        .subquery()
+    )
+    named = (
+        select(Category.id, Category.name, counts.c.journal_count, counts.c.latest_entry)
+        .outerjoin(counts, counts.c.category_id == Category.id)
+        .where(Category.user_id == user_id)
+    )
+    # a NULL category_id, or one left behind by a deleted category
+    uncategorized = (
+        select(
+            null(),
+            null(),
+            func.sum(counts.c.journal_count),
+            func.max(counts.c.latest_entry),
+        )
+        .select_from(counts)
+        .outerjoin(
+            Category,
+            and_(Category.id == counts.c.category_id, Category.user_id == user_id),
+        )
+        .where(Category.id.is_(None))
+    )
+    return union_all(named, uncategorized)
+
+
+def category_listing(rows):
+    categories, uncategorized = [], None
+    for row in rows:
+        # SUM comes back as a Decimal on MySQL
+        summary = {
+            "journal_count": int(row.journal_count or 0),
+            "latest_entry": row.latest_entry,
+        }
+        if row.id is None:
+            uncategorized = summary
+        else:
+            categories.append({"id": row.id, "name": row.name, **summary})
+    return {"message": categories, "uncategorized": uncategorized}
+
+
+def page_limit(raw):
+    """(limit, None) from ?limit=, capped at JOURNAL_MAX_PAGE_SIZE, or (None, error)"""
+    if raw is None:
+        return JOURNAL_PAGE_SIZE, None
+    try:
+        limit = int(raw)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        return None, "limit must be a positive integer"
+    return min(limit, JOURNAL_MAX_PAGE_SIZE), None
+
+
+def journal_page(user_id, fields, limit, position=None):
+    """
+    a page of the user's entries, newest first, plus one row telling
+    whether there is a next one. `position` is a decoded cursor
+    """
+    query = (
+        select(Journal)
+        .where(Journal.user_id == user_id)
+        .options(*field_options(fields))
+    )
+    if position is not None:
+        date_created, journal_id = position
+        # keyset seek: resume strictly after the last row of the
+        # previous page instead of skipping over it with OFFSET
+        query = query.where(
+            or_(
+                Journal.date_created < date_created,
+                and_(
+                    Journal.date_created == date_created,
+                    Journal.id < journal_id,
+                ),
+            )
+        )
+    return query.order_by(Journal.date_created.desc(), Journal.id.desc()).limit(
+        limit + 1
+    )
+
+
+def page_listing(journals, fields, limit):
+    next_cursor = None
+    if len(journals) > limit:
+        journals = journals[:limit]
+        last = journals[-1]
+        next_cursor = encode_cursor(last.date_created, last.id)
+    return {
+        "message": [journal_fields(journal, fields) for journal in journals],
+        "next_cursor": next_cursor,
+    }
+
+
+def journal_detail(user_id, journal_id):
+    return (
+        select(Journal)
+        .where(Journal.id == journal_id, Journal.user_id == user_id)
+        .options(joinedload(Journal.category), undefer(Journal.content))
+    )
+
+
+def journal_message(journal):
+    return {
+        "id": journal.id,
+        "title": journal.title,
+        "category": journal.category.name,
+        "category_id": journal.category.id,
+        "content": journal.content,
+        "date": journal.date_created,
+    }
 
+
+def category_journals(user_id, category_id, fields):
+    return (
+        select(Journal)
+        .where(Journal.user_id == user_id, Journal.category_id == category_id)
+        .options(*field_options(fields))
+    )
+
+
+def search_index_version(user_id):
+    """
+    the content version the open transaction commits, for search_index.add
+    and remove. only read while the index holds the user
+    """
+    if search_index.is_loaded(user_id):
+        return session.scalar(content_version_query(user_id))
+
+
+def backfill_snippets(batch_size=1000):
+    """fills snippet for rows written before the column existed"""
+    last_id, filled = 0, 0
+    try:
+        while True:
+            rows = (
+                session.query(Journal.id, Journal.content)
+                .filter(Journal.id > last_id, Journal.snippet.is_(None))
+                .order_by(Journal.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                return filled
+            last_id = rows[-1].id
+            session.execute(
+                update(Journal),
+                [{"id": row.id, "snippet": make_snippet(row.content)} for row in rows],
+            )
+            session.commit()
+            filled += len(rows)
+    finally:
+        session.close()
+
+
+def compress_contents(batch_size=1000):
+    """rewrites content stored before compression, returns the rows changed"""
+    raw_content = type_coerce(Journal.content, LargeBinary)
+    last_id, compressed = 0, 0
+    try:
+        while True:
+            rows = (
+                session.query(Journal.id, raw_content)
+                .filter(Journal.id > last_id)
+                .order_by(Journal.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                return compressed
+            last_id = rows[-1][0]
+            legacy = [
+                {"id": journal_id, "content": decompress_text(data)}
+                for journal_id, data in rows
+                if data is not None and not is_compressed(data)
+            ]
+            if legacy:
+                session.execute(update(Journal), legacy)
+                session.commit()
+                compressed += len(legacy)
+    finally:
+        session.close()
+
+
+def backfill_search_text(batch_size=1000):
+    """fills search_text for rows written before the column existed (MySQL)"""
+    if not fulltext_search():
+        return 0
+    last_id, filled = 0, 0
+    try:
+        while True:
+            rows = (
+                session.query(Journal.id, Journal.content)
+                .filter(
+                    Journal.id > last_id,
+                    Journal.search_text.is_(None),
+                    Journal.content.isnot(None),
+                )
+                .order_by(Journal.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                return filled
+            last_id = rows[-1].id
+            session.execute(
+                update(Journal),
+                [{"id": row.id, "search_text": row.content} for row in rows],
+            )
+            session.commit()
+            filled += len(rows)
+    finally:
+        session.close()
+
+
+class JournalHandler:
     def create_journal(self, user_id):
         data = request.get_json()
-        validated_data, error_messages = self.journ_schema.serialize_data(data)
+        validated_data, error_messages = journal_schema.serialize_data(data)
         if error_messages:
             return jsonify({"error": error_messages}), 400
         title = validated_data["title"]
@@ -33,10 +330,19 @@ class JournalHandler:
             content=content,
             category_id=category_id,
             user_id=user_id,
+            sync_version=current_content_version(user_id),
         )
         try:
+            session.execute(bump_content_version(user_id))
             session.add(journal)
+            # date_created and word_count are filled in by the insert
+            session.flush()
+            stats = DailyStatsDelta(user_id)
+            stats.add(journal.date_created, 1, journal.word_count)
+            session.execute(stats.statement())
+            version = search_index_version(user_id)
             session.commit()
+            search_index.add(user_id, version, journal.id, title, content)
             message = {
                 "message": "journal entry was added successfully",
             }
@@ -50,17 +356,152 @@ class JournalHandler:
         finally:
             session.close()
 
+    def batch_journals(self, user_id):
+        data = request.get_json()
+        operations = data.get("operations") if isinstance(data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            return jsonify({"error": "operations must be a non-empty list"}), 400
+        if len(operations) > JOURNAL_MAX_BATCH_SIZE:
+            message = {
+                "error": f"a batch can hold at most {JOURNAL_MAX_BATCH_SIZE} operations"  # noqa
+            }
+            return jsonify(message), 400
+        results = [None] * len(operations)
+        inserts, updates, deletes = [], {}, {}
+        touched = set()
+        now = datetime.now()
+        for index, operation in enumerate(operations):
+            if not isinstance(operation, dict):
+                results[index] = {"status": 400, "error": "invalid operation"}
+                continue
+            op = operation.get("op")
+            if op == "create":
+                validated_data, error_messages = journal_schema.serialize_data(
+                    operation.get("data")
+                )
+                if error_messages:
+                    results[index] = {"status": 400, "error": error_messages}
+                    continue
+                validated_data["user_id"] = user_id
+                validated_data["date_created"] = now
+                validated_data["word_count"] = count_words(validated_data["content"])
+                inserts.append((index, validated_data))
+            elif op in ("update", "delete"):
+                journal_id = operation.get("id")
+                if not isinstance(journal_id, int) or isinstance(journal_id, bool):
+                    results[index] = {"status": 400, "error": "id must be an integer"}
+                    continue
+                # updates and deletes are applied by type rather than in
+                # request order, so two of them on one entry are ambiguous
+                if journal_id in touched:
+                    message = {
+                        "error": f"journal {journal_id} is in the batch more than once"  # noqa
+                    }
+                    return jsonify(message), 400
+                touched.add(journal_id)
+                if op == "delete":
+                    deletes[index] = journal_id
+                    continue
+                validated_data, error_messages = journal_update_schema.serialize_data(
+                    operation.get("data")
+                )
+                if error_messages:
+                    results[index] = {"status": 400, "error": error_messages}
+                    continue
+                updates[index] = dict(validated_data, id=journal_id)
+                if "content" in validated_data:
+                    updates[index]["snippet"] = make_snippet(validated_data["content"])
+                    updates[index]["search_text"] = search_text(validated_data["content"])
+                    updates[index]["word_count"] = count_words(validated_data["content"])
+            else:
+                results[index] = {"status": 400, "error": f"unknown op {op!r}"}
+        try:
+            # bulk UPDATE/DELETE go by primary key only, so anything the user
+            # doesn't own is answered with a 404 before touching the table
+            requested = [row["id"] for row in updates.values()] + list(deletes.values())
+            owned = {}
+            if requested:
+                owned = {
+                    row.id: row
+                    for row in session.execute(journal_days(user_id, requested))
+                }
+            for index, row in list(updates.items()):
+                if row["id"] not in owned:
+                    del updates[index]
+                    results[index] = {"status": 404, "error": "Journal not Found"}
+            for index, journal_id in list(deletes.items()):
+                if journal_id not in owned:
+                    del deletes[index]
+                    results[index] = {"status": 404, "error": "Journal not Found"}
+            stats = DailyStatsDelta(user_id)
+            for _, row in inserts:
+                stats.add(now, 1, row["word_count"])
+            for row in updates.values():
+                if "word_count" in row:
+                    old = owned[row["id"]]
+                    stats.add(old.date_created, 0, row["word_count"] - (old.word_count or 0))
+            for journal_id in set(deletes.values()):
+                old = owned[journal_id]
+                stats.add(old.date_created, -1, -(old.word_count or 0))
+            if inserts or updates or deletes:
+                session.execute(bump_content_version(user_id))
+            version = current_content_version(user_id)
+            if inserts:
+                session.execute(
+                    insert(Journal).values(sync_version=version),
+                    [row for _, row in inserts],
+                )
+            for index, row in inserts:
+                results[index] = {"status": 201}
+            if updates:
+                session.execute(update(Journal), list(updates.values()))
+                session.execute(
+                    update(Journal)
+                    .where(Journal.id.in_([row["id"] for row in updates.values()]))
+                    .values(sync_version=version)
+                )
+            for index in updates:
+                results[index] = {"status": 200, "id": updates[index]["id"]}
+            if deletes:
+                session.execute(
+                    delete(Journal).where(
+                        Journal.user_id == user_id,
+                        Journal.id.in_(list(deletes.values())),
+                    )
+                )
+                session.execute(
+                    tombstones(user_id, "journal", set(deletes.values()))
+                )
+            for index in deletes:
+                results[index] = {"status": 200, "id": deletes[index]}
+            if stats:
+                session.execute(stats.statement())
+            session.commit()
+        except exc.SQLAlchemyError as e:
+            session.rollback()
+            return (
+                jsonify({"error": f"batch couldn't be applied due to {e}"}),  # noqa
+                400,
+            )
+        finally:
+            session.close()
+        if inserts or updates or deletes:
+            search_index.discard(user_id)
+        return jsonify({"message": results}), 200
+
     def create_category(self, user_id):
         data = request.get_json()
-        validated_data, error_messages = self.category_schema.serialize_data(data)
+        validated_data, error_messages = category_schema.serialize_data(data)
         if error_messages:
             return jsonify({"error": error_messages}), 400
         title = validated_data["name"]
         journal = Category(
             name=title,
             user_id=user_id,
+            sync_version=current_content_version(user_id),
         )
         try:
+            session.execute(bump_content_version(user_id))
             session.add(journal)
             session.commit()
             message = {
@@ -78,7 +519,7 @@ class JournalHandler:
 
     def update_journal_entry(self, user_id, journal_id):
         data = request.get_json()
-        validated_data, error_messages = self.journ_upd_schema.serialize_data(
+        validated_data, error_messages = journal_update_schema.serialize_data(
             data
         )  # Noqa
         if error_messages:
@@ -88,9 +529,22 @@ class JournalHandler:
             journal_data["title"] = validated_data["title"]
         if "content" in validated_data:
             journal_data["content"] = validated_data["content"]
+            journal_data["snippet"] = make_snippet(validated_data["content"])
+            journal_data["search_text"] = search_text(validated_data["content"])
+            journal_data["word_count"] = count_words(validated_data["content"])
         if "category_id" in validated_data:
             journal_data["category_id"] = validated_data["category_id"]
+        journal_data["sync_version"] = current_content_version(user_id)
+        stats = DailyStatsDelta(user_id)
         try:
+            session.execute(bump_content_version(user_id))
+            if "word_count" in journal_data:
+                for old in session.execute(journal_days(user_id, [journal_id])):
+                    stats.add(
+                        old.date_created,
+                        0,
+                        journal_data["word_count"] - (old.word_count or 0),
+                    )
             journal = (
                 session.query(Journal)
                 .filter_by(id=journal_id, user_id=user_id)
@@ -104,13 +558,27 @@ class JournalHandler:
             return jsonify(message), 404
         else:
             session.flush()
+            if stats:
+                session.execute(stats.statement())
+            version = search_index_version(user_id)
+            indexed = None
+            if version is not None:
+                indexed = (
+                    session.query(Journal.title, Journal.content)
+                    .filter_by(id=journal_id, user_id=user_id)
+                    .first()
+                )
             session.commit()
+            if indexed is not None:
+                search_index.add(
+                    user_id, version, journal_id, indexed.title, indexed.content
+                )
             message = {"message": "journal updated successfully"}
             return jsonify(message), 200
 
     def update_journal_category(self, user_id, category_id):
         data = request.get_json()
-        validated_data, error_messages = self.category_upd_schema.serialize_data(
+        validated_data, error_messages = category_update_schema.serialize_data(
             data
         )  # Noqa
         if error_messages:
@@ -118,10 +586,12 @@ class JournalHandler:
         category_data = {}
         if "name" in validated_data:
             category_data["name"] = validated_data["name"]
+        category_data["sync_version"] = current_content_version(user_id)
         try:
+            session.execute(bump_content_version(user_id))
             category = (
                 session.query(Category)
-                .filter_by(user_id=user_id, category_id=category_id)
+                .filter_by(user_id=user_id, id=category_id)
                 .update(category_data)  # noqa
             )
         except IntegrityError as e:
@@ -137,95 +607,289 @@ class JournalHandler:
             return jsonify(message), 200
 
     # TODO: nest the category inside the journal_entries instead of using category_id
+    @replica_reads
+    @conditional_get("journals")
+    @journal_cache("journals")
     def fetch_journals(user_id):
+        limit, error = page_limit(request.args.get("limit"))
+        if error:
+            return jsonify({"error": error}), 400
+        fields, error = requested_fields(
+            request.args.get("fields"), ("id", "title", "category", "content", "date")
+        )
+        if error:
+            return jsonify({"error": error}), 400
+        position = None
+        cursor = request.args.get("cursor", type=str)
+        if cursor:
+            position = decode_cursor(cursor)
+            if position is None:
+                return jsonify({"error": "invalid cursor"}), 400
         try:
-            journals = (
-                session.query(Journal)
-                .filter_by(user_id=user_id)
-                .options(joinedload(Journal.category))
-                .all()
-            )
+            journals = session.scalars(
+                journal_page(user_id, fields, limit, position)
+            ).all()
+            return jsonify(page_listing(journals, fields, limit)), 200
+        finally:
+            session.close()
+
+    def search_journals(user_id):
+        query = request.args.get("q", "", type=str).strip()
+        if not query:
+            return jsonify({"error": "search query is required"}), 400
+        limit, error = page_limit(request.args.get("limit"))
+        if error:
+            return jsonify({"error": error}), 400
+        try:
+            if fulltext_search():
+                relevance = match(
+                    Journal.title, Journal.search_text, against=query
+                ).in_natural_language_mode()
+                results = (
+                    session.query(Journal, relevance.label("score"))
+                    .filter(Journal.user_id == user_id, relevance)
+                    .options(joinedload(Journal.category), undefer(Journal.content))
+                    .order_by(relevance.desc())
+                    .limit(limit)
+                    .all()
+                )
+            else:
+                # the version is read before the rows, a write committed in
+                # between leaves the postings behind and they are loaded again
+                state = content_state(user_id)
+                version = None if state is None else state.content_version
+                if not search_index.is_current(user_id, version):
+                    search_index.load(
+                        user_id,
+                        version,
+                        session.query(Journal.id, Journal.title, Journal.content)
+                        .filter_by(user_id=user_id)
+                        .all(),
+                    )
+                hits = search_index.search(user_id, query, limit)
+                journals = {}
+                if hits:
+                    journals = {
+                        journal.id: journal
+                        for journal in session.query(Journal)
+                        .filter(
+                            Journal.user_id == user_id,
+                            Journal.id.in_([journal_id for journal_id, _ in hits]),
+                        )
+                        .options(joinedload(Journal.category), undefer(Journal.content))
+                    }
+                results = [
+                    (journals[journal_id], score)
+                    for journal_id, score in hits
+                    if journal_id in journals
+                ]
             journal_entries = []
-            for journal in journals:
+            for journal, score in results:
                 message = {
                     "id": journal.id,
                     "title": journal.title,
-                    "category": journal.category.name,
+                    "category": journal.category.name if journal.category else None,
                     "content": journal.content,
                     "date": journal.date_created,
+                    "score": round(float(score), 4),
                 }
                 journal_entries.append(message)
             return jsonify({"message": journal_entries}), 200
         finally:
             session.close()
 
+    @replica_reads
+    @conditional_get("journal")
+    @journal_cache("journal")
     def fetch_journal(user_id, journal_id):
         try:
-            journal = (
-                session.query(Journal)
-                .filter_by(id=journal_id, user_id=user_id)
-                .options(joinedload(Journal.category))
-                .first()
-            )
+            journal = session.scalars(journal_detail(user_id, journal_id)).first()
             if journal is None:
                 return jsonify({"error": "No such journal"}), 404
-            message = {
-                "id": journal.id,
-                "title": journal.title,
-                "category": journal.category.name,
-                "category_id": journal.category.id,
-                "content": journal.content,
-                "date": journal.date_created,
-            }
-            return jsonify({"message": message}), 200
+            return jsonify({"message": journal_message(journal)}), 200
         finally:
             session.close()
 
+    @replica_reads
+    @conditional_get("category_journals")
+    @journal_cache("category_journals")
     def fetch_journal_by_category(user_id, category_id):
+        fields, error = requested_fields(
+            request.args.get("fields"), ("title", "category", "content")
+        )
+        if error:
+            return jsonify({"error": error}), 400
         try:
-            journals = (
-                session.query(Journal)
-                .filter_by(user_id=user_id, category_id=category_id)
-                .options(joinedload(Category.category))
-                .all()
-            )
-            journal_entries = []
-            for journal in journals:
-                message = {
-                    "message": {
-                        "title": journal.title,
-                        "category": journal.category.name,
-                        "content": journal.content,
-                    }
-                }
-                journal_entries.append(message)
+            journals = session.scalars(
+                category_journals(user_id, category_id, fields)
+            ).all()
+            journal_entries = [
+                {"message": journal_fields(journal, fields)} for journal in journals
+            ]
             return jsonify({"message": journal_entries}), 200
         finally:
             session.close()
 
+    @replica_reads
+    @conditional_get("categories")
+    @journal_cache("categories")
     def fetch_category_details(user_id):
         try:
-            categories = session.query(Category).filter_by(user_id=user_id).all()
-            category_entries = []
-            for category in categories:
-                message = {
-                    "id": category.id,
-                    "name": category.name,
-                }
-                category_entries.append(message)
-            return jsonify({"message": category_entries}), 200
+            rows = session.execute(category_summary(user_id)).all()
+            return jsonify(category_listing(rows)), 200
         finally:
             session.close()
 
+    # not behind conditional_get, the current streak moves with the date
+    @replica_reads
+    @journal_cache("stats")
+    def fetch_stats(user_id):
+        return jsonify({"message": daily_stats(user_id)}), 200
+
+    @conditional_get("sync")
+    def sync_journals(user_id):
+        try:
+            since = parse_sync_token(request.args.get("since"))
+        except ValueError:
+            return jsonify({"error": "invalid sync token"}), 400
+        return jsonify({"message": sync_changes(user_id, since)}), 200
+
+    def export_journals(user_id):
+        export_format = request.args.get("format", "ndjson")
+        if export_format not in EXPORT_FORMATS:
+            message = {"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}
+            return jsonify(message), 400
+        to_lines, mimetype = EXPORT_FORMATS[export_format]
+        # nothing is read until the server starts sending the body
+        chunks = chunked(to_lines(export_rows(user_id)))
+        headers = {
+            "Content-Disposition": f"attachment; filename=journal.{export_format}",
+            "Vary": "Accept-Encoding",
+        }
+        if request.accept_encodings.quality("gzip"):
+            chunks = gzipped(chunks)
+            headers["Content-Encoding"] = "gzip"
+        return Response(chunks, mimetype=mimetype, headers=headers), 200
+
+    def import_file(user_id, stream, import_format, progress=None):
+        """shared by the import endpoints and `flask journal import`"""
+        report = import_journals(
+            user_id, IMPORT_FORMATS[import_format](stream), progress
+        )
+        search_index.discard(user_id)
+        return report
+
+    def import_format():
+        import_format = request.args.get("format", "ndjson")
+        if import_format not in IMPORT_FORMATS:
+            return None
+        return import_format
+
+    def import_journal_entries(user_id):
+        import_format = JournalHandler.import_format()
+        if import_format is None:
+            message = {"error": f"format must be one of {', '.join(IMPORT_FORMATS)}"}
+            return jsonify(message), 400
+        # read off the socket line by line, the body is never buffered whole
+        report = JournalHandler.import_file(user_id, request.stream, import_format)
+        return jsonify({"message": report}), 200
+
+    def create_import_upload(user_id):
+        upload_id = import_uploads.create(user_id)
+        return jsonify({"upload_id": upload_id, "offset": 0}), 201
+
+    def fetch_import_upload(user_id, upload_id):
+        offset = import_uploads.offset(user_id, upload_id)
+        if offset is not None:
+            message = {"upload_id": upload_id, "state": "uploading", "offset": offset}
+            return jsonify(message), 200
+        status = import_uploads.status(user_id, upload_id)
+        if status is None:
+            return jsonify({"error": "No such upload"}), 404
+        return jsonify(dict(status, upload_id=upload_id)), 200
+
+    def append_import_upload(user_id, upload_id):
+        current = import_uploads.offset(user_id, upload_id)
+        if current is None:
+            return jsonify({"error": "No such upload"}), 404
+        offset = request.headers.get("Upload-Offset", type=int)
+        if offset is None:
+            return jsonify({"error": "Upload-Offset header is required"}), 400
+        try:
+            new_offset = import_uploads.append(
+                user_id, upload_id, offset, request.stream
+            )
+        except FileNotFoundError:
+            return jsonify({"error": "No such upload"}), 404
+        except UploadTooLarge:
+            message = {"error": "upload exceeds the maximum import size"}
+            return jsonify(message), 413
+        if new_offset is None:
+            # the client lost track, it resumes from where the server is
+            message = {"error": "offset mismatch", "offset": current}
+            return jsonify(message), 409
+        return jsonify({"upload_id": upload_id, "offset": new_offset}), 200
+
+    def complete_import_upload(user_id, upload_id):
+        import_format = JournalHandler.import_format()
+        if import_format is None:
+            message = {"error": f"format must be one of {', '.join(IMPORT_FORMATS)}"}
+            return jsonify(message), 400
+        if not import_uploads.claim(user_id, upload_id):
+            return jsonify({"error": "No such upload"}), 404
+        # a big file takes longer than a request may, the client polls
+        # GET .../<upload_id> for the progress and the report
+        try:
+            executor.submit(
+                lambda: JournalHandler.import_upload(user_id, upload_id, import_format)
+            )
+        except JobRejected:
+            import_uploads.release(user_id, upload_id)
+            return jsonify({"error": "server is busy, try again later"}), 503
+        return jsonify({"upload_id": upload_id, "state": "importing"}), 202
+
+    def import_upload(user_id, upload_id, import_format):
+        """the background job behind complete_import_upload"""
+
+        def progress(counts):
+            import_uploads.set_status(user_id, upload_id, dict(counts, state="importing"))
+
+        try:
+            with import_uploads.open(user_id, upload_id) as f:
+                report = JournalHandler.import_file(user_id, f, import_format, progress)
+            import_uploads.set_status(user_id, upload_id, dict(report, state="done"))
+        except Exception:
+            import_uploads.set_status(
+                user_id, upload_id, {"state": "failed", "error": "import failed"}
+            )
+            raise
+        finally:
+            import_uploads.discard(user_id, upload_id)
+
     def delete_journal(user_id, journal_id):
+        session.execute(bump_content_version(user_id))
+        found = session.execute(journal_days(user_id, [journal_id])).all()
+        stats = DailyStatsDelta(user_id)
+        for old in found:
+            stats.add(old.date_created, -1, -(old.word_count or 0))
         session.query(Journal).filter_by(id=journal_id, user_id=user_id).delete()
+        if found:
+            session.execute(stats.statement())
+            session.execute(tombstones(user_id, "journal", [old.id for old in found]))
+        version = search_index_version(user_id)
         session.commit()
+        search_index.remove(user_id, version, journal_id)
         message = {"message": "journal deleted successfully"}
         return jsonify(message), 200
 
     #  TODO:handle error emerging after a user deletes a category
     def delete_category(user_id, category_id):
-        session.query(Category).filter_by(id=category_id, user_id=user_id).delete()
+        session.execute(bump_content_version(user_id))
+        deleted = (
+            session.query(Category).filter_by(id=category_id, user_id=user_id).delete()
+        )
+        if deleted:
+            session.execute(tombstones(user_id, "category", [int(category_id)]))
         session.commit()
         message = {"message": "category deleted successfully"}
         return jsonify(message), 200
@@ -0,0 +1,47 @@
+import itertools
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from main import session, replica_engines, REPLICA_STICKY_SECONDS
+from .conditional import content_state
+
+
+class ReplicaRouter:
+    """
+    sends the reads of the handlers it decorates to the replicas, taking
+    turns between them, unless the user wrote within the last
+    `sticky_seconds`, which keeps them on the primary until the replicas
+    have caught up with them. the time of the last write is the user's
+    content_modified, read from the primary by content_state, so every
+    worker process agrees on it and the version conditional_get and the
+    response cache key on is the primary's too
+    """
+
+    def __init__(self, engines, sticky_seconds):
+        # read on every request, main.bind_databases replaces the replicas
+        self.engines = engines
+        self.turns = itertools.count()
+        self.sticky_seconds = timedelta(seconds=sticky_seconds)
+
+    def sticky(self, user_id):
+        row = content_state(user_id)
+        if row is None or row.content_modified is None:
+            return False
+        # content_modified is naive UTC
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return now - row.content_modified < self.sticky_seconds
+
+    def __call__(self, fn):
+        @wraps(fn)
+        def wrapper(user_id, *args):
+            if not self.engines or self.sticky(user_id):
+                return fn(user_id, *args)
+            session.info["replica"] = self.engines[next(self.turns) % len(self.engines)]
+            try:
+                return fn(user_id, *args)
+            finally:
+                session.info.pop("replica", None)
+
+        return wrapper
+
+
+replica_reads = ReplicaRouter(replica_engines, REPLICA_STICKY_SECONDS)
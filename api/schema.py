@@ -1,4 +1,12 @@
 from marshmallow import Schema, fields, ValidationError, validate
+from const.constants import JOURNAL_MAX_CONTENT_LENGTH
+
+# validators for the fast paths, built once. they are the ones marshmallow
+# uses, so a payload they accept is one load() would accept too
+EMAIL = validate.Email()
+CONTENT_LENGTH = validate.Length(max=JOURNAL_MAX_CONTENT_LENGTH)
+LOGIN_FIELDS = frozenset(("email", "password"))
+JOURNAL_FIELDS = frozenset(("title", "content", "category_id"))
 
 
 class LoginSchema(Schema):
@@ -7,7 +15,27 @@ class LoginSchema(Schema):
         required=True, error_messages={"required": "Password is required."}
     )
 
+    @staticmethod
+    def fast_load(data):
+        """
+        the well-formed login payload without going through load(), None
+        for anything else so load() can report the errors
+        """
+        if type(data) is not dict or data.keys() != LOGIN_FIELDS:
+            return None
+        email, password = data["email"], data["password"]
+        if type(email) is not str or type(password) is not str:
+            return None
+        try:
+            EMAIL(email)
+        except ValidationError:
+            return None
+        return {"email": email, "password": password}
+
     def serialize_login_data(self, data):
+        validated_data = self.fast_load(data)
+        if validated_data is not None:
+            return validated_data, None
         try:
             validated_data = self.load(data)
             return validated_data, None
@@ -88,10 +116,32 @@ class CategorySchema(Schema):
 
 class JournalSchema(Schema):
     title = fields.Str(required=True)
-    content = fields.Str(required=True)
+    content = fields.Str(
+        required=True, validate=validate.Length(max=JOURNAL_MAX_CONTENT_LENGTH)
+    )
     category_id = fields.Integer()
 
+    @staticmethod
+    def fast_load(data):
+        """same as LoginSchema.fast_load for a new journal entry"""
+        if type(data) is not dict or not data.keys() <= JOURNAL_FIELDS:
+            return None
+        title, content = data.get("title"), data.get("content")
+        if type(title) is not str or type(content) is not str:
+            return None
+        # bools are ints to python but not to fields.Integer
+        if "category_id" in data and type(data["category_id"]) is not int:
+            return None
+        try:
+            CONTENT_LENGTH(content)
+        except ValidationError:
+            return None
+        return dict(data)
+
     def serialize_data(self, data):
+        validated_data = self.fast_load(data)
+        if validated_data is not None:
+            return validated_data, None
         try:
             validated_data = self.load(data)
             return validated_data, None
@@ -101,7 +151,7 @@ class JournalSchema(Schema):
 
 class JournalUpdateSchema(Schema):
     title = fields.Str()
-    content = fields.Str()
+    content = fields.Str(validate=validate.Length(max=JOURNAL_MAX_CONTENT_LENGTH))
     category_id = fields.Integer()
 
     def serialize_data(self, data):
@@ -121,3 +171,16 @@ class CategoryUpdateSchema(Schema):
             return validated_data, None
         except ValidationError as err:
             return None, err.messages
+
+
+# load() keeps no per-call state on the schema, so one instance of each is
+# shared by every request and thread
+login_schema = LoginSchema()
+password_reset_schema = PasswordResetSchema()
+update_user_schema = UpdateUserSchema()
+register_schema = RegisterSchema()
+account_activate_schema = AccountActivateSchema()
+category_schema = CategorySchema()
+journal_schema = JournalSchema()
+journal_update_schema = JournalUpdateSchema()
+category_update_schema = CategoryUpdateSchema()
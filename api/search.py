@@ -0,0 +1,156 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+import main
+from main import SEARCH_INDEX_MAX_ENTRIES
+
+
+def fulltext_search():
+    """
+    MySQL answers searches from the FULLTEXT index on journal(title,
+    search_text), search_text being the uncompressed content. every other
+    backend (sqlite in local/test setups) uses the in-process index over
+    title and content and leaves search_text empty
+    """
+    return main.engine.dialect.name == "mysql"
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def search_text(content):
+    """the search_text to store next to `content` when it is updated"""
+    return content if fulltext_search() else None
+
+
+class UserPostings:
+    def __init__(self, version, postings, documents):
+        # the user's content_version the postings reflect
+        self.version = version
+        # term -> {journal_id: term_frequency}
+        self.postings = postings
+        # journal_id -> Counter(term -> term_frequency)
+        self.documents = documents
+
+
+class InvertedIndex:
+    """
+    per-user inverted index used as a search fallback when the database has
+    no FULLTEXT support. a user's postings are built from the database on
+    their search and are then kept current by the journal write paths, so a
+    query only touches the postings of its own terms.
+
+    the postings carry the user's content_version. a write is applied only
+    when it is the version right after them, a write they missed (made by
+    another worker process, or committed while they were being loaded)
+    drops them and the next search, which finds them behind the user's
+    version, loads them again. at most `max_entries` journal entries are
+    held, the users who searched least recently are dropped first
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.users = OrderedDict()
+        self.entries = 0
+
+    def is_loaded(self, user_id):
+        return user_id in self.users
+
+    def is_current(self, user_id, version):
+        with self.lock:
+            user = self.users.get(user_id)
+            return user is not None and user.version == version
+
+    def load(self, user_id, version, rows):
+        """`version` has to be read before `rows`"""
+        postings, documents = {}, {}
+        for journal_id, title, content in rows:
+            terms = Counter(tokenize(title) + tokenize(content))
+            documents[journal_id] = terms
+            for term, frequency in terms.items():
+                postings.setdefault(term, {})[journal_id] = frequency
+        with self.lock:
+            self._discard(user_id)
+            self.users[user_id] = UserPostings(version, postings, documents)
+            self.entries += len(documents)
+            while self.entries > self.max_entries and len(self.users) > 1:
+                self._discard(next(iter(self.users)))
+
+    def add(self, user_id, version, journal_id, title, content):
+        with self.lock:
+            user = self._advance(user_id, version)
+            if user is None:
+                return
+            self._remove(user, journal_id)
+            terms = Counter(tokenize(title) + tokenize(content))
+            user.documents[journal_id] = terms
+            self.entries += 1
+            for term, frequency in terms.items():
+                user.postings.setdefault(term, {})[journal_id] = frequency
+
+    def remove(self, user_id, version, journal_id):
+        with self.lock:
+            user = self._advance(user_id, version)
+            if user is not None:
+                self._remove(user, journal_id)
+
+    def discard(self, user_id):
+        with self.lock:
+            self._discard(user_id)
+
+    def _advance(self, user_id, version):
+        user = self.users.get(user_id)
+        if user is None:
+            return None
+        if version is None or user.version + 1 != version:
+            self._discard(user_id)
+            return None
+        user.version = version
+        return user
+
+    def _discard(self, user_id):
+        user = self.users.pop(user_id, None)
+        if user is not None:
+            self.entries -= len(user.documents)
+
+    def _remove(self, user, journal_id):
+        terms = user.documents.pop(journal_id, None)
+        if terms is None:
+            return
+        self.entries -= 1
+        for term in terms:
+            matches = user.postings.get(term)
+            if matches is None:
+                continue
+            matches.pop(journal_id, None)
+            if not matches:
+                del user.postings[term]
+
+    def search(self, user_id, query, limit):
+        """returns up to `limit` (journal_id, score) pairs, best match first"""
+        with self.lock:
+            user = self.users.get(user_id)
+            if user is None:
+                return []
+            self.users.move_to_end(user_id)
+            total = len(user.documents)
+            scores = {}
+            for term in set(tokenize(query)):
+                matches = user.postings.get(term)
+                if not matches:
+                    continue
+                idf = math.log(1 + total / len(matches))
+                for journal_id, frequency in matches.items():
+                    scores[journal_id] = scores.get(journal_id, 0) + frequency * idf  # noqa
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+search_index = InvertedIndex(SEARCH_INDEX_MAX_ENTRIES)
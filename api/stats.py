@@ -0,0 +1,212 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import select, delete, func, insert, update, distinct
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from models.models import Journal, JournalDailyStats
+from .utils import count_words
+from const.constants import (
+    JOURNAL_STATS_DAYS,
+    JOURNAL_STATS_WEEKS,
+    JOURNAL_STATS_MONTHS,
+)
+import main
+from main import session
+
+UPSERTS = {"mysql": mysql.insert, "postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class DailyStatsDelta:
+    """
+    changes to one user's daily rollups, collected while a journal write
+    runs and applied in the same transaction with statement()
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.days = defaultdict(lambda: [0, 0])
+
+    def __bool__(self):
+        return bool(self.days)
+
+    def add(self, date_created, entries=0, words=0):
+        day = self.days[date_created.date()]
+        day[0] += entries
+        day[1] += words or 0
+
+    def statement(self):
+        rows = [
+            {"user_id": self.user_id, "day": day, "entries": entries, "words": words}
+            for day, (entries, words) in self.days.items()
+        ]
+        dialect = main.engine.dialect.name
+        upsert = UPSERTS[dialect](JournalDailyStats).values(rows)
+        if dialect == "mysql":
+            added = upsert.inserted
+            return upsert.on_duplicate_key_update(
+                entries=JournalDailyStats.entries + added.entries,
+                words=JournalDailyStats.words + added.words,
+            )
+        return upsert.on_conflict_do_update(
+            index_elements=[JournalDailyStats.user_id, JournalDailyStats.day],
+            set_={
+                "entries": JournalDailyStats.entries + upsert.excluded.entries,
+                "words": JournalDailyStats.words + upsert.excluded.words,
+            },
+        )
+
+
+def journal_days(user_id, journal_ids):
+    """the day and words of entries about to change, for their rollup deltas"""
+    return select(Journal.id, Journal.date_created, Journal.word_count).where(
+        Journal.user_id == user_id, Journal.id.in_(journal_ids)
+    )
+
+
+def streaks(days, today):
+    """(current, longest) run of consecutive days in the sorted `days`"""
+    import numpy as np
+
+    if not len(days):
+        return 0, 0
+    ordinals = days.astype(np.int64)
+    # a new run starts wherever the gap to the previous day isn't one
+    run_ids = np.concatenate(([0], np.cumsum(np.diff(ordinals) != 1)))
+    lengths = np.bincount(run_ids)
+    # a streak that ended yesterday is still current until today is over
+    alive = (today - days[-1]).astype(np.int64) <= 1
+    return int(lengths[-1]) if alive else 0, int(lengths.max())
+
+
+def series(days, entries, words, starts, end):
+    """entries and words summed into the buckets beginning at `starts`"""
+    import numpy as np
+
+    in_window = (days >= starts[0]) & (days <= end)
+    buckets = np.searchsorted(starts, days[in_window], side="right") - 1
+    size = len(starts)
+    entry_sums = np.bincount(buckets, weights=entries[in_window], minlength=size)
+    word_sums = np.bincount(buckets, weights=words[in_window], minlength=size)
+    return [
+        {"start": start, "entries": int(entry_count), "words": int(word_count)}
+        for start, entry_count, word_count in zip(
+            starts.tolist(), entry_sums, word_sums
+        )
+    ]
+
+
+def writing_stats(rows, today):
+    """the /stats payload from a user's (day, entries, words) rollups"""
+    # imported here, numpy is a tenth of a second of app startup otherwise
+    import numpy as np
+
+    days = np.array([row.day for row in rows], dtype="datetime64[D]")
+    entries = np.array([row.entries for row in rows], dtype=np.int64)
+    words = np.array([row.words for row in rows], dtype=np.int64)
+    today = np.datetime64(today, "D")
+    # 1970-01-01 was a Thursday, weeks start on Monday
+    monday = today - (today.astype(np.int64) + 3) % 7
+    month = today.astype("datetime64[M]")
+    current_streak, longest_streak = streaks(days[entries > 0], today)
+    return {
+        "total_entries": int(entries.sum()),
+        "total_words": int(words.sum()),
+        "current_streak": current_streak,
+        "longest_streak": longest_streak,
+        "per_day": series(
+            days, entries, words, today - np.arange(JOURNAL_STATS_DAYS)[::-1], today
+        ),
+        "per_week": series(
+            days,
+            entries,
+            words,
+            monday - 7 * np.arange(JOURNAL_STATS_WEEKS)[::-1],
+            today,
+        ),
+        "per_month": series(
+            days,
+            entries,
+            words,
+            (month - np.arange(JOURNAL_STATS_MONTHS)[::-1]).astype("datetime64[D]"),
+            today,
+        ),
+    }
+
+
+def daily_stats(user_id):
+    try:
+        rows = session.execute(
+            select(
+                JournalDailyStats.day,
+                JournalDailyStats.entries,
+                JournalDailyStats.words,
+            )
+            .where(JournalDailyStats.user_id == user_id, JournalDailyStats.entries > 0)
+            .order_by(JournalDailyStats.day)
+        ).all()
+    finally:
+        session.close()
+    # date_created is server local time, so is the day a streak is alive on
+    return writing_stats(rows, datetime.now().date())
+
+
+def backfill_daily_stats(batch_size=1000):
+    """
+    counts the words of entries written before word_count existed, then
+    rebuilds the rollups of `batch_size` users per transaction. returns the
+    number of users rebuilt
+    """
+    last_id = 0
+    try:
+        while True:
+            rows = (
+                session.query(Journal.id, Journal.content)
+                .filter(Journal.id > last_id, Journal.word_count.is_(None))
+                .order_by(Journal.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            last_id = rows[-1].id
+            session.execute(
+                update(Journal),
+                [{"id": row.id, "word_count": count_words(row.content)} for row in rows],
+            )
+            session.commit()
+
+        last_user_id, rebuilt = 0, 0
+        while True:
+            user_ids = (
+                session.execute(
+                    select(distinct(Journal.user_id))
+                    .where(Journal.user_id > last_user_id)
+                    .order_by(Journal.user_id)
+                    .limit(batch_size)
+                )
+                .scalars()
+                .all()
+            )
+            if not user_ids:
+                return rebuilt
+            last_user_id = user_ids[-1]
+            day = func.date(Journal.date_created)
+            session.execute(
+                delete(JournalDailyStats).where(JournalDailyStats.user_id.in_(user_ids))
+            )
+            session.execute(
+                insert(JournalDailyStats).from_select(
+                    ["user_id", "day", "entries", "words"],
+                    select(
+                        Journal.user_id,
+                        day,
+                        func.count(),
+                        func.coalesce(func.sum(Journal.word_count), 0),
+                    )
+                    .where(Journal.user_id.in_(user_ids))
+                    .group_by(Journal.user_id, day),
+                )
+            )
+            session.commit()
+            rebuilt += len(user_ids)
+    finally:
+        session.close()
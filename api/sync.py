@@ -0,0 +1,97 @@
+from sqlalchemy import select, insert
+from models.models import Journal, Category, SyncTombstone, User
+from .conditional import current_content_version
+from main import session
+
+# tombstone kind -> key in the sync payload
+SYNC_KINDS = {"journal": "journals", "category": "categories"}
+
+
+def tombstones(user_id, kind, record_ids):
+    """
+    statement recording deleted rows for delta syncs, `kind` is journal or
+    category. run it after bump_content_version like the delete itself
+    """
+    version = current_content_version(user_id)
+    return insert(SyncTombstone).values(
+        [
+            {
+                "user_id": user_id,
+                "kind": kind,
+                "record_id": record_id,
+                "sync_version": version,
+            }
+            for record_id in record_ids
+        ]
+    )
+
+
+def parse_sync_token(token):
+    """the version in a sync token, None without one, ValueError if it's bad"""
+    if token is None:
+        return None
+    version = int(token)
+    if version < 0:
+        raise ValueError(token)
+    return version
+
+
+def sync_changes(user_id, since):
+    """
+    journals and categories written after version `since` and the ids of
+    the ones deleted since, read through the (user_id, sync_version)
+    indexes so the work follows the amount of change. without `since`, or
+    with one the server doesn't know, everything is sent with full=True
+    and the client replaces what it has
+    """
+    try:
+        version = (
+            session.query(User.content_version).filter_by(id=user_id).scalar() or 0
+        )
+        full = since is None or since > version
+        journals = select(
+            Journal.id,
+            Journal.title,
+            Journal.content,
+            Journal.snippet,
+            Journal.category_id,
+            Journal.date_created,
+            Journal.updated_at,
+        ).where(Journal.user_id == user_id)
+        categories = select(Category.id, Category.name, Category.updated_at).where(
+            Category.user_id == user_id
+        )
+        deleted = {key: [] for key in SYNC_KINDS.values()}
+        if not full:
+            journals = journals.where(Journal.sync_version > since)
+            categories = categories.where(Category.sync_version > since)
+            for kind, record_id in session.execute(
+                select(SyncTombstone.kind, SyncTombstone.record_id).where(
+                    SyncTombstone.user_id == user_id,
+                    SyncTombstone.sync_version > since,
+                )
+            ):
+                deleted[SYNC_KINDS[kind]].append(record_id)
+        return {
+            "token": str(version),
+            "full": full,
+            "journals": [
+                {
+                    "id": row.id,
+                    "title": row.title,
+                    "content": row.content,
+                    "snippet": row.snippet,
+                    "category_id": row.category_id,
+                    "date": row.date_created,
+                    "updated_at": row.updated_at,
+                }
+                for row in session.execute(journals.order_by(Journal.id))
+            ],
+            "categories": [
+                {"id": row.id, "name": row.name, "updated_at": row.updated_at}
+                for row in session.execute(categories.order_by(Category.id))
+            ],
+            "deleted": deleted,
+        }
+    finally:
+        session.close()
@@ -0,0 +1,57 @@
+import os
+import threading
+import time
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+
+TEMPLATE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "template"
+)
+
+
+class TemplateRegistry:
+    """
+    compiles every template in `directory` once and renders from memory.
+    at most every `check_interval` seconds a render also checks the files'
+    modification times and recompiles the ones that changed on disk.
+    """
+
+    def __init__(self, directory, check_interval=2):
+        self.directory = directory
+        self.check_interval = check_interval
+        # the registry keeps the compiled templates, jinja's cache would only
+        # hold a second copy and stat the file on every lookup
+        self.env = Environment(
+            loader=FileSystemLoader(directory),
+            autoescape=select_autoescape(["html"]),
+            cache_size=0,
+        )
+        self.templates = {}
+        self.mtimes = {}
+        self.lock = threading.Lock()
+        self.checked_at = 0
+        self.reload()
+
+    def reload(self):
+        with self.lock:
+            for name in self.env.list_templates():
+                mtime = os.path.getmtime(os.path.join(self.directory, name))
+                if self.mtimes.get(name) != mtime:
+                    self.templates[name] = self.env.get_template(name)
+                    self.mtimes[name] = mtime
+            self.checked_at = time.monotonic()
+
+    def get(self, name):
+        if time.monotonic() - self.checked_at > self.check_interval:
+            self.reload()
+        return self.templates[name]
+
+    def render(self, name, **context):
+        return self.get(name).render(**context)
+
+    def render_many(self, name, contexts):
+        template = self.get(name)
+        return [template.render(**context) for context in contexts]
+
+
+email_templates = TemplateRegistry(TEMPLATE_DIR)
@@ -1,7 +1,7 @@
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import exc
 from flask import request, jsonify, redirect
-from jobs.job_handler import Worker
+from jobs.outbox import queue_email, notify_dispatcher
 import time
 from models.models import User
 from const.constants import (
@@ -10,15 +10,17 @@ from const.constants import (
 )
 from datetime import datetime
 from auth.jwt import create_token
+from .replica import replica_reads
+from .conditional import bump_content_version
 from .schema import (
-    LoginSchema,
-    RegisterSchema,
-    PasswordResetSchema,
-    UpdateUserSchema,
-    AccountActivateSchema,
+    login_schema,
+    register_schema,
+    password_reset_schema,
+    update_user_schema,
+    account_activate_schema,
 )
 from main import (
-    bcrypt,
+    hasher,
     session,
     VERIFICATION_URL,
     ACCOUNT_VERIFICATION_URL,
@@ -30,7 +32,6 @@ from .utils import (
     decode_verification_key,
 )
 import re
-from main import mail
 import uuid
 
 
@@ -39,30 +40,16 @@ def verification_code():
     return code
 
 
-def send_account_verification_emails(recipient, first_name, verification_link):
-    email = account_verification_email_template(
-        recipient, first_name, verification_link
-    )
-    mail.send(email)
-
-
 def verification_link_builder(encrypted_code):
     return f"{VERIFICATION_URL}?code={encrypted_code}"
 
 
 class Users:
-    def __init__(self):
-        self.login_schema = LoginSchema()
-        self.reg_schema = RegisterSchema()
-        self.activate_schema = AccountActivateSchema()
-        self.password_reset_schema = PasswordResetSchema()
-        self.update_user = UpdateUserSchema()
-
     # Customer login
 
     def login(self):
         data = request.get_json()
-        validated_data, error_messages = self.login_schema.serialize_login_data(  # noqa
+        validated_data, error_messages = login_schema.serialize_login_data(  # noqa
             data
         )  # noqa
         if error_messages:
@@ -74,7 +61,11 @@ class Users:
             if user is None:
                 message = {"error": "User not Found"}
                 return jsonify(message), 401
-            if bcrypt.check_password_hash(user.hash_password, password):
+            if hasher.check_password_hash(user.hash_password, password):
+                if hasher.needs_rehash(user.hash_password):
+                    # the cost factor changed since this hash was made
+                    user.hash_password = hasher.generate_password_hash(password)
+                    session.commit()
                 access_token, refresh_token = create_token(user)
                 message = {
                     "message": "Successful Login",
@@ -129,7 +120,7 @@ class Users:
 
     def request_activate_account(self):
         data = request.get_json()
-        validated_data, error_messages = self.activate_schema.serialize_data(
+        validated_data, error_messages = account_activate_schema.serialize_data(
             data
         )  # noqa
         if error_messages:
@@ -147,18 +138,18 @@ class Users:
                 return jsonify({"error": "Account is already verified"}), 400
             user.activation_key = code
             user.activation_date_created = datetime.fromtimestamp(time.time())
-            session.flush()
-            session.commit()
             encrypted_code = encode_verification_key(code)
             verification_link = verification_link_builder(
                 encrypted_code.decode()
             )  # noqa
-            email_worker = Worker(
-                callback_fn=lambda: send_account_verification_emails(
+            queue_email(
+                account_verification_email_template(
                     user.email, user.username, verification_link
                 )
             )
-            email_worker.start()
+            session.flush()
+            session.commit()
+            notify_dispatcher()
             return (
                 jsonify({"message": "verification link sent"}),  # noqa
                 200,
@@ -175,14 +166,14 @@ class Users:
 
     def register(self):
         data = request.get_json()
-        validated_data, error_messages = self.reg_schema.serialize_register_data(data)
+        validated_data, error_messages = register_schema.serialize_register_data(data)
         if error_messages:
             return jsonify({"error": error_messages}), 400
         email = validated_data["email"]
         username = validated_data["username"]
         contact = validated_data["phone_number"]
         password = validated_data["password"]
-        password_hash = bcrypt.generate_password_hash(password)
+        password_hash = hasher.generate_password_hash(password)
         user = User(
             email=email,
             username=username,
@@ -209,7 +200,7 @@ class Users:
     def password_reset(self, email):
         data = request.get_json()
         validated_data, error_messages = (
-            self.password_reset_schema.serialize_password_reset_data(data)
+            password_reset_schema.serialize_password_reset_data(data)
         )  # Noqa
         if error_messages:
             return jsonify({"error": error_messages}), 400
@@ -220,18 +211,18 @@ class Users:
         if user is None:
             message = {"error": "User not Found"}
             return jsonify(message), 401
-        if bcrypt.check_password_hash(user.hash_password, old_password) is False:
+        if hasher.check_password_hash(user.hash_password, old_password) is False:
             message = {
                 "error": "This isn't your previous password, check again",
             }
             return jsonify(message), 400
-        if bcrypt.check_password_hash(user.hash_password, new_password):
+        if hasher.check_password_hash(user.hash_password, new_password):
             message = {
                 "error": "You can't use previous password as new password",
             }
             return jsonify(message), 400
         else:
-            user.hash_password = bcrypt.generate_password_hash(new_password)
+            user.hash_password = hasher.generate_password_hash(new_password)
             session.flush()
             session.commit()
             message = {"message": "Password updated successfully"}
@@ -239,7 +230,7 @@ class Users:
 
     def update_user_details(self, user_id):
         data = request.get_json()
-        validated_data, error_messages = self.update_user.serialize_user_data(
+        validated_data, error_messages = update_user_schema.serialize_user_data(
             data
         )  # Noqa
         if error_messages:
@@ -253,6 +244,8 @@ class Users:
             user_data["contact"] = validated_data["phone_number"]
         try:
             user = session.query(User).filter_by(id=user_id).update(user_data)
+            # marks the write, the user's reads stay on the primary for a while
+            session.execute(bump_content_version(user_id))
         except IntegrityError as e:
             session.rollback()
             return jsonify({"error": extract_error_message(e)}), 400
@@ -265,6 +258,7 @@ class Users:
             message = {"message": "user details updated successfully"}
             return jsonify(message), 200
 
+    @replica_reads
     def fetch_user_details(user_id):
         try:
             user = session.query(User).filter_by(id=user_id).first()
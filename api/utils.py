@@ -1,5 +1,9 @@
 from flask_mail import Message
+from datetime import datetime
 import base64
+import json
+from .templates import email_templates
+from const.constants import JOURNAL_SNIPPET_LENGTH
 
 
 def encode_verification_key(code):
@@ -12,18 +16,63 @@ def decode_verification_key(enc_code):
     return code
 
 
+def make_snippet(content, length=JOURNAL_SNIPPET_LENGTH):
+    """the start of `content` on one line, cut at a word boundary"""
+    if content is None:
+        return None
+    text = " ".join(content.split())
+    if len(text) <= length:
+        return text
+    cut = text[: length - 1]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut + "\u2026"
+
+
+def count_words(content):
+    return len(content.split()) if content else 0
+
+
 def account_verification_email_template(
     recipient,
     first_name,
     verification_link,
 ):
-    msg = Message(
-        "Account Registration",
-        sender="do-not-reply@codefremics.com",
-        recipients=[recipient],  # noqa
-    )
-    template_file = open("template/registration_email_template.html")
-    msg.html = template_file.read().format(
-        first_name=first_name, verification_link=verification_link
+    return account_verification_email_batch(
+        [(recipient, first_name, verification_link)]
+    )[0]
+
+
+def account_verification_email_batch(recipients):
+    """builds one Message per (recipient, first_name, verification_link)"""
+    recipients = list(recipients)
+    bodies = email_templates.render_many(
+        "registration_email_template.html",
+        (
+            {"first_name": first_name, "verification_link": verification_link}
+            for _, first_name, verification_link in recipients
+        ),
     )
-    return msg
+    messages = []
+    for (recipient, _, _), html in zip(recipients, bodies):
+        msg = Message(
+            "Account Registration",
+            sender="do-not-reply@codefremics.com",
+            recipients=[recipient],  # noqa
+        )
+        msg.html = html
+        messages.append(msg)
+    return messages
+
+
+def encode_cursor(date_created, journal_id):
+    payload = json.dumps([date_created.isoformat(), journal_id])
+    return base64.urlsafe_b64encode(str.encode(payload)).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        date_created, journal_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return datetime.fromisoformat(date_created), int(journal_id)
+    except (ValueError, TypeError):
+        return None
@@ -0,0 +1,37 @@
+"""
+optional ASGI entry point, the journal and auth routes run on the async
+engine and everything else falls through to the flask app:
+
+    pip install -r requirements-asgi.txt
+    uvicorn asgi:app --port 5000
+"""
+from contextlib import asynccontextmanager
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Mount
+from auth.hashing import HashingBusy
+from main import app as flask_app
+from main.aio import async_engine, jsonify
+from jobs.outbox import start_poller
+from urls.asgi import routes
+
+
+async def hashing_busy(request, e):
+    return jsonify({"error": "server is busy, try again later"}, 503)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    start_poller(flask_app)
+    yield
+    await async_engine.dispose()
+
+
+app = Starlette(
+    routes=routes + [Mount("/", app=WSGIMiddleware(flask_app))],
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"])],
+    exception_handlers={HashingBusy: hashing_busy},
+    lifespan=lifespan,
+)
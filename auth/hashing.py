@@ -0,0 +1,133 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+import bcrypt
+
+# nothing in here may import `main`: the pool's worker processes are started
+# fresh (forkserver, or spawn where there is none) and import this module to
+# find hash_password/check_password, they must not build the app. forking
+# the request process instead would copy its threads' locks, pools and
+# sockets into the workers
+START_METHOD = (
+    "forkserver"
+    if "forkserver" in multiprocessing.get_all_start_methods()
+    else "spawn"
+)
+
+
+class HashingBusy(Exception):
+    pass
+
+
+def hash_password(password, rounds):
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+
+def check_password(hashed, password):
+    if isinstance(hashed, str):
+        hashed = hashed.encode()
+    return bcrypt.checkpw(password.encode(), hashed)
+
+
+def hash_rounds(hashed):
+    if isinstance(hashed, bytes):
+        hashed = hashed.decode()
+    # $2b$<rounds>$<salt+digest>
+    return int(hashed.split("$")[2])
+
+
+def calibrate(target_ms, min_rounds=10, max_rounds=16, samples=3):
+    """
+    times hash_password for each cost factor and returns the measurements
+    with the highest cost whose median stays within `target_ms`
+    """
+    timings = []
+    for rounds in range(min_rounds, max_rounds + 1):
+        durations = []
+        for _ in range(samples):
+            started_at = time.perf_counter()
+            hash_password("calibration-password", rounds)
+            durations.append((time.perf_counter() - started_at) * 1000)
+        timings.append((rounds, sorted(durations)[samples // 2]))
+        # every extra round doubles the cost, no point measuring further
+        if timings[-1][1] > target_ms * 2:
+            break
+    fitting = [rounds for rounds, ms in timings if ms <= target_ms]
+    return timings, fitting[-1] if fitting else min_rounds
+
+
+class PasswordHasher:
+    """
+    runs bcrypt in a pool of worker processes so hashing can't starve the
+    request threads. at most `queue_size` hashes are in flight, anything
+    beyond that raises HashingBusy immediately instead of queueing up. the
+    pool is created on first use and recreated after a fork.
+    """
+
+    def __init__(self, workers, queue_size, rounds, timeout=10):
+        self.workers = workers
+        self.rounds = rounds
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(queue_size)
+        self.pool = None
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def executor(self):
+        with self.lock:
+            if self.pool is None or self.pid != os.getpid():
+                self.pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(START_METHOD),
+                )
+                self.pid = os.getpid()
+            return self.pool
+
+    def submit(self, fn, *args):
+        if not self.slots.acquire(blocking=False):
+            raise HashingBusy("password hashing is saturated")
+        try:
+            future = self.executor().submit(fn, *args)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def run(self, fn, *args):
+        future = self.submit(fn, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HashingBusy("password hashing timed out")
+
+    async def run_async(self, fn, *args):
+        future = asyncio.wrap_future(self.submit(fn, *args))
+        try:
+            return await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise HashingBusy("password hashing timed out")
+
+    def generate_password_hash(self, password):
+        return self.run(hash_password, password, self.rounds)
+
+    def check_password_hash(self, hashed, password):
+        return self.run(check_password, hashed, password)
+
+    async def generate_password_hash_async(self, password):
+        return await self.run_async(hash_password, password, self.rounds)
+
+    async def check_password_hash_async(self, hashed, password):
+        return await self.run_async(check_password, hashed, password)
+
+    def needs_rehash(self, hashed):
+        return hash_rounds(hashed) != self.rounds
+
+    def shutdown(self):
+        with self.lock:
+            if self.pool is not None and self.pid == os.getpid():
+                self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
@@ -0,0 +1,125 @@
+"""
+journal content stored as plain TEXT versus the CompressedText column in
+models/types.py: bytes on disk, point read latency (decompression included)
+and the latency of scanning a list page with and without the content column.
+
+    python benchmarks/content_storage.py
+    python benchmarks/content_storage.py --entries 5000 --words 1500
+
+runs on two throwaway sqlite files and doesn't touch the app's database.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import seed as seeder  # noqa: E402
+
+sys.path.insert(0, seeder.ROOT)
+from sqlalchemy import (  # noqa: E402
+    Column,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    create_engine,
+    func,
+    insert,
+    select,
+)
+from models.types import CompressedText  # noqa: E402
+
+
+def build(path, content_type, entries):
+    engine = create_engine(f"sqlite:///{path}")
+    table = Table(
+        "journal",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("title", String(255)),
+        Column("content", content_type),
+    )
+    table.create(engine)
+    with engine.begin() as connection:
+        for start in range(0, len(entries), 1000):
+            connection.execute(insert(table), entries[start:start + 1000])
+    return engine, table
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started_at)
+    timings.sort()
+    return {
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95)] * 1000, 3),
+    }
+
+
+def measure(engine, table, ids, rng, repeat):
+    stored = select(func.sum(func.length(table.c.content)))
+    with engine.connect() as connection:
+        result = {"content_bytes": connection.execute(stored).scalar()}
+
+        def point_read():
+            connection.execute(
+                select(table.c.content).where(table.c.id == rng.choice(ids))
+            ).scalar()
+
+        def list_page(columns):
+            return lambda: connection.execute(
+                select(*columns).order_by(table.c.id.desc()).limit(50)
+            ).all()
+
+        result["point_read"] = timed(point_read, repeat)
+        result["list_page_with_content"] = timed(
+            list_page([table.c.id, table.c.title, table.c.content]), repeat
+        )
+        result["list_page_without_content"] = timed(
+            list_page([table.c.id, table.c.title]), repeat
+        )
+    engine.dispose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=800, help="mean per entry")
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    entries = [
+        {
+            "id": i,
+            "title": seeder.sentence(rng, 4),
+            "content": seeder.sentence(rng, max(1, int(rng.expovariate(1 / args.words)))),
+        }
+        for i in range(1, args.entries + 1)
+    ]
+    ids = [entry["id"] for entry in entries]
+    directory = tempfile.mkdtemp()
+    report = {"entries": args.entries, "mean_words": args.words}
+    for name, content_type in (("text", Text()), ("compressed", CompressedText())):
+        path = os.path.join(directory, f"{name}.db")
+        engine, table = build(path, content_type, entries)
+        report[name] = measure(engine, table, ids, random.Random(args.seed), args.repeat)
+        report[name]["file_bytes"] = os.path.getsize(path)
+    report["ratio"] = round(
+        report["compressed"]["content_bytes"] / report["text"]["content_bytes"], 3
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+serialization throughput of the JSON providers in main/json_provider.py on
+journal list responses: flask's stock provider (datetimes as HTTP dates),
+the stdlib one and the orjson one, each building the full response body.
+
+    python benchmarks/json_encoding.py
+    python benchmarks/json_encoding.py --entries 100 500 2000 --words 150
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import seed as seeder  # noqa: E402
+
+
+def journal_list(rng, entries, words):
+    """a `GET /api/v1/journal` payload with `entries` journals"""
+    now = datetime(2024, 5, 1, 9, 30)
+    return {
+        "message": [
+            {
+                "id": i,
+                "title": seeder.sentence(rng, 4),
+                "category": rng.choice(("work", "family", "travel")),
+                "content": seeder.sentence(rng, words),
+                "date": now - timedelta(hours=i, seconds=rng.randrange(3600)),
+            }
+            for i in range(entries, 0, -1)
+        ],
+        "next_cursor": None,
+    }
+
+
+def measure(app, provider, payload, seconds):
+    calls, size = 0, 0
+    with app.app_context():
+        started_at = time.perf_counter()
+        deadline = started_at + seconds
+        while time.perf_counter() < deadline:
+            size = len(provider.response(payload).get_data())
+            calls += 1
+        elapsed = time.perf_counter() - started_at
+    return {
+        "responses_per_second": round(calls / elapsed, 1),
+        "mb_per_second": round(calls * size / elapsed / 1e6, 1),
+        "body_bytes": size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, nargs="+", default=[50, 500, 2000])
+    parser.add_argument("--words", type=int, default=60, help="content per entry")
+    parser.add_argument("--seconds", type=float, default=2, help="per measurement")
+    args = parser.parse_args()
+
+    seeder.configure()
+    from flask.json.provider import DefaultJSONProvider
+    from main import app
+    from main.json_provider import JSON_PROVIDERS, orjson
+
+    providers = {"flask_default": DefaultJSONProvider}
+    providers.update(
+        (name, cls) for name, cls in JSON_PROVIDERS.items() if name != "orjson" or orjson
+    )
+    rng = random.Random(0)
+    report = {}
+    for entries in args.entries:
+        payload = journal_list(rng, entries, args.words)
+        report[entries] = {
+            name: measure(app, cls(app), payload, args.seconds)
+            for name, cls in providers.items()
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
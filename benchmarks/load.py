@@ -0,0 +1,329 @@
+"""
+closed-loop load generator replaying the mobile client's traffic mix
+(login, refresh, journal listing and CRUD, category calls) against a locally
+started server, to find the concurrency at which the connection pool in
+main/__init__.py becomes the bottleneck.
+
+    python benchmarks/load.py --clients 50 --duration 60 --think-time 0.5
+    python benchmarks/load.py --clients 100 --pool-size 5 --max-overflow 0
+
+every client is its own seeded user and waits for each response before
+thinking and sending the next request. throughput, error rate and the
+pool's checkout wait (scraped from /metrics) are reported per interval and
+for the whole run as JSON. the pool figures cover the sync engine, so in
+--mode asgi they only reflect the routes that fall through to flask.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import seed as seeder  # noqa: E402
+from serving_modes import SERVERS, request, wait_until_up  # noqa: E402
+
+# relative weights of the calls the mobile app makes once logged in
+MIX = {
+    "list_journals": 35,
+    "fetch_journal": 10,
+    "list_categories": 10,
+    "create_journal": 12,
+    "update_journal": 10,
+    "delete_journal": 5,
+    "create_category": 3,
+    "refresh": 10,
+    "login": 5,
+}
+
+
+class MobileClient:
+    """one simulated app install, logged in as its own user"""
+
+    def __init__(self, port, index, rng):
+        self.port = port
+        self.email = seeder.email(index)
+        self.rng = rng
+        self.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        self.journal_ids = []
+        self.category_ids = []
+
+    def call(self, method, path, body=None, token=None):
+        headers = {"Authorization": "Bearer " + token} if token else None
+        try:
+            status, data = request(self.connection, method, path, body, headers)
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = http.client.HTTPConnection(
+                "127.0.0.1", self.port, timeout=60
+            )
+            return None, None
+        try:
+            return status, json.loads(data)
+        except ValueError:
+            return status, None
+
+    def login(self):
+        status, body = self.call(
+            "POST",
+            "/api/v1/authentication/login",
+            {"email": self.email, "password": seeder.PASSWORD},
+        )
+        if status == 200:
+            self.access = body["access_token"]
+            self.refresh_token = body["refresh_token"]
+        return status
+
+    def refresh(self):
+        status, body = self.call(
+            "GET", "/api/v1/authentication/refresh", token=self.refresh_token
+        )
+        if status == 200:
+            self.access = body["access_token"]
+        return status
+
+    def list_journals(self):
+        status, body = self.call("GET", "/api/v1/journal", token=self.access)
+        if status == 200:
+            self.journal_ids = [entry["id"] for entry in body["message"]]
+        return status
+
+    def fetch_journal(self):
+        if not self.journal_ids:
+            return self.list_journals()
+        journal_id = self.rng.choice(self.journal_ids)
+        return self.call("GET", f"/api/v1/journal/{journal_id}", token=self.access)[0]
+
+    def list_categories(self):
+        status, body = self.call("GET", "/api/v1/journal/category", token=self.access)
+        if status == 200:
+            self.category_ids = [category["id"] for category in body["message"]]
+        return status
+
+    def create_journal(self):
+        if not self.category_ids:
+            return self.list_categories()
+        return self.call(
+            "POST",
+            "/api/v1/journal",
+            {
+                "title": seeder.sentence(self.rng, 4),
+                "content": seeder.sentence(self.rng, 60),
+                "category_id": self.rng.choice(self.category_ids),
+            },
+            token=self.access,
+        )[0]
+
+    def update_journal(self):
+        if not self.journal_ids:
+            return self.list_journals()
+        journal_id = self.rng.choice(self.journal_ids)
+        return self.call(
+            "PUT",
+            f"/api/v1/journal/{journal_id}",
+            {"content": seeder.sentence(self.rng, 60)},
+            token=self.access,
+        )[0]
+
+    def delete_journal(self):
+        if not self.journal_ids:
+            return self.list_journals()
+        journal_id = self.journal_ids.pop(self.rng.randrange(len(self.journal_ids)))
+        return self.call("DELETE", f"/api/v1/journal/{journal_id}", token=self.access)[0]
+
+    def create_category(self):
+        return self.call(
+            "POST",
+            "/api/v1/journal/new_category",
+            {"name": seeder.sentence(self.rng, 2)},
+            token=self.access,
+        )[0]
+
+
+class Recorder:
+    """request outcomes shared by all client threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {action: [] for action in MIX}
+        self.errors = {action: 0 for action in MIX}
+        self.interval_requests = 0
+        self.interval_errors = 0
+
+    def record(self, action, elapsed, status):
+        failed = status is None or status >= 400
+        with self.lock:
+            self.latencies[action].append(elapsed)
+            self.interval_requests += 1
+            if failed:
+                self.errors[action] += 1
+                self.interval_errors += 1
+
+    def take_interval(self):
+        with self.lock:
+            counts = self.interval_requests, self.interval_errors
+            self.interval_requests = self.interval_errors = 0
+        return counts
+
+
+def scrape_pool(port):
+    """pool wait sum/count and checked out connections from /metrics"""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        status, body = request(connection, "GET", "/metrics")
+    except (OSError, http.client.HTTPException):
+        return None
+    if status != 200:
+        return None
+    values = {}
+    for line in body.decode().splitlines():
+        if line.startswith("journal_db_pool_"):
+            name, _, value = line.rpartition(" ")
+            values[name] = float(value)
+    return {
+        "wait_sum": values.get("journal_db_pool_checkout_wait_seconds_sum", 0.0),
+        "wait_count": values.get("journal_db_pool_checkout_wait_seconds_count", 0.0),
+        "checked_out": values.get("journal_db_pool_checked_out"),
+    }
+
+
+def average_wait_ms(before, after):
+    if before is None or after is None:
+        return None
+    count = after["wait_count"] - before["wait_count"]
+    if not count:
+        return 0.0
+    return round((after["wait_sum"] - before["wait_sum"]) / count * 1000, 3)
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] * 1000, 2)
+
+
+def run(port, clients, duration, think_time, interval, seed):
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+    actions, weights = list(MIX), list(MIX.values())
+
+    def client_loop(index):
+        rng = random.Random(seed + index)
+        client = MobileClient(port, index, rng)
+        if client.login() != 200 or client.list_categories() != 200:
+            recorder.record("login", 0, None)
+            return
+        while time.monotonic() < deadline:
+            action = rng.choices(actions, weights)[0]
+            started_at = time.perf_counter()
+            status = getattr(client, action)()
+            recorder.record(action, time.perf_counter() - started_at, status)
+            if think_time:
+                # exponential think time, the way people tap through an app
+                time.sleep(rng.expovariate(1 / think_time))
+
+    threads = [
+        threading.Thread(target=client_loop, args=(i,), daemon=True)
+        for i in range(clients)
+    ]
+    started_at = time.monotonic()
+    first = previous = scrape_pool(port)
+    for thread in threads:
+        thread.start()
+    timeline = []
+    while any(thread.is_alive() for thread in threads):
+        time.sleep(interval)
+        current = scrape_pool(port)
+        requests_done, errors = recorder.take_interval()
+        timeline.append(
+            {
+                "second": round(time.monotonic() - started_at, 1),
+                "requests_per_second": round(requests_done / interval, 1),
+                "errors": errors,
+                "pool_wait_ms_avg": average_wait_ms(previous, current),
+                "pool_checked_out": current and current["checked_out"],
+            }
+        )
+        previous = current
+    elapsed = time.monotonic() - started_at
+    total = sum(len(latencies) for latencies in recorder.latencies.values())
+    errors = sum(recorder.errors.values())
+    return {
+        "clients": clients,
+        "think_time": think_time,
+        "duration": round(elapsed, 1),
+        "requests": total,
+        "requests_per_second": round(total / elapsed, 1),
+        "error_rate": round(errors / total, 4) if total else None,
+        "pool_wait_ms_avg": average_wait_ms(first, previous),
+        "actions": {
+            action: {
+                "requests": len(latencies),
+                "errors": recorder.errors[action],
+                "p50_ms": percentile(latencies, 0.50),
+                "p95_ms": percentile(latencies, 0.95),
+            }
+            for action, latencies in recorder.latencies.items()
+        },
+        "timeline": timeline,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=list(SERVERS), default="wsgi")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean seconds")
+    parser.add_argument("--interval", type=float, default=5, help="timeline step")
+    parser.add_argument("--journals", type=int, default=50, help="seeded per client")
+    parser.add_argument("--pool-size", type=int, help="DB_POOL_SIZE for the server")
+    parser.add_argument("--max-overflow", type=int, help="DB_MAX_OVERFLOW for the server")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    seeder.configure()
+    os.environ["CACHE_TTL"] = "0"
+    os.environ["METRICS_ENABLED"] = "true"
+    if args.pool_size is not None:
+        os.environ["DB_POOL_SIZE"] = str(args.pool_size)
+    if args.max_overflow is not None:
+        os.environ["DB_MAX_OVERFLOW"] = str(args.max_overflow)
+    seeder.seed(users=args.clients, categories=3, journals=args.journals, seed=args.seed)
+
+    command = [part.format(port=args.port) for part in SERVERS[args.mode]]
+    # own session, so the password hashing pool goes down with the server
+    server = subprocess.Popen(
+        command,
+        cwd=seeder.ROOT,
+        env=os.environ,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    try:
+        wait_until_up(args.port, server)
+        result = run(
+            args.port,
+            args.clients,
+            args.duration,
+            args.think_time,
+            args.interval,
+            args.seed,
+        )
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait()
+    result["mode"] = args.mode
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
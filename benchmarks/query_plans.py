@@ -0,0 +1,117 @@
+"""
+query plan check: drives every auth and journal route against a seeded
+database, captures the SQL that JournalHandler and Users issue and runs
+EXPLAIN on each distinct statement. exits with 1 if any of them reads a
+table with a full scan, so a dropped or unusable index fails the check.
+
+    python benchmarks/query_plans.py
+    python benchmarks/query_plans.py --database mysql+pymysql://user:pw@localhost/journal
+"""
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import seed as seeder  # noqa: E402
+import routes as route_suite  # noqa: E402
+
+EXPLAINED = ("SELECT", "UPDATE", "DELETE")
+
+
+class StatementLog:
+    """distinct statements with the parameters of their first execution"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.statements = {}
+        event.listen(engine, "before_cursor_execute", self.record)
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(EXPLAINED):
+            return
+        if executemany:
+            parameters = parameters[0]
+        self.statements.setdefault(statement, parameters)
+
+
+def sqlite_full_scans(cursor, statement, parameters):
+    cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+    plan = [row[-1] for row in cursor.fetchall()]
+    # subqueries sqlite builds on the fly are scanned too, they aren't tables
+    derived = {
+        "SCAN " + line.split()[1]
+        for line in plan
+        if line.startswith(("MATERIALIZE ", "CO-ROUTINE "))
+    }
+    # only "SEARCH ..." and "SCAN ... USING COVERING INDEX" are allowed,
+    # "SCAN journal" reads every row and "SCAN journal USING INDEX ..."
+    # every index entry plus the row behind it
+    return [
+        line
+        for line in plan
+        if line.startswith("SCAN ")
+        and "USING COVERING INDEX" not in line
+        and line not in derived
+        and line != "SCAN CONSTANT ROW"
+    ]
+
+
+def mysql_full_scans(cursor, statement, parameters):
+    cursor.execute("EXPLAIN " + statement, parameters)
+    columns = [column[0] for column in cursor.description]
+    return [
+        f"ALL on {row['table']}"
+        for row in (dict(zip(columns, values)) for values in cursor.fetchall())
+        if row["type"] == "ALL" and not str(row["table"]).startswith("<derived")
+    ]
+
+
+EXPLAIN = {"sqlite": sqlite_full_scans, "mysql": mysql_full_scans}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database", help="SQLAlchemy URI, a temp sqlite file by default")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--journals", type=int, default=500, help="per user")
+    args = parser.parse_args()
+
+    seeder.configure(args.database)
+    os.environ["CACHE_TTL"] = "0"
+    ids = seeder.seed(args.users, 5, args.journals)
+
+    from main import app, engine
+
+    explain = EXPLAIN[engine.dialect.name]
+    app.extensions["mail"].suppress = True
+    app.logger.setLevel(logging.CRITICAL)
+    ctx = route_suite.Context(app.test_client(), ids)
+    log = StatementLog(engine)
+    for route in route_suite.ROUTES:
+        prepare = getattr(route, "prepare", None)
+        route(ctx, *((prepare(ctx),) if prepare else ()))
+
+    connection = engine.raw_connection()
+    failures = 0
+    try:
+        cursor = connection.cursor()
+        for statement, parameters in log.statements.items():
+            scans = explain(cursor, statement, parameters)
+            if scans:
+                failures += 1
+                print("full scan: " + ", ".join(scans), file=sys.stderr)
+                print("    " + " ".join(statement.split()), file=sys.stderr)
+        connection.rollback()
+    finally:
+        connection.close()
+    print(
+        f"{len(log.statements)} statements explained, {failures} with full scans",
+        file=sys.stderr,
+    )
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+read replica routing check: seeds a primary, copies it into a replica and
+drives the read-only routes around a write, counting the statements each
+database runs. the copy never catches up, so it stands in for a replica
+lagging forever: right after the write the writer has to be served from
+the primary and see the entry, once REPLICA_STICKY_SECONDS are over the
+replica again (without it), apart from the one lookup of the user's
+version on the primary. exits with 1 if a request went elsewhere.
+
+    python benchmarks/replicas.py
+    python benchmarks/replicas.py --database mysql+pymysql://user:pw@localhost:3306/journal \\
+        --replica mysql+pymysql://user:pw@localhost:3307/journal
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import seed as seeder  # noqa: E402
+
+READS = (
+    ("journals", "/api/v1/journal?limit={n}"),
+    ("journal", "/api/v1/journal/{journal_id}?n={n}"),
+    ("categories", "/api/v1/journal/category?n={n}"),
+    ("stats", "/api/v1/journal/stats?n={n}"),
+    ("user_details", "/api/v1/authentication/get_details/{user_id}?n={n}"),
+)
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self.record)
+
+    def record(self, *args):
+        self.count += 1
+
+
+def copy_database(source, target):
+    """every table of `source` recreated in `target` with the rows it has now"""
+    from sqlalchemy import select, insert
+    from models.models import db
+
+    db.metadata.drop_all(target)
+    db.metadata.create_all(target)
+    with source.connect() as reader, target.begin() as writer:
+        for table in db.metadata.sorted_tables:
+            rows = reader.execute(select(table)).mappings().all()
+            if rows:
+                writer.execute(insert(table), [dict(row) for row in rows])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database", help="primary URI, a temp sqlite file by default")
+    parser.add_argument("--replica", help="replica URI, a temp sqlite file by default")
+    parser.add_argument("--journals", type=int, default=200, help="per user")
+    parser.add_argument("--sticky", type=float, default=1, help="REPLICA_STICKY_SECONDS")
+    args = parser.parse_args()
+
+    seeder.configure(args.database)
+    replica_uri = args.replica or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(), "replica.db"
+    )
+    os.environ["REPLICA_DATABASE_URIS"] = replica_uri
+    os.environ["REPLICA_STICKY_SECONDS"] = str(args.sticky)
+    # cached responses would hide which database answered
+    os.environ["CACHE_TTL"] = "0"
+    os.environ.pop("CACHE_REDIS_URL", None)
+    ids = seeder.seed(2, 3, args.journals)
+
+    from sqlalchemy import select, func
+    from main import app, engine, replica_engines
+    from models.models import Journal
+
+    copy_database(engine, replica_engines[0])
+    app.extensions["mail"].suppress = True
+    app.logger.setLevel(logging.CRITICAL)
+    user_id = ids["user_ids"][0]
+    client = app.test_client()
+    tokens = client.post(
+        "/api/v1/authentication/login",
+        json={"email": seeder.email(0), "password": seeder.PASSWORD},
+    ).get_json()
+    headers = {"Authorization": "Bearer " + tokens["access_token"]}
+    counters = {"primary": StatementCounter(engine)}
+    counters["replica"] = StatementCounter(replica_engines[0])
+    requests = iter(range(1, 1_000_000))
+
+    def read_all(expected, written_id=None):
+        report = {}
+        for name, path in READS:
+            before = {key: counter.count for key, counter in counters.items()}
+            response = client.get(
+                path.format(
+                    n=next(requests),
+                    user_id=user_id,
+                    journal_id=written_id or ids["journal_ids"][user_id][0],
+                ),
+                headers=headers,
+            )
+            statements = {
+                key: counter.count - before[key] for key, counter in counters.items()
+            }
+            report[name] = {"status": response.status_code, **statements}
+            # the user's version and last write are always read from the
+            # primary, that lookup decides where the rest goes
+            if expected == "primary":
+                misrouted = statements["replica"] > 0
+            else:
+                misrouted = statements["primary"] > 1 or not statements["replica"]
+            if response.status_code != 200 or misrouted:
+                report[name]["failed"] = True
+        if written_id is not None:
+            report["journal"]["found_write"] = report["journal"]["status"] == 200
+        return report
+
+    report = {"before_write": read_all("replica")}
+    client.post(
+        "/api/v1/journal",
+        json={
+            "title": "written to the primary",
+            "content": "read your own writes",
+            "category_id": ids["category_ids"][user_id][0],
+        },
+        headers=headers,
+    )
+    with engine.connect() as connection:
+        written_id = connection.execute(select(func.max(Journal.id))).scalar()
+    report["after_write"] = read_all("primary", written_id)
+    time.sleep(args.sticky + 0.1)
+    report["after_window"] = read_all("replica")
+    # the replica copy never saw the entry
+    report["after_window"]["stale_replica"] = (
+        client.get(f"/api/v1/journal/{written_id}?late=1", headers=headers).status_code
+        == 404
+    )
+    print(json.dumps(report, indent=2))
+    failures = [
+        f"{phase}.{name}"
+        for phase, reads in report.items()
+        for name, result in reads.items()
+        if isinstance(result, dict) and result.get("failed")
+    ]
+    if not report["after_write"]["journal"]["found_write"]:
+        failures.append("after_write.journal did not see the write")
+    if failures:
+        print("misrouted: " + ", ".join(failures), file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
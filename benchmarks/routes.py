@@ -0,0 +1,444 @@
+"""
+per-route benchmark: seeds a sqlite database, drives every route of the
+auth and journal blueprints through the flask test client and reports
+latency percentiles, SQL statements per request and peak memory as JSON.
+
+    python benchmarks/routes.py --journals 2000 --output bench.json
+    python benchmarks/routes.py --compare bench.json
+
+`--compare` prints how each route moved against an earlier run, so
+regressions in JournalHandler and Users show up between commits.
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import seed as seeder  # noqa: E402
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class Context:
+    """state the route callables share: ids, tokens and a counter"""
+
+    def __init__(self, client, ids):
+        self.client = client
+        self.user_id = ids["user_ids"][0]
+        self.category_ids = ids["category_ids"][self.user_id]
+        self.journal_ids = ids["journal_ids"][self.user_id]
+        self.spare_journal_ids = list(self.journal_ids[len(self.journal_ids) // 2:])
+        self.counter = 0
+        self.password = seeder.PASSWORD
+        self.login()
+
+    def login(self):
+        body = self.client.post(
+            "/api/v1/authentication/login",
+            json={"email": seeder.email(0), "password": self.password},
+        ).get_json()
+        self.access = {"Authorization": "Bearer " + body["access_token"]}
+        self.refresh = {"Authorization": "Bearer " + body["refresh_token"]}
+
+    def next(self):
+        self.counter += 1
+        return self.counter
+
+
+def signup(ctx):
+    n = ctx.next()
+    return ctx.client.post(
+        "/api/v1/authentication/signup",
+        json={
+            "email": f"signup{n}@bench.example.com",
+            "username": f"signup{n}",
+            "phone_number": f"+2547100{n:05d}",
+            "password": seeder.PASSWORD,
+        },
+    )
+
+
+def login(ctx):
+    return ctx.client.post(
+        "/api/v1/authentication/login",
+        json={"email": seeder.email(0), "password": ctx.password},
+    )
+
+
+def reset_password(ctx):
+    new_password = f"bench-password-{ctx.next()}"
+    response = ctx.client.post(
+        "/api/v1/authentication/reset_password",
+        json={"old_password": ctx.password, "new_password": new_password},
+        headers=ctx.access,
+    )
+    if response.status_code == 200:
+        ctx.password = new_password
+    return response
+
+
+def update_details(ctx):
+    return ctx.client.put(
+        "/api/v1/authentication/update_details",
+        json={"phone_number": f"+2547200{ctx.next():05d}"},
+        headers=ctx.access,
+    )
+
+
+def get_details(ctx):
+    return ctx.client.get(
+        f"/api/v1/authentication/get_details/{ctx.user_id}", headers=ctx.access
+    )
+
+
+def refresh(ctx):
+    return ctx.client.get("/api/v1/authentication/refresh", headers=ctx.refresh)
+
+
+def request_activation(ctx):
+    return ctx.client.post(
+        "/api/v1/authentication/account/activation",
+        json={"email": seeder.email(1)},
+    )
+
+
+def activate(ctx):
+    return ctx.client.get("/api/v1/authentication/account/activation?code=Ym9ndXM=")
+
+
+def create_journal(ctx):
+    return ctx.client.post(
+        "/api/v1/journal",
+        json={
+            "title": "benchmark entry",
+            "content": "written by the route benchmark",
+            "category_id": ctx.category_ids[0],
+        },
+        headers=ctx.access,
+    )
+
+
+def batch_journals(ctx):
+    operations = [
+        {
+            "op": "create",
+            "data": {
+                "title": f"batch entry {i}",
+                "content": "written by the route benchmark",
+                "category_id": ctx.category_ids[0],
+            },
+        }
+        for i in range(10)
+    ]
+    operations += [
+        {"op": "update", "id": journal_id, "data": {"title": "batch update"}}
+        for journal_id in ctx.journal_ids[:10]
+    ]
+    return ctx.client.post(
+        "/api/v1/journal/batch", json={"operations": operations}, headers=ctx.access
+    )
+
+
+def create_category(ctx):
+    return ctx.client.post(
+        "/api/v1/journal/new_category",
+        json={"name": f"category {ctx.next()}"},
+        headers=ctx.access,
+    )
+
+
+def update_journal(ctx):
+    journal_id = ctx.journal_ids[ctx.next() % len(ctx.journal_ids)]
+    return ctx.client.put(
+        f"/api/v1/journal/{journal_id}",
+        json={"title": f"updated {ctx.counter}"},
+        headers=ctx.access,
+    )
+
+
+def update_category(ctx):
+    return ctx.client.put(
+        f"/api/v1/journal/category/{ctx.category_ids[0]}",
+        json={"name": f"renamed {ctx.next()}"},
+        headers=ctx.access,
+    )
+
+
+def fetch_journals(ctx):
+    return ctx.client.get("/api/v1/journal", headers=ctx.access)
+
+
+def fetch_journals_deep_page(ctx):
+    first = ctx.client.get("/api/v1/journal?limit=100", headers=ctx.access)
+    cursor = first.get_json()["next_cursor"]
+    return ctx.client.get(
+        f"/api/v1/journal?limit=100&cursor={cursor}", headers=ctx.access
+    )
+
+
+def fetch_journal(ctx):
+    journal_id = ctx.journal_ids[ctx.next() % len(ctx.journal_ids)]
+    return ctx.client.get(f"/api/v1/journal/{journal_id}", headers=ctx.access)
+
+
+def fetch_journal_by_category(ctx):
+    return ctx.client.get(
+        f"/api/v1/journal/category/{ctx.category_ids[0]}", headers=ctx.access
+    )
+
+
+def fetch_categories(ctx):
+    return ctx.client.get("/api/v1/journal/category", headers=ctx.access)
+
+
+def fetch_stats(ctx):
+    return ctx.client.get("/api/v1/journal/stats", headers=ctx.access)
+
+
+def sync_journals(ctx):
+    # a delta from an early token, it holds what the routes before it wrote
+    return ctx.client.get("/api/v1/journal/sync?since=1", headers=ctx.access)
+
+
+def search_journals(ctx):
+    word = seeder.WORDS[ctx.next() % len(seeder.WORDS)]
+    return ctx.client.get(f"/api/v1/journal/search?q={word}", headers=ctx.access)
+
+
+def export_journals(ctx):
+    response = ctx.client.get("/api/v1/journal/export", headers=ctx.access)
+    # the rows are only read while the body is consumed
+    response.get_data()
+    return response
+
+
+def import_lines(ctx, count):
+    n = ctx.next()
+    return "".join(
+        json.dumps(
+            {
+                "title": f"imported entry {n}.{i}",
+                "content": "written by the route benchmark",
+                "category": "imported by the benchmark",
+            }
+        )
+        + "\n"
+        for i in range(count)
+    ).encode()
+
+
+def import_journals(ctx):
+    return ctx.client.post(
+        "/api/v1/journal/import", data=import_lines(ctx, 20), headers=ctx.access
+    )
+
+
+def complete_import_upload(ctx, upload_id):
+    # timed until the background import is done
+    url = f"/api/v1/journal/import/uploads/{upload_id}"
+    response = ctx.client.post(url + "/complete", headers=ctx.access)
+    while response.status_code == 202 or response.get_json()["state"] == "importing":
+        time.sleep(0.001)
+        response = ctx.client.get(url, headers=ctx.access)
+    return response
+
+
+def prepare_import_upload(ctx):
+    upload_id = ctx.client.post(
+        "/api/v1/journal/import/uploads", headers=ctx.access
+    ).get_json()["upload_id"]
+    ctx.client.patch(
+        f"/api/v1/journal/import/uploads/{upload_id}",
+        data=import_lines(ctx, 20),
+        headers=dict(ctx.access, **{"Upload-Offset": "0"}),
+    )
+    return upload_id
+
+
+def delete_journal(ctx):
+    journal_id = ctx.spare_journal_ids.pop()
+    return ctx.client.delete(f"/api/v1/journal/{journal_id}", headers=ctx.access)
+
+
+def delete_category(ctx, category_id):
+    return ctx.client.delete(
+        f"/api/v1/journal/category/{category_id}", headers=ctx.access
+    )
+
+
+def prepare_delete_category(ctx):
+    create_category(ctx)
+    return ctx.client.get(
+        "/api/v1/journal/category", headers=ctx.access
+    ).get_json()["message"][-1]["id"]
+
+
+# routes with a prepare step get its result as a second argument, the
+# prepare step itself is not timed
+delete_category.prepare = prepare_delete_category
+complete_import_upload.prepare = prepare_import_upload
+
+
+ROUTES = [
+    signup,
+    login,
+    reset_password,
+    update_details,
+    get_details,
+    refresh,
+    request_activation,
+    activate,
+    create_journal,
+    batch_journals,
+    create_category,
+    update_journal,
+    update_category,
+    fetch_journals,
+    fetch_journals_deep_page,
+    fetch_journal,
+    fetch_journal_by_category,
+    fetch_categories,
+    fetch_stats,
+    sync_journals,
+    search_journals,
+    export_journals,
+    import_journals,
+    complete_import_upload,
+    delete_journal,
+    delete_category,
+]
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine, "after_cursor_execute", self.record)
+
+    def record(self, *args):
+        self.count += 1
+
+
+def measure(ctx, route, iterations, memory_iterations, queries):
+    latencies, statuses, counts = [], {}, []
+    prepare = getattr(route, "prepare", None)
+    for _ in range(iterations):
+        args = (prepare(ctx),) if prepare else ()
+        before = queries.count
+        started_at = time.perf_counter()
+        response = route(ctx, *args)
+        latencies.append(time.perf_counter() - started_at)
+        counts.append(queries.count - before)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    # tracemalloc slows everything down, so memory gets its own short pass
+    tracemalloc.start()
+    for _ in range(memory_iterations):
+        route(ctx, *((prepare(ctx),) if prepare else ()))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "iterations": iterations,
+        "status_codes": {str(code): n for code, n in sorted(statuses.items())},
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "queries_per_request": round(sum(counts) / len(counts), 2),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def compare(current, baseline):
+    print(f"{'route':<28}{'p50 ms':>20}{'p95 ms':>20}{'queries':>16}", file=sys.stderr)
+    for name, result in current["routes"].items():
+        previous = baseline["routes"].get(name)
+        if previous is None:
+            continue
+        cells = []
+        for key in ("p50_ms", "p95_ms"):
+            change = (result[key] - previous[key]) / previous[key] * 100 if previous[key] else 0
+            cells.append(f"{previous[key]:.2f}->{result[key]:.2f} {change:+.0f}%")
+        cells.append(
+            f"{previous['queries_per_request']}->{result['queries_per_request']}"
+        )
+        print(f"{name:<28}{cells[0]:>20}{cells[1]:>20}{cells[2]:>16}", file=sys.stderr)
+
+
+def make_safe(uri):
+    from sqlalchemy.engine import make_url
+
+    return make_url(uri).render_as_string(hide_password=True)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=seeder.ROOT,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database", help="SQLAlchemy URI, a temp sqlite file by default")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--categories", type=int, default=5, help="per user")
+    parser.add_argument("--journals", type=int, default=1000, help="per user")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--memory-iterations", type=int, default=5)
+    parser.add_argument("--routes", nargs="+", help="only run these routes")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache on")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    database = seeder.configure(args.database)
+    if not args.cache:
+        os.environ["CACHE_TTL"] = "0"
+    ids = seeder.seed(args.users, args.categories, args.journals)
+
+    from main import app, engine
+
+    app.extensions["mail"].suppress = True
+    # routes that answer 500 are reported by status code, not tracebacks
+    app.logger.setLevel(logging.CRITICAL)
+    queries = QueryCounter(engine)
+    ctx = Context(app.test_client(), ids)
+    routes = [r for r in ROUTES if not args.routes or r.__name__ in args.routes]
+    report = {
+        "commit": git_commit(),
+        "database": make_safe(database),
+        "users": args.users,
+        "categories_per_user": args.categories,
+        "journals_per_user": args.journals,
+        "routes": {},
+    }
+    for route in routes:
+        report["routes"][route.__name__] = measure(
+            ctx, route, args.iterations, args.memory_iterations, queries
+        )
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
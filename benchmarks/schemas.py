@@ -0,0 +1,85 @@
+"""
+validation microbenchmark for the hot payloads: validations per second for
+a new journal entry and a login, the way the handlers used to do it (a
+fresh Users()/JournalHandler() with all of its schemas per request, then
+load()) against the shared schemas in api/schema.py and their fast path.
+
+    python benchmarks/schemas.py
+    python benchmarks/schemas.py --seconds 5
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import seed as seeder  # noqa: E402
+
+PAYLOADS = {
+    "journal": {
+        "title": "rainy morning",
+        "content": "coffee by the window, quiet train ride to work " * 20,
+        "category_id": 3,
+    },
+    "login": {"email": "user1@bench.example.com", "password": seeder.PASSWORD},
+}
+
+
+def rate(fn, seconds):
+    """calls per second over roughly `seconds`"""
+    calls, started_at = 0, time.perf_counter()
+    deadline = started_at + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            fn()
+        calls += 100
+    return round(calls / (time.perf_counter() - started_at))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=2, help="per measurement")
+    args = parser.parse_args()
+
+    seeder.configure()
+    from api import schema
+
+    # the schemas each handler constructor used to build
+    handler_schemas = {
+        "journal": (
+            schema.JournalSchema,
+            schema.CategorySchema,
+            schema.JournalUpdateSchema,
+            schema.CategoryUpdateSchema,
+        ),
+        "login": (
+            schema.LoginSchema,
+            schema.RegisterSchema,
+            schema.AccountActivateSchema,
+            schema.PasswordResetSchema,
+            schema.UpdateUserSchema,
+        ),
+    }
+    shared = {
+        "journal": (schema.journal_schema, schema.journal_schema.serialize_data),
+        "login": (schema.login_schema, schema.login_schema.serialize_login_data),
+    }
+    report = {}
+    for name, payload in PAYLOADS.items():
+        shared_schema, serialize = shared[name]
+
+        def per_request():
+            schemas = [cls() for cls in handler_schemas[name]]
+            schemas[0].load(payload)
+
+        report[name] = {
+            "per_request_schemas": rate(per_request, args.seconds),
+            "shared_schema_load": rate(lambda: shared_schema.load(payload), args.seconds),
+            "shared_schema_fast_path": rate(lambda: serialize(payload), args.seconds),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
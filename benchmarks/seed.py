@@ -0,0 +1,117 @@
+"""
+seeded data generator for benchmarks and load tests. it has to be imported
+after MYSQL_DATABASE_URI points at the database to fill, `configure()`
+defaults it to a throwaway sqlite file.
+"""
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = "bench-password"
+WORDS = (
+    "morning coffee walk rain garden work meeting family dinner book music "
+    "run travel dream idea project friend weekend city river mountain sleep "
+    "tired happy quiet plan letter movie kitchen market train ocean winter"
+).split()
+
+
+def configure(database=None):
+    """points the app at `database` (a sqlite file by default) before import"""
+    if database:
+        os.environ["MYSQL_DATABASE_URI"] = database
+    elif not os.getenv("MYSQL_DATABASE_URI"):
+        path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        os.environ["MYSQL_DATABASE_URI"] = f"sqlite:///{path}"
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-of-32-bytes!")
+    # cheap hashes, the benchmarks measure the handlers and not bcrypt
+    os.environ.setdefault("BCRYPT_LOG_ROUNDS", "4")
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    return os.environ["MYSQL_DATABASE_URI"]
+
+
+def email(index):
+    return f"user{index}@bench.example.com"
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed(users=10, categories=5, journals=1000, seed=0):
+    """
+    recreates the schema and fills it through models.models: `users` users
+    with `categories` categories and `journals` entries each, spread over
+    the past year. returns the ids the benchmarks address by.
+    """
+    from sqlalchemy import insert
+    from main import app
+    from models.models import db, User, Category, Journal
+    from auth.hashing import hash_password
+    from api.stats import backfill_daily_stats
+
+    rng = random.Random(seed)
+    password_hash = hash_password(PASSWORD, int(os.environ["BCRYPT_LOG_ROUNDS"]))
+    now = datetime.now()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(
+            insert(User),
+            [
+                {
+                    "email": email(i),
+                    "username": f"user{i}",
+                    "contact": f"+2547000{i:05d}",
+                    "hash_password": password_hash,
+                    "activation_date_created": now,
+                    "created_date": now,
+                }
+                for i in range(users)
+            ],
+        )
+        user_ids = [
+            user_id for user_id, in db.session.query(User.id).order_by(User.id)
+        ]
+        db.session.execute(
+            insert(Category),
+            [
+                {"user_id": user_id, "name": f"category {c}"}
+                for user_id in user_ids
+                for c in range(categories)
+            ],
+        )
+        category_ids = {}
+        for category_id, user_id in db.session.query(Category.id, Category.user_id):
+            category_ids.setdefault(user_id, []).append(category_id)
+        rows = []
+        for user_id in user_ids:
+            for _ in range(journals):
+                rows.append(
+                    {
+                        "user_id": user_id,
+                        "title": sentence(rng, 4),
+                        "content": sentence(rng, 60),
+                        "category_id": rng.choice(category_ids[user_id]),
+                        "date_created": now
+                        - timedelta(seconds=rng.randrange(365 * 24 * 3600)),
+                    }
+                )
+                if len(rows) == 1000:
+                    db.session.execute(insert(Journal), rows)
+                    rows = []
+        if rows:
+            db.session.execute(insert(Journal), rows)
+        db.session.commit()
+        backfill_daily_stats()
+        journal_ids = {}
+        for journal_id, user_id in db.session.query(Journal.id, Journal.user_id):
+            journal_ids.setdefault(user_id, []).append(journal_id)
+    return {
+        "user_ids": user_ids,
+        "category_ids": category_ids,
+        "journal_ids": journal_ids,
+    }
@@ -0,0 +1,145 @@
+"""
+requests per second of one server process in the WSGI mode (flask, a
+thread per request on the sync engine) against the ASGI mode (asgi.py on
+the async engine). both servers run against the same seeded database and
+are driven with the same closed loop of GET /api/v1/journal requests.
+
+    python benchmarks/serving_modes.py --concurrency 32 --duration 10
+    MYSQL_DATABASE_URI=mysql+pymysql://... python benchmarks/serving_modes.py
+
+results are printed as JSON. sqlite serializes every query through a single
+file, the gap between the modes only shows against MySQL.
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import seed as seeder  # noqa: E402
+
+SERVERS = {
+    "wsgi": [
+        sys.executable, "-m", "flask", "--app", "main", "run",
+        "--port", "{port}", "--with-threads",
+    ],
+    "asgi": [
+        sys.executable, "-m", "uvicorn", "asgi:app",
+        "--port", "{port}", "--log-level", "warning",
+    ],
+}
+
+
+def request(connection, method, path, body=None, headers=None):
+    headers = dict(headers or {})
+    if body is not None:
+        body = json.dumps(body)
+        headers["Content-Type"] = "application/json"
+    connection.request(method, path, body=body, headers=headers)
+    response = connection.getresponse()
+    return response.status, response.read()
+
+
+def wait_until_up(port, server, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with {server.returncode}, is {port} taken?")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port)
+            request(connection, "GET", "/api/v1/journal")
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} didn't come up")
+
+
+def drive(port, concurrency, duration, path):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    status, body = request(
+        connection,
+        "POST",
+        "/api/v1/authentication/login",
+        {"email": seeder.email(0), "password": seeder.PASSWORD},
+    )
+    if status != 200:
+        raise RuntimeError(f"login failed with {status}: {body}")
+    headers = {"Authorization": "Bearer " + json.loads(body)["access_token"]}
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        own_latencies, own_errors = [], 0
+        while time.monotonic() < deadline:
+            started_at = time.perf_counter()
+            try:
+                status, _ = request(connection, "GET", path, headers=headers)
+            except (OSError, http.client.HTTPException):
+                connection = http.client.HTTPConnection("127.0.0.1", port)
+                status = None
+            own_latencies.append(time.perf_counter() - started_at)
+            if status != 200:
+                own_errors += 1
+        with lock:
+            latencies.extend(own_latencies)
+            errors.append(own_errors)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "requests_per_second": round(len(latencies) / duration, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modes", nargs="+", default=list(SERVERS))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--entries", type=int, default=1000)
+    parser.add_argument("--path", default="/api/v1/journal?limit=20")
+    parser.add_argument("--port", type=int, default=5099)
+    args = parser.parse_args()
+
+    seeder.configure()
+    os.environ["CACHE_TTL"] = "0"
+    seeder.seed(users=1, categories=1, journals=args.entries)
+
+    results = {}
+    for mode in args.modes:
+        command = [part.format(port=args.port) for part in SERVERS[mode]]
+        # own session, so the password hashing pool goes down with the server
+        server = subprocess.Popen(
+            command,
+            cwd=seeder.ROOT,
+            env=os.environ,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        try:
+            wait_until_up(args.port, server)
+            results[mode] = drive(args.port, args.concurrency, args.duration, args.path)
+        finally:
+            os.killpg(server.pid, signal.SIGTERM)
+            server.wait()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
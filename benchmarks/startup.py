@@ -0,0 +1,92 @@
+"""
+cold start: each run is a fresh interpreter that imports main, builds the
+app with create_app(), warms the connection pool and serves its first
+request (a login against a seeded database). reports the median of every
+phase in milliseconds, `--importtime` also lists the slowest imports.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 10 --importtime 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import seed as seeder  # noqa: E402
+
+RUN = """
+import json, time
+started_at = time.perf_counter()
+import main
+phases = {"import_main": time.perf_counter()}
+app = main.create_app()
+phases["create_app"] = time.perf_counter()
+main.warm_pools()
+phases["warm_pools"] = time.perf_counter()
+response = app.test_client().post(
+    "/api/v1/authentication/login",
+    json={"email": %(email)r, "password": %(password)r},
+)
+assert response.status_code == 200, response.status_code
+phases["first_request"] = time.perf_counter()
+previous, report = started_at, {}
+for phase, at in phases.items():
+    report[phase] = (at - previous) * 1000
+    previous = at
+report["total"] = (previous - started_at) * 1000
+print(json.dumps(report))
+"""
+
+
+def run(args=()):
+    script = RUN % {"email": seeder.email(0), "password": seeder.PASSWORD}
+    return subprocess.run(
+        [sys.executable, *args, "-c", script],
+        cwd=seeder.ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def slowest_imports(stderr, count):
+    """top level imports by cumulative time from `python -X importtime`"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # nesting is shown by indentation, keep the modules main pulls in
+        if len(name) - len(name.lstrip()) <= 3:
+            imports.append((int(cumulative) / 1000, name.strip()))
+    return [
+        {"module": name, "ms": round(ms, 1)}
+        for ms, name in sorted(imports, reverse=True)[:count]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database", help="SQLAlchemy URI, a temp sqlite file by default")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", type=int, default=0, metavar="N")
+    args = parser.parse_args()
+
+    seeder.configure(args.database)
+    seeder.seed(1, 1, 10)
+    runs = [json.loads(run().stdout) for _ in range(args.runs)]
+    report = {
+        phase: round(statistics.median(r[phase] for r in runs), 1) for phase in runs[0]
+    }
+    if args.importtime:
+        report["slowest_imports"] = slowest_imports(
+            run(["-X", "importtime"]).stderr, args.importtime
+        )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,5 +4,19 @@ from tzlocal import get_localzone
 
 VERIFICATION_EXPIRY_TIME = 24 * 60 * 60  # 24 hour in seconds
 
+JOURNAL_PAGE_SIZE = 20
+JOURNAL_MAX_PAGE_SIZE = 100
+JOURNAL_MAX_BATCH_SIZE = 100
+JOURNAL_EXPORT_BATCH_SIZE = 500  # rows fetched per round trip
+JOURNAL_EXPORT_CHUNK_SIZE = 64 * 1024  # bytes per streamed chunk
+JOURNAL_IMPORT_CHUNK_SIZE = 1000  # rows per insert transaction
+JOURNAL_IMPORT_MAX_ERRORS = 1000  # per-row errors listed in the report
+JOURNAL_IMPORT_DEFAULT_CATEGORY = "Imported"
+JOURNAL_SNIPPET_LENGTH = 150  # characters of content shown in list views
+JOURNAL_MAX_CONTENT_LENGTH = 100_000  # characters per entry
+JOURNAL_STATS_DAYS = 30  # buckets in each series of /stats
+JOURNAL_STATS_WEEKS = 12
+JOURNAL_STATS_MONTHS = 12
+
 
 SERVER_TIME_ZONE = pytz.timezone(str(get_localzone()))
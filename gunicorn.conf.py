@@ -0,0 +1,25 @@
+"""
+gunicorn settings for wsgi.py. the app is imported once in the master and
+forked into the workers, each worker drops the connections it inherited
+(main.after_fork), opens its own pool and starts polling the email outbox
+before taking requests.
+"""
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", 2 * (os.cpu_count() or 1) + 1))
+# keep DB_POOL_SIZE + DB_MAX_OVERFLOW at or above the threads per worker
+threads = int(os.getenv("WEB_THREADS", 4))
+preload_app = True
+timeout = int(os.getenv("WEB_TIMEOUT", 30))
+graceful_timeout = timeout
+
+
+def post_worker_init(worker):
+    from main import warm_pools
+    from jobs.outbox import start_poller
+
+    warm_pools()
+    start_poller(worker.wsgi)
@@ -1,5 +1,9 @@
+import atexit
+import queue
 import threading
-from main import app
+import time
+from flask import current_app
+from main import JOB_WORKERS, JOB_QUEUE_SIZE, JOB_QUEUE_POLICY
 from datetime import datetime, timedelta
 
 
@@ -19,6 +23,155 @@ def ticker(seconds=None, hours=None, minutes=None, days=None):
     return delay
 
 
+class JobRejected(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, fn, retries, backoff, app):
+        self.fn = fn
+        self.app = app
+        self.retries = retries
+        self.backoff = backoff
+        self.attempt = 0
+        self.enqueued_at = time.monotonic()
+
+
+class Executor:
+    """
+    process-wide pool with a fixed number of threads pulling jobs off a
+    bounded queue. when the queue is full `submit` either raises
+    JobRejected straight away (policy "reject") or waits up to
+    `block_timeout` seconds for room before raising it (policy "block").
+
+    failed jobs are retried with exponential backoff, the retry is put back
+    on the queue by a timer so a sleeping retry never holds a worker thread.
+    threads are started on the first submit, so a pre-fork server doesn't
+    fork them into its workers. a job runs in the context of the app that
+    was current when it was submitted.
+    """
+
+    def __init__(self, workers, queue_size, policy="reject", block_timeout=5):
+        if policy not in ("reject", "block"):
+            raise ValueError(f"unknown queue policy {policy!r}")
+        self.workers = workers
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.threads = []
+        self.lock = threading.Lock()
+        self.accepting = True
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "retried": 0,
+            "rejected": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "run_seconds_total": 0.0,
+            "run_seconds_max": 0.0,
+        }
+
+    def start(self):
+        with self.lock:
+            if self.threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self.run, name=f"job-worker-{i}", daemon=True
+                )
+                thread.start()
+                self.threads.append(thread)
+
+    def submit(self, fn, retries=0, backoff=1):
+        if not self.accepting:
+            raise JobRejected("executor is shutting down")
+        self.start()
+        self.enqueue(Job(fn, retries, backoff, current_app._get_current_object()))
+        self.record("submitted")
+
+    def enqueue(self, job):
+        try:
+            if self.policy == "block":
+                self.queue.put(job, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(job)
+        except queue.Full:
+            self.record("rejected")
+            raise JobRejected("job queue is full")
+
+    def retry(self, job):
+        if not self.accepting:
+            self.record("failed")
+            return
+        try:
+            job.enqueued_at = time.monotonic()
+            self.enqueue(job)
+        except JobRejected:
+            job.app.logger.error("dropping job retry, the job queue is full")
+
+    def run(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                self.queue.task_done()
+                return
+            started_at = time.monotonic()
+            self.record("wait_seconds", started_at - job.enqueued_at)
+            try:
+                with job.app.app_context():
+                    job.fn()
+                self.record("completed")
+            except Exception:
+                job.app.logger.exception("background job failed")
+                if job.attempt < job.retries and self.accepting:
+                    delay = job.backoff * 2**job.attempt
+                    job.attempt += 1
+                    self.record("retried")
+                    timer = threading.Timer(delay, self.retry, args=(job,))
+                    timer.daemon = True
+                    timer.start()
+                else:
+                    self.record("failed")
+            finally:
+                self.record("run_seconds", time.monotonic() - started_at)
+                self.queue.task_done()
+
+    def record(self, name, seconds=None):
+        with self.lock:
+            if seconds is None:
+                self.stats[name] += 1
+                return
+            self.stats[f"{name}_total"] += seconds
+            if seconds > self.stats[f"{name}_max"]:
+                self.stats[f"{name}_max"] = seconds
+
+    def metrics(self):
+        with self.lock:
+            metrics = dict(self.stats)
+        metrics["queue_depth"] = self.queue.qsize()
+        metrics["queue_capacity"] = self.queue.maxsize
+        metrics["workers"] = len(self.threads)
+        return metrics
+
+    def shutdown(self, timeout=30):
+        """stop accepting jobs and let the workers drain what is queued"""
+        self.accepting = False
+        deadline = time.monotonic() + timeout
+        for _ in self.threads:
+            try:
+                self.queue.put(None, timeout=max(deadline - time.monotonic(), 0))
+            except queue.Full:
+                break
+        for thread in self.threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+
+
+executor = Executor(JOB_WORKERS, JOB_QUEUE_SIZE, JOB_QUEUE_POLICY)
+atexit.register(executor.shutdown)
+
+
 class Worker:
     """
     small worker class  for handling background jobs,it might have some few
@@ -57,23 +210,29 @@ class Worker:
     worker.start()
     ```
 
+    one-off jobs run on the shared `executor` pool, start() raises
+    JobRejected when its queue is full. `retries` reruns a failing job with
+    exponential backoff starting at `backoff` seconds:
+    ```
+    worker = Worker(callback_fn=job, retries=3)
+    worker.start()
+    ```
+
     """
 
-    def __init__(self, callback_fn, ticker=None):
+    def __init__(self, callback_fn, ticker=None, retries=0, backoff=1):
         self.job = callback_fn
         self.ticker = ticker
-        self.worker_thread = threading.Thread(target=self.worker, daemon=True)
+        self.retries = retries
+        self.backoff = backoff
         self.timer_thread = None
-        self.app = app
-
-    def worker(self):
-        with self.app.app_context():
-            self.job()
+        self.app = current_app._get_current_object()
 
     def ticker_worker(self):
         with self.app.app_context():
             self.job()
             self.timer_thread = threading.Timer(self.ticker, self.ticker_worker)  # noqa
+            self.timer_thread.daemon = True
             self.timer_thread.start()
 
     def start(self):
@@ -81,6 +240,7 @@ class Worker:
             raise ValueError("No callback function provided.")
         elif self.ticker is not None:
             self.timer_thread = threading.Timer(self.ticker, self.ticker_worker)  # noqa
+            self.timer_thread.daemon = True
             self.timer_thread.start()
         else:
-            self.worker_thread.start()
+            executor.submit(self.job, retries=self.retries, backoff=self.backoff)
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import exc
+from models.models import EmailOutbox
+from jobs.job_handler import Worker, JobRejected
+from main import (
+    mail,
+    session,
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_SEND_RATE,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_POLL_SECONDS,
+    OUTBOX_LEASE_SECONDS,
+)
+
+
+dispatch_lock = threading.Lock()
+poller = None
+poller_pid = None
+poller_lock = threading.Lock()
+
+
+def queue_email(message):
+    """
+    stage a flask_mail Message in the outbox on the caller's session. it is
+    only delivered once the caller commits, so the email is written in the
+    same transaction as whatever change it announces.
+    """
+    for recipient in message.recipients:
+        session.add(
+            EmailOutbox(
+                sender=message.sender,
+                recipient=recipient,
+                subject=message.subject,
+                html=message.html,
+            )
+        )
+
+
+def start_poller(app):
+    """
+    drain the outbox every OUTBOX_POLL_SECONDS from this process. servers
+    call it once a worker is up (gunicorn's post_worker_init, run.py, the
+    ASGI lifespan), never at import, so a pre-fork master doesn't run it
+    and emails left pending by a restart still go out
+    """
+    global poller, poller_pid
+    with poller_lock:
+        if poller is not None and poller_pid == os.getpid():
+            return
+        with app.app_context():
+            poller = Worker(callback_fn=dispatch_outbox, ticker=OUTBOX_POLL_SECONDS)
+        poller.start()
+        poller_pid = os.getpid()
+
+
+def notify_dispatcher():
+    """ask for the outbox to be drained now instead of on the next poll"""
+    start_poller(current_app._get_current_object())
+    try:
+        Worker(callback_fn=dispatch_outbox).start()
+    except JobRejected:
+        # the email is safe in the outbox, the poller will pick it up
+        pass
+
+
+def dispatch_outbox(batch_size=OUTBOX_BATCH_SIZE):
+    """send one batch of due emails over a single SMTP connection"""
+    if not dispatch_lock.acquire(blocking=False):
+        return 0
+    try:
+        return send_batch(batch_size)
+    except Exception:
+        session.rollback()
+        current_app.logger.exception("email outbox dispatch failed")
+        return 0
+    finally:
+        session.close()
+        dispatch_lock.release()
+
+
+def send_batch(batch_size):
+    now = datetime.now()
+    # claimed in a transaction of its own: pushing next_attempt_at past the
+    # lease keeps other dispatchers off the rows while they are sent, and no
+    # row lock or connection is held during SMTP and the rate limit sleeps.
+    # rows of a dispatcher that died mid-batch are due again once it is over
+    emails = (
+        session.query(EmailOutbox)
+        .filter(
+            EmailOutbox.status == "pending",
+            EmailOutbox.next_attempt_at <= now,
+        )
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not emails:
+        session.commit()
+        return 0
+    for email in emails:
+        email.next_attempt_at = now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+    session.commit()
+    interval = 1 / OUTBOX_SEND_RATE if OUTBOX_SEND_RATE > 0 else 0
+    sent = 0
+    attempted = set()
+    try:
+        with mail.connect() as connection:
+            for email in emails:
+                attempted.add(email.id)
+                started_at = time.monotonic()
+                try:
+                    connection.send(
+                        Message(
+                            email.subject,
+                            sender=email.sender,
+                            recipients=[email.recipient],
+                            html=email.html,
+                        )
+                    )
+                    email.status = "sent"
+                    email.sent_date = datetime.now()
+                    sent += 1
+                except Exception as e:
+                    mark_failed(email, e)
+                elapsed = time.monotonic() - started_at
+                if elapsed < interval:
+                    time.sleep(interval - elapsed)
+    except Exception as e:
+        # connecting failed, or the server dropped us mid-batch
+        for email in emails:
+            if email.id not in attempted:
+                mark_failed(email, e)
+    try:
+        session.commit()
+    except exc.SQLAlchemyError:
+        session.rollback()
+        raise
+    return sent
+
+
+def mark_failed(email, error):
+    email.attempts += 1
+    email.last_error = str(error)[:255]
+    if email.attempts >= OUTBOX_MAX_ATTEMPTS:
+        email.status = "failed"
+    else:
+        email.next_attempt_at = datetime.now() + timedelta(
+            seconds=30 * 2 ** (email.attempts - 1)
+        )
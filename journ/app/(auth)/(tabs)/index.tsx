@@ -26,6 +26,7 @@ export default function Index() {
   const [isCategoryFormVisible, setIsCategoryFormVisible] = useState(false)
   const [newCategory, setNewCategory] = useState('')
   const [categories, setCategories] = useState([])
+  const [journalsVersion, setJournalsVersion] = useState(0)
   const fadeAnim = useRef(new Animated.Value(0)).current
 
   useEffect(() => {
@@ -67,6 +68,7 @@ export default function Index() {
       setTitle('')
       setContent('')
       setCategoryId(null)
+      setJournalsVersion((version) => version + 1)
       toggleForm()
     } catch (error) {
       console.error('Error creating journal:', error)
@@ -111,7 +113,7 @@ export default function Index() {
       style={styles.container}
       behavior={Platform.OS === 'ios' ? 'padding' : null}
     >
-      <JournalList />
+      <JournalList refreshKey={journalsVersion} />
 
       <TouchableOpacity style={styles.createButton} onPress={toggleForm}>
         <Ionicons name='add-circle-outline' size={32} color='#007AFF' />
@@ -22,8 +22,21 @@ export default function JournalSummary() {
 
   const fetchJournals = async () => {
     try {
-      const response = await axiosInstance.get('/api/v1/journal')
-      setJournals(response.data.message)
+      // the summary groups every entry, so read the pages to the end
+      const entries = []
+      let cursor = null
+      do {
+        const response = await axiosInstance.get('/api/v1/journal', {
+          params: {
+            fields: 'id,title,category,date,snippet',
+            limit: 100,
+            cursor,
+          },
+        })
+        entries.push(...response.data.message)
+        cursor = response.data.next_cursor
+      } while (cursor)
+      setJournals(entries)
     } catch (error) {
       handleFetchError(error)
     }
@@ -106,7 +119,7 @@ export default function JournalSummary() {
                 <View key={journal.id} style={styles.journalEntry}>
                   <Text style={styles.journalTitle}>{journal.title}</Text>
                   <Text>{journal.category}</Text>
-                  <Text>{journal.content}</Text>
+                  <Text>{journal.snippet}</Text>
                 </View>
               ))}
             </View>
@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react'
+import React, { useCallback, useRef, useState } from 'react'
 import {
   StyleSheet,
   Text,
@@ -8,34 +8,68 @@ import {
   Platform,
 } from 'react-native'
 import createAxiosInstance from '../app/axios'
-import { Link } from 'expo-router'
+import { Link, useFocusEffect } from 'expo-router'
 import { useSession } from '../app/ctx'
 
-const JournalList = () => {
+// refreshKey changes when the parent wrote an entry the list should show
+const JournalList = ({ refreshKey = 0 }) => {
   const { session } = useSession()
   const axiosInstance = createAxiosInstance(session)
   const [journals, setJournals] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
+  const loadingMore = useRef(false)
+  // bumped by every reload, a page requested before it is dropped
+  const generation = useRef(0)
 
-  useEffect(() => {
-    fetchJournals()
-  })
+  useFocusEffect(
+    useCallback(() => {
+      fetchJournals()
+    }, [refreshKey]),
+  )
 
   const fetchJournals = async () => {
+    const current = ++generation.current
     try {
-      const response = await axiosInstance.get('/api/v1/journal')
-      setJournals(response.data.message) // Assuming the response data contains an array of journals
+      const response = await axiosInstance.get('/api/v1/journal', {
+        params: { fields: 'id,title,date,snippet' },
+      })
+      if (current === generation.current) {
+        setJournals(response.data.message)
+        setNextCursor(response.data.next_cursor)
+      }
     } catch (error) {
       console.error('Error fetching journals:', error)
     }
   }
 
+  const fetchMoreJournals = async () => {
+    if (!nextCursor || loadingMore.current) {
+      return
+    }
+    const current = generation.current
+    loadingMore.current = true
+    try {
+      const response = await axiosInstance.get('/api/v1/journal', {
+        params: { fields: 'id,title,date,snippet', cursor: nextCursor },
+      })
+      if (current === generation.current) {
+        setJournals((loaded) => [...loaded, ...response.data.message])
+        setNextCursor(response.data.next_cursor)
+      }
+    } catch (error) {
+      console.error('Error fetching journals:', error)
+    } finally {
+      loadingMore.current = false
+    }
+  }
+
   const renderItem = ({ item }) => (
     <Link href={`journal/${item.id}`} asChild>
       <TouchableOpacity style={styles.journalCard}>
         <Text style={styles.journalTitle}>{item.title}</Text>
         <Text style={styles.journalDate}>{formatDate(item.date)}</Text>
         <Text style={styles.journalContent}>
-          {truncateContent(item.content)}
+          {truncateContent(item.snippet)}
         </Text>
       </TouchableOpacity>
     </Link>
@@ -48,6 +82,9 @@ const JournalList = () => {
 
   const truncateContent = (content) => {
     const maxLength = 100
+    if (!content) {
+      return ''
+    }
     if (content.length > maxLength) {
       return content.substring(0, maxLength) + '...'
     }
@@ -65,6 +102,8 @@ const JournalList = () => {
         keyExtractor={(item) => item.id.toString()} // Assuming each journal has a unique ID
         style={styles.flatList}
         showsVerticalScrollIndicator={false} // Hide vertical scrollbar
+        onEndReached={fetchMoreJournals}
+        onEndReachedThreshold={0.5}
       />
     </KeyboardAvoidingView>
   )
@@ -1,57 +1,212 @@
 from flask import Flask
-from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm import scoped_session, sessionmaker
 from flask_cors import CORS
 from flask_mail import Mail
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
+from auth.hashing import PasswordHasher
+from main.cli import MigrateCommands
+from main.json_provider import json_provider
+from main.routing import RoutingSession
 
 
 load_dotenv()
-app = Flask(__name__)
-engine = create_engine(os.getenv("MYSQL_DATABASE_URI"), pool_recycle=3600)
-app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY")
-app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("MYSQL_DATABASE_URI")
-app.config["MAIL_SERVER"] = os.getenv("MAIL_SERVER")
-app.config["MAIL_PORT"] = os.getenv("MAIL_PORT")
-app.config["MAIL_DEFAULT_SENDER"] = os.getenv("MAIL_DEFAULT_SENDER")
-app.config["MAIL_USERNAME"] = os.getenv("MAIL_USERNAME")
-app.config["MAIL_PASSWORD"] = os.getenv("MAIL_PASSWORD")
-app.config["MAIL_USE_TLS"] = os.getenv("MAIL_USE_TLS")
-app.config["MAIL_USE_SSL"] = os.getenv("MAIL_USE_SSL")
-app.config["MAX_CONTENT_LENGTH"] = 5 * 1024 * 1024
-app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=2)
-app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(days=7)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", DB_POOL_SIZE))
+DATABASE_URI = os.getenv("MYSQL_DATABASE_URI")
+REPLICA_DATABASE_URIS = [
+    uri.strip() for uri in os.getenv("REPLICA_DATABASE_URIS", "").split(",") if uri.strip()
+]
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+
+
+def pool_options(uri):
+    """
+    DB_POOL_* for the engine of `uri`. only a QueuePool can be sized, sqlite
+    memory databases (SingletonThreadPool) and aiosqlite (NullPool) reject
+    the arguments
+    """
+    url = make_url(uri)
+    if not issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+
+
+def database_engine(uri):
+    return create_engine(uri, pool_recycle=3600, **pool_options(uri))
+
+
+engine = database_engine(DATABASE_URI)
+replica_engines = [database_engine(uri) for uri in REPLICA_DATABASE_URIS]
 VERIFICATION_URL = os.getenv("SERVER_VERIFICATION_URL")
 ACCOUNT_VERIFICATION_URL = os.getenv("CLIENT_ACCOUNT_VERIFICATION_URL")
 ACCOUNT_REQUEST_ACTIVATION_URL = os.getenv("CLIENT_ACCOUNT_REQUEST_ACTIVATION_URL")
 KEY = os.getenv("ENC_KEY")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "journal:")
+CACHE_TTL = int(os.getenv("CACHE_TTL", 60))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 10000))
+SEARCH_INDEX_MAX_ENTRIES = int(os.getenv("SEARCH_INDEX_MAX_ENTRIES", 100000))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", 100))
+JOB_QUEUE_POLICY = os.getenv("JOB_QUEUE_POLICY", "reject")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 50))
+OUTBOX_SEND_RATE = float(os.getenv("OUTBOX_SEND_RATE", 10))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 5))
+OUTBOX_POLL_SECONDS = int(os.getenv("OUTBOX_POLL_SECONDS", 30))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", 300))
+BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", 12))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", os.cpu_count() or 1))
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", 32))
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+IMPORT_UPLOAD_DIR = os.getenv(
+    "IMPORT_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "journal-imports")
+)
+IMPORT_MAX_SIZE = int(os.getenv("IMPORT_MAX_SIZE", 500 * 1024 * 1024))
+IMPORT_UPLOAD_TTL = int(os.getenv("IMPORT_UPLOAD_TTL", 24 * 60 * 60))
+JSON_PROVIDER = os.getenv("JSON_PROVIDER", "auto")
 
-jwt = JWTManager(app)
-cors = CORS(app, resource={r"/*": {"origins": "*"}})
-bcrypt = Bcrypt(app)
-mail = Mail(app)
+jwt = JWTManager()
+cors = CORS()
+bcrypt = Bcrypt()
+hasher = PasswordHasher(HASH_WORKERS, HASH_QUEUE_SIZE, BCRYPT_LOG_ROUNDS)
+mail = Mail()
 
 session = scoped_session(
     sessionmaker(
-        autocommit=False, autoflush=False, bind=engine, expire_on_commit=False
-    )  # noqa
+        autocommit=False,
+        autoflush=False,
+        bind=engine,
+        expire_on_commit=False,
+        class_=RoutingSession,
+    )
 )
 SWAGGER_URL = "/api/v1/docs"
 API_URL = "/static/swagger.json"
-from urls.users import bp  # noqa
-from urls.journal import journal_bp #noqa
 
-app.register_blueprint(bp, url_prefix="/api/v1/authentication")
-app.register_blueprint(journal_bp, url_prefix="/api/v1/journal")
 
+def after_fork():
+    """
+    a forked worker inherits the parent's pooled connections, using them
+    from both processes would interleave their traffic on the same sockets.
+    the child forgets them without closing, the parent still owns them
+    """
+    session.registry.clear()
+    for pooled in [engine, *replica_engines]:
+        pooled.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=after_fork)
+
+
+def bind_databases(uri, replica_uris):
+    """
+    points the shared session, and everything reading main.engine or
+    main.replica_engines, at `uri` and `replica_uris` instead of the
+    databases of the environment
+    """
+    global engine
+    session.remove()
+    for pooled in [engine, *replica_engines]:
+        pooled.dispose()
+    engine = database_engine(uri)
+    replica_engines[:] = [database_engine(replica) for replica in replica_uris]
+    session.configure(bind=engine)
+
+
+def database_engines():
+    """every engine by the name metrics label it with"""
+    engines = {"primary": engine}
+    for i, replica in enumerate(replica_engines):
+        engines[f"replica{i}"] = replica
+    return engines
+
+
+def warm_pools(connections=DB_POOL_WARMUP):
+    """
+    opens up to `connections` pooled connections per engine so the first
+    requests don't pay for the handshakes. run it in each worker after fork
+    """
+    for pooled in [engine, *replica_engines]:
+        opened = [pooled.connect() for _ in range(min(connections, DB_POOL_SIZE))]
+        for connection in opened:
+            connection.close()
+
+
+def create_app(config=None):
+    """
+    the flask app, configured from the environment with `config` on top.
+    extensions and blueprints are only set up here, importing main doesn't
+    build anything but the (unconnected) engines and session, which every
+    app in the process shares. a config naming other databases moves them
+    over to those
+    """
+    app = Flask(__name__)
+    app.config.update(
+        JWT_SECRET_KEY=os.getenv("JWT_SECRET_KEY"),
+        SQLALCHEMY_DATABASE_URI=DATABASE_URI,
+        REPLICA_DATABASE_URIS=REPLICA_DATABASE_URIS,
+        MAIL_SERVER=os.getenv("MAIL_SERVER"),
+        MAIL_PORT=os.getenv("MAIL_PORT"),
+        MAIL_DEFAULT_SENDER=os.getenv("MAIL_DEFAULT_SENDER"),
+        MAIL_USERNAME=os.getenv("MAIL_USERNAME"),
+        MAIL_PASSWORD=os.getenv("MAIL_PASSWORD"),
+        MAIL_USE_TLS=os.getenv("MAIL_USE_TLS"),
+        MAIL_USE_SSL=os.getenv("MAIL_USE_SSL"),
+        MAX_CONTENT_LENGTH=5 * 1024 * 1024,
+        JWT_ACCESS_TOKEN_EXPIRES=timedelta(hours=2),
+        JWT_REFRESH_TOKEN_EXPIRES=timedelta(days=7),
+        BCRYPT_LOG_ROUNDS=BCRYPT_LOG_ROUNDS,
+        JSON_PROVIDER=JSON_PROVIDER,
+        METRICS_ENABLED=METRICS_ENABLED,
+    )
+    app.config.update(config or {})
+    uris = [app.config["SQLALCHEMY_DATABASE_URI"], *app.config["REPLICA_DATABASE_URIS"]]
+    bound = [engine.url, *(replica.url for replica in replica_engines)]
+    if [make_url(uri) for uri in uris] != bound:
+        bind_databases(uris[0], uris[1:])
+    app.json = json_provider(app.config["JSON_PROVIDER"])(app)
+
+    jwt.init_app(app)
+    cors.init_app(app, resource={r"/*": {"origins": "*"}})
+    bcrypt.init_app(app)
+    mail.init_app(app)
+
+    from models.models import db  # noqa
+    from urls.users import bp  # noqa
+    from urls.journal import journal_bp  # noqa
+
+    db.init_app(app)
+    app.cli.add_command(MigrateCommands(app, db))
+    app.register_blueprint(bp, url_prefix="/api/v1/authentication")
+    app.register_blueprint(journal_bp, url_prefix="/api/v1/journal")
+
+    if app.config["METRICS_ENABLED"]:
+        from main.metrics import install  # noqa
+        from urls.metrics import metrics_bp  # noqa
 
-from models.models import db  # noqa
+        install(app, database_engines())
+        app.register_blueprint(metrics_bp)
+    return app
 
 
-migrate = Migrate(app, db)
-migrate.init_app(app)
+def __getattr__(name):
+    # `from main import app` builds the app from the environment on first use
+    global app
+    if name != "app":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    app = create_app()
+    return app
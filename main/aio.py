@@ -0,0 +1,34 @@
+import os
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from starlette.responses import Response
+from main import app, pool_options
+
+# async drivers for the ASGI mode, the sync app keeps using the sync engine
+ASYNC_DRIVERS = {"mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_database_uri():
+    uri = os.getenv("ASYNC_DATABASE_URI")
+    if uri:
+        return uri
+    url = make_url(app.config["SQLALCHEMY_DATABASE_URI"])
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+ASYNC_DATABASE_URI = async_database_uri()
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URI, pool_recycle=3600, **pool_options(ASYNC_DATABASE_URI)
+)
+async_session = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+def jsonify(payload, status=200):
+    # same provider as flask's jsonify, so both modes emit identical payloads
+    return Response(
+        app.json.dumps(payload) + "\n",
+        status_code=status,
+        media_type="application/json",
+    )
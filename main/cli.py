@@ -0,0 +1,27 @@
+import click
+
+
+class MigrateCommands(click.Group):
+    """
+    `flask db`, with flask_migrate (and alembic under it, most of the import
+    time of the app) only imported once one of its commands is looked up
+    """
+
+    def __init__(self, app, db):
+        super().__init__("db", help="Perform database migrations.")
+        self.app = app
+        self.db = db
+
+    def migrate_group(self):
+        from flask_migrate import Migrate
+        from flask_migrate.cli import db as db_commands
+
+        if "migrate" not in self.app.extensions:
+            Migrate(self.app, self.db)
+        return db_commands
+
+    def list_commands(self, ctx):
+        return self.migrate_group().list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self.migrate_group().get_command(ctx, name)
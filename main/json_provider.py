@@ -0,0 +1,80 @@
+"""
+json providers behind flask's jsonify (and main.aio.jsonify, which goes
+through app.json). both write datetimes as ISO 8601, naive ones are taken
+as UTC, so a response looks the same whichever of them is in use.
+"""
+import json
+from datetime import date, datetime, timezone
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional, the stdlib provider is used without it
+    orjson = None
+
+
+def isoformat(value):
+    """a datetime the way responses write it, naive ones are UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
+
+
+def json_default(o):
+    if isinstance(o, datetime):
+        return isoformat(o)
+    if isinstance(o, date):
+        return o.isoformat()
+    # Decimal, UUID, dataclasses and __html__ the way flask does them
+    return DefaultJSONProvider.default(o)
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    default = staticmethod(json_default)
+
+
+class OrjsonProvider(StdlibJSONProvider):
+    """
+    orjson for the common calls, the stdlib one for anything asking for
+    options orjson doesn't have (indent, custom separators)
+    """
+
+    options = (
+        orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+        if orjson
+        else 0
+    )
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=json_default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self._app.debug:
+            # pretty printed like flask does in debug mode
+            return super().response(obj)
+        return self._app.response_class(
+            orjson.dumps(obj, default=json_default, option=self.options) + b"\n",
+            mimetype=self.mimetype,
+        )
+
+
+JSON_PROVIDERS = {"orjson": OrjsonProvider, "stdlib": StdlibJSONProvider}
+
+
+def json_provider(name):
+    """provider class for JSON_PROVIDER, "auto" picks orjson when installed"""
+    if name == "auto":
+        name = "orjson" if orjson else "stdlib"
+    if name not in JSON_PROVIDERS:
+        raise RuntimeError(f"unknown JSON_PROVIDER {name!r}")
+    if name == "orjson" and orjson is None:
+        raise RuntimeError("JSON_PROVIDER is orjson but orjson is not installed")
+    return JSON_PROVIDERS[name]
@@ -0,0 +1,278 @@
+import threading
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+
+
+def format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name, str(value).replace("\\", "\\\\").replace('"', '\\"')
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            values = dict(self.values)
+        for labels, value in sorted(values.items()):
+            yield self.name + format_labels(self.labels, labels), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, documentation, buckets, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.labels = labels
+        # labels -> [count per bucket..., +Inf count, sum]
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        with self.lock:
+            series = self.values.get(labels)
+            if series is None:
+                series = self.values[labels] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self.lock:
+            values = {labels: list(series) for labels, series in self.values.items()}
+        names = self.labels + ("le",)
+        for labels, series in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                yield (
+                    self.name + "_bucket" + format_labels(names, labels + (bound,)),
+                    cumulative,
+                )
+            yield self.name + "_sum" + format_labels(self.labels, labels), series[-1]
+            yield self.name + "_count" + format_labels(self.labels, labels), cumulative
+
+
+class Gauge:
+    """a value read when /metrics is scraped"""
+
+    def __init__(self, name, documentation, read, kind="gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        self.kind = kind
+
+    def samples(self):
+        yield self.name, self.read()
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, value in metric.samples():
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+request_latency = registry.register(
+    Histogram(
+        "journal_http_request_duration_seconds",
+        "Request latency per endpoint.",
+        LATENCY_BUCKETS,
+        ("endpoint", "method"),
+    )
+)
+requests_total = registry.register(
+    Counter(
+        "journal_http_requests_total",
+        "Requests per endpoint and status code.",
+        ("endpoint", "method", "status"),
+    )
+)
+request_queries = registry.register(
+    Histogram(
+        "journal_http_request_queries",
+        "SQL statements issued per request.",
+        QUERY_BUCKETS,
+        ("endpoint",),
+    )
+)
+db_queries = registry.register(
+    Counter(
+        "journal_db_queries_total",
+        "SQL statements executed, per endpoint.",
+        ("endpoint",),
+    )
+)
+db_seconds = registry.register(
+    Counter(
+        "journal_db_query_seconds_total",
+        "Time spent executing SQL statements, per endpoint.",
+        ("endpoint",),
+    )
+)
+pool_wait = registry.register(
+    Histogram(
+        "journal_db_pool_checkout_wait_seconds",
+        "Time spent waiting for a pooled connection.",
+        WAIT_BUCKETS,
+    )
+)
+
+
+class PoolGauge:
+    """a figure of every instrumented engine's pool, read when /metrics is scraped"""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, read):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+
+    def samples(self):
+        for database, engine in sorted(engines.items()):
+            if isinstance(engine.pool, QueuePool):
+                labels = format_labels(("database",), (database,))
+                yield self.name + labels, self.read(engine.pool)
+
+
+# database name -> engine, filled by instrument()
+engines = {}
+registry.register(
+    PoolGauge(
+        "journal_db_pool_checked_out",
+        "Connections currently checked out of the pool.",
+        lambda pool: pool.checkedout(),
+    )
+)
+registry.register(
+    PoolGauge(
+        "journal_db_pool_overflow",
+        "Connections open beyond pool_size, negative while below it.",
+        lambda pool: pool.overflow(),
+    )
+)
+registry.register(
+    PoolGauge(
+        "journal_db_pool_size",
+        "Configured pool size.",
+        lambda pool: pool.size(),
+    )
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait.observe(time.perf_counter() - started_at)
+
+
+def current_endpoint():
+    if has_request_context():
+        return request.endpoint or "unmatched"
+    return "background"
+
+
+def start_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_started_at", []).append(time.perf_counter())
+
+
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["metrics_started_at"].pop()
+    endpoint = current_endpoint()
+    db_queries.inc((endpoint,))
+    db_seconds.inc((endpoint,), elapsed)
+    if has_request_context() and "metrics_queries" in g:
+        g.metrics_queries += 1
+
+
+def instrument(database, engine):
+    """counts the statements of `engine` and reports its pool, once per engine"""
+    engines[database] = engine
+    if event.contains(engine, "before_cursor_execute", start_query):
+        return
+    event.listen(engine, "before_cursor_execute", start_query)
+    event.listen(engine, "after_cursor_execute", record_query)
+    if isinstance(engine.pool, QueuePool):
+        # swapping the class keeps the pool's state, and Pool.recreate() builds
+        # the replacement from self.__class__ so it survives engine.dispose()
+        engine.pool.__class__ = InstrumentedQueuePool
+
+
+def install(app, databases):
+    """
+    wires the flask hooks of `app` and the sqlalchemy hooks of `databases`
+    (name -> engine), nothing is hooked unless called. calling it again
+    hooks nothing twice
+    """
+    # the engines are the process's, the last app's set is the current one
+    for database in set(engines) - set(databases):
+        del engines[database]
+    for database, engine in databases.items():
+        instrument(database, engine)
+    if "metrics" in app.extensions:
+        return
+    app.extensions["metrics"] = registry
+
+    @app.before_request
+    def start_timer():
+        g.metrics_started_at = time.perf_counter()
+        g.metrics_queries = 0
+
+    @app.after_request
+    def record_request(response):
+        started_at = g.pop("metrics_started_at", None)
+        if started_at is None:
+            return response
+        endpoint = request.endpoint or "unmatched"
+        request_latency.observe(
+            time.perf_counter() - started_at, (endpoint, request.method)
+        )
+        requests_total.inc((endpoint, request.method, str(response.status_code)))
+        request_queries.observe(g.pop("metrics_queries", 0), (endpoint,))
+        return response
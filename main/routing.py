@@ -0,0 +1,21 @@
+"""
+session that can read from a replica. the engine it is bound to is the
+primary; api/replica.py puts a replica engine in `session.info["replica"]`
+around read-only handlers and their statements run there while it is set.
+flushes and insert/update/delete keep going to the primary.
+"""
+from sqlalchemy.orm import Session
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        replica = self.info.get("replica")
+        # the ORM passes no clause at all for a union, so look for writes
+        # rather than for selects
+        if (
+            replica is not None
+            and not self._flushing
+            and not getattr(clause, "is_dml", False)
+        ):
+            return replica
+        return super().get_bind(mapper, clause=clause, **kwargs)
@@ -1,12 +1,14 @@
 # flake8: noqa: E501
-from sqlalchemy import Integer, String, DateTime, Boolean, ForeignKey, Column, Date
-from sqlalchemy.orm import relationship
+from sqlalchemy import Integer, String, Text, DateTime, Boolean, ForeignKey, Column, Date, Index
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from sqlalchemy.dialects.mysql import FLOAT
 from flask_sqlalchemy import SQLAlchemy  # noqa
-from main import app
+from api.utils import make_snippet, count_words
+from const.constants import JOURNAL_SNIPPET_LENGTH
+from models.types import CompressedText
 
-db = SQLAlchemy(app)
+db = SQLAlchemy()
 
 
 class User(db.Model):
@@ -15,10 +17,14 @@ class User(db.Model):
     contact = db.Column(String(40), nullable=True, unique=True)
     email = db.Column(String(80), nullable=False, unique=True)
     username = db.Column(String(80), nullable=False, unique=True)
-    activation_key = db.Column(String(50), nullable=True)
+    activation_key = db.Column(String(50), nullable=True, index=True)
     activation = db.Column(Boolean, default=False)
     activation_date_created = db.Column(DateTime, nullable=True)
     hash_password = db.Column(String(80), nullable=False)
+    # bumped with every journal, category or user details write, backs the
+    # read ETags and keeps the user on the primary (api/replica.py)
+    content_version = db.Column(Integer, nullable=False, default=0, server_default="0")
+    content_modified = db.Column(DateTime, nullable=True)
     created_date = db.Column(DateTime, nullable=False, default=datetime.now)  # noqa
 
     def __repr__(self):
@@ -27,27 +33,135 @@ class User(db.Model):
 
 class Category(db.Model):
     __tablename__ = "categories"
+    __table_args__ = (
+        Index("ix_categories_user_id_sync_version", "user_id", "sync_version"),
+    )
     id = db.Column(Integer, primary_key=True)
     user_id = db.Column(
-        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
     user = relationship("User", backref="categories")
     name = db.Column(String(80), nullable=True)
+    # the user's content_version of the write that last touched the row
+    sync_version = db.Column(Integer, nullable=True)
+    updated_at = db.Column(DateTime, nullable=True, default=datetime.now, onupdate=datetime.now)  # noqa
+
+
+def content_snippet(context):
+    # inserts get their snippet here, updates set it next to content
+    return make_snippet(context.get_current_parameters().get("content"))
+
+
+def content_search_text(context):
+    # only MySQL searches the database, elsewhere the copy would just take space
+    if context.dialect.name == "mysql":
+        return context.get_current_parameters().get("content")
+
+
+def content_word_count(context):
+    return count_words(context.get_current_parameters().get("content"))
 
 
 class Journal(db.Model):
     __tablename__ = "journal"
+    __table_args__ = (
+        # every read is scoped to a user, listed newest first or per category
+        Index("ix_journal_user_id_date_created_id", "user_id", "date_created", "id"),
+        Index("ix_journal_user_id_sync_version", "user_id", "sync_version"),
+        # covers the per category counts of the category listing too
+        Index(
+            "ix_journal_user_id_category_id_date_created",
+            "user_id",
+            "category_id",
+            "date_created",
+        ),
+        Index(
+            "ix_journal_title_search_text_fulltext",
+            "title",
+            "search_text",
+            mysql_prefix="FULLTEXT",
+        ).ddl_if(dialect="mysql"),
+    )
     id = db.Column(Integer, primary_key=True)
     user_id = db.Column(
         Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
     user = relationship("User", backref="journal")
     title = db.Column(String(80), nullable=True)
-    content = db.Column(String(1000), nullable=True)
+    # compressed and deferred: only the routes that show the whole entry
+    # read and decompress it, lists go by title and snippet
+    content = deferred(db.Column(CompressedText, nullable=True))
+    # plain copy of content for the FULLTEXT index on MySQL, never read back
+    search_text = deferred(
+        db.Column(Text, nullable=True, default=content_search_text)
+    )
+    snippet = db.Column(
+        String(JOURNAL_SNIPPET_LENGTH), nullable=True, default=content_snippet
+    )
+    word_count = db.Column(Integer, nullable=True, default=content_word_count)
     category_id = db.Column(Integer, ForeignKey("categories.id"), nullable=True)
     category = relationship("Category", backref="journal")
 
     date_created = db.Column(DateTime, nullable=False, default=datetime.now)  # noqa
+    sync_version = db.Column(Integer, nullable=True)
+    updated_at = db.Column(DateTime, nullable=True, default=datetime.now, onupdate=datetime.now)  # noqa
 
     def __repr__(self):
         return "<Journal %r>" % self.id
+
+
+class JournalDailyStats(db.Model):
+    """entries and words per user and day, kept up to date by the journal writes"""
+
+    __tablename__ = "journal_daily_stats"
+    user_id = db.Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    day = db.Column(Date, primary_key=True)
+    entries = db.Column(Integer, nullable=False, default=0)
+    words = db.Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return "<JournalDailyStats %r %r>" % (self.user_id, self.day)
+
+
+class SyncTombstone(db.Model):
+    """a deleted journal or category, kept so delta syncs can report it"""
+
+    __tablename__ = "sync_tombstones"
+    __table_args__ = (
+        Index("ix_sync_tombstones_user_id_sync_version", "user_id", "sync_version"),
+    )
+    id = db.Column(Integer, primary_key=True)
+    user_id = db.Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    kind = db.Column(String(10), nullable=False)  # journal or category
+    record_id = db.Column(Integer, nullable=False)
+    sync_version = db.Column(Integer, nullable=False)
+    deleted_at = db.Column(DateTime, nullable=False, default=datetime.now)  # noqa
+
+    def __repr__(self):
+        return "<SyncTombstone %r %r>" % (self.kind, self.record_id)
+
+
+class EmailOutbox(db.Model):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+    id = db.Column(Integer, primary_key=True)
+    sender = db.Column(String(80), nullable=False)
+    recipient = db.Column(String(80), nullable=False)
+    subject = db.Column(String(200), nullable=False)
+    html = db.Column(Text, nullable=False)
+    # pending -> sent, or failed once OUTBOX_MAX_ATTEMPTS is used up
+    status = db.Column(String(10), nullable=False, default="pending")
+    attempts = db.Column(Integer, nullable=False, default=0)
+    last_error = db.Column(String(255), nullable=True)
+    next_attempt_at = db.Column(DateTime, nullable=False, default=datetime.now)  # noqa
+    created_date = db.Column(DateTime, nullable=False, default=datetime.now)  # noqa
+    sent_date = db.Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return "<EmailOutbox %r>" % self.id
@@ -0,0 +1,56 @@
+import zlib
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects.mysql import MEDIUMBLOB
+from sqlalchemy.types import TypeDecorator
+
+# stored values start with a NUL and a codec byte, text written before the
+# column was compressed never starts with NUL and is read back as it is
+ZLIB = b"\x00z"
+RAW = b"\x00r"
+
+
+def compress_text(value, level=6):
+    data = value.encode("utf-8")
+    compressed = zlib.compress(data, level)
+    # short entries don't shrink, they are kept as they are
+    if len(compressed) < len(data):
+        return ZLIB + compressed
+    return RAW + data
+
+
+def is_compressed(data):
+    return not isinstance(data, str) and bytes(data[:2]) in (ZLIB, RAW)
+
+
+def decompress_text(data):
+    if isinstance(data, str):
+        # sqlite hands back legacy TEXT values as they were stored
+        return data
+    data = bytes(data)
+    if data.startswith(ZLIB):
+        return zlib.decompress(data[len(ZLIB):]).decode("utf-8")
+    if data.startswith(RAW):
+        return data[len(RAW):].decode("utf-8")
+    return data.decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """text column stored as a zlib compressed blob, (de)compressed in python"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "mysql":
+            return dialect.type_descriptor(MEDIUMBLOB())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
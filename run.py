@@ -1,5 +1,10 @@
-from main import app
+from main import create_app
+from jobs.outbox import start_poller
 
 
 if __name__ == "__main__":
+    # built here so the password hashing workers, which import this script
+    # again when they start, don't build an app of their own
+    app = create_app()
+    start_poller(app)
     app.run(debug=True, port=5000,host='0.0.0.0', use_reloader=False)
@@ -0,0 +1,78 @@
+import itertools
+import os
+import tempfile
+import pytest
+
+# main reads its settings from the environment when it is imported
+scratch = tempfile.mkdtemp()
+os.environ["MYSQL_DATABASE_URI"] = "sqlite:///" + os.path.join(scratch, "journal.db")
+os.environ["IMPORT_UPLOAD_DIR"] = os.path.join(scratch, "imports")
+os.environ["JWT_SECRET_KEY"] = "test-secret-key-that-is-long-enough-for-hs256"
+os.environ["BCRYPT_LOG_ROUNDS"] = "4"
+os.environ["HASH_WORKERS"] = "1"
+os.environ["CACHE_REDIS_URL"] = ""
+os.environ["REPLICA_DATABASE_URIS"] = ""
+
+accounts = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def app():
+    from main import app
+    from models.models import db
+
+    app.extensions["mail"].suppress = True
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def register(app, client):
+    """a new account: its id and the headers of its access token"""
+    from flask_jwt_extended import decode_token
+
+    n = next(accounts)
+    credentials = {"email": f"user{n}@example.com", "password": "secret1"}
+    client.post(
+        "/api/v1/authentication/signup",
+        json={**credentials, "username": f"user{n}", "phone_number": str(n)},
+    )
+    token = client.post("/api/v1/authentication/login", json=credentials).get_json()[
+        "access_token"
+    ]
+    with app.app_context():
+        user_id = decode_token(token)["sub"]["id"]
+    return {"id": user_id, "headers": {"Authorization": f"Bearer {token}"}}
+
+
+@pytest.fixture
+def user(app, client):
+    return register(app, client)
+
+
+@pytest.fixture
+def category_id(client, user):
+    client.post(
+        "/api/v1/journal/new_category", json={"name": "work"}, headers=user["headers"]
+    )
+    listing = client.get("/api/v1/journal/category", headers=user["headers"])
+    return listing.get_json()["message"][0]["id"]
+
+
+def add_journal(client, user, category_id, title="entry", content="some words"):
+    response = client.post(
+        "/api/v1/journal",
+        json={"title": title, "content": content, "category_id": category_id},
+        headers=user["headers"],
+    )
+    assert response.status_code == 201
+
+
+def journal_ids(client, user):
+    response = client.get("/api/v1/journal?fields=id", headers=user["headers"])
+    return [entry["id"] for entry in response.get_json()["message"]]
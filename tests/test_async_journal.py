@@ -0,0 +1,79 @@
+import pytest
+from conftest import add_journal
+
+pytest.importorskip("starlette")
+pytest.importorskip("aiosqlite")
+pytest.importorskip("httpx")
+
+
+@pytest.fixture
+def async_client(app):
+    from starlette.testclient import TestClient
+    from asgi import app as asgi_app
+
+    with TestClient(asgi_app) as client:
+        yield client
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/api/v1/journal?limit=1",
+        "/api/v1/journal/category",
+        "/api/v1/journal/category/{category_id}?fields=title",
+    ],
+)
+def test_both_modes_answer_reads_alike(
+    client, async_client, user, category_id, path
+):
+    add_journal(client, user, category_id, title="first")
+    add_journal(client, user, category_id, title="second")
+    path = path.format(category_id=category_id)
+    flask_response = client.get(path, headers=user["headers"])
+    async_response = async_client.get(path, headers=user["headers"])
+    assert async_response.status_code == flask_response.status_code == 200
+    assert async_response.content == flask_response.data
+    for header in ("ETag", "Last-Modified", "Cache-Control"):
+        assert async_response.headers[header] == flask_response.headers[header]
+    etag = flask_response.headers["ETag"]
+    revalidated = async_client.get(
+        path, headers={**user["headers"], "If-None-Match": etag}
+    )
+    assert revalidated.status_code == 304
+
+
+def test_async_writes_change_the_etag(client, async_client, user, category_id):
+    add_journal(client, user, category_id)
+    etag = async_client.get("/api/v1/journal", headers=user["headers"]).headers["ETag"]
+    async_client.post(
+        "/api/v1/journal",
+        json={"title": "async", "content": "words", "category_id": category_id},
+        headers=user["headers"],
+    )
+    response = async_client.get(
+        "/api/v1/journal", headers={**user["headers"], "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.json()["message"][0]["title"] == "async"
+
+
+@pytest.mark.parametrize("limit", ["abc", "0", "-3"])
+def test_bad_limit_is_refused_in_both_modes(client, async_client, user, limit):
+    path = f"/api/v1/journal?limit={limit}"
+    assert client.get(path, headers=user["headers"]).status_code == 400
+    assert async_client.get(path, headers=user["headers"]).status_code == 400
+
+
+def test_async_profile_updates_change_the_etag(client, async_client, user):
+    etag = client.get("/api/v1/journal", headers=user["headers"]).headers["ETag"]
+    response = async_client.put(
+        "/api/v1/authentication/update_details",
+        json={"username": f"renamed{user['id']}"},
+        headers=user["headers"],
+    )
+    assert response.status_code == 200
+    after = client.get(
+        "/api/v1/journal", headers={**user["headers"], "If-None-Match": etag}
+    )
+    assert after.status_code == 200
+    assert after.headers["ETag"] != etag
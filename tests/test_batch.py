@@ -0,0 +1,75 @@
+from conftest import add_journal, journal_ids
+
+
+def batch(client, user, operations):
+    return client.post(
+        "/api/v1/journal/batch",
+        json={"operations": operations},
+        headers=user["headers"],
+    )
+
+
+def test_results_follow_the_request_order(client, user, category_id):
+    add_journal(client, user, category_id, title="kept")
+    add_journal(client, user, category_id, title="dropped")
+    kept, dropped = sorted(journal_ids(client, user))
+    response = batch(
+        client,
+        user,
+        [
+            {"op": "delete", "id": dropped},
+            {"op": "create", "data": {"title": "new", "content": "fresh words"}},
+            {"op": "update", "id": 999999, "data": {"title": "missing"}},
+            {"op": "update", "id": kept, "data": {"title": "changed"}},
+            {"op": "move"},
+            {"op": "create", "data": {}},
+        ],
+    )
+    assert response.status_code == 200
+    results = response.get_json()["message"]
+    assert [result["status"] for result in results] == [200, 201, 404, 200, 400, 400]
+    assert results[0]["id"] == dropped
+    assert results[3]["id"] == kept
+    titles = {
+        entry["title"]
+        for entry in client.get("/api/v1/journal", headers=user["headers"]).get_json()[
+            "message"
+        ]
+    }
+    assert titles == {"changed", "new"}
+
+
+def test_an_entry_twice_in_one_batch_is_refused(client, user, category_id):
+    add_journal(client, user, category_id, title="once")
+    (journal_id,) = journal_ids(client, user)
+    response = batch(
+        client,
+        user,
+        [
+            {"op": "update", "id": journal_id, "data": {"title": "twice"}},
+            {"op": "create", "data": {"title": "new", "content": "words"}},
+            {"op": "delete", "id": journal_id},
+        ],
+    )
+    assert response.status_code == 400
+    assert "more than once" in response.get_json()["error"]
+    # nothing of the batch was applied
+    listing = client.get("/api/v1/journal", headers=user["headers"]).get_json()
+    assert [entry["title"] for entry in listing["message"]] == ["once"]
+
+
+def test_ids_must_be_integers(client, user, category_id):
+    add_journal(client, user, category_id)
+    (journal_id,) = journal_ids(client, user)
+    response = batch(
+        client,
+        user,
+        [
+            {"op": "delete", "id": True},
+            {"op": "delete", "id": str(journal_id)},
+            {"op": "update", "id": journal_id, "data": {"title": "ok"}},
+        ],
+    )
+    results = response.get_json()["message"]
+    assert [result["status"] for result in results] == [400, 400, 200]
+    assert journal_ids(client, user) == [journal_id]
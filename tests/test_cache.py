@@ -0,0 +1,40 @@
+from api.cache import journal_cache
+from conftest import add_journal, register
+
+
+def test_repeated_read_is_served_from_the_cache(client, user, category_id):
+    add_journal(client, user, category_id)
+    first = client.get("/api/v1/journal", headers=user["headers"])
+    hits = journal_cache.hits
+    second = client.get("/api/v1/journal", headers=user["headers"])
+    assert journal_cache.hits == hits + 1
+    assert second.data == first.data
+
+
+def test_writes_invalidate_cached_reads(client, user, category_id):
+    add_journal(client, user, category_id, title="first")
+    client.get("/api/v1/journal", headers=user["headers"])
+    add_journal(client, user, category_id, title="second")
+    titles = [
+        entry["title"]
+        for entry in client.get("/api/v1/journal", headers=user["headers"]).get_json()[
+            "message"
+        ]
+    ]
+    assert titles == ["second", "first"]
+
+    client.put(
+        f"/api/v1/journal/category/{category_id}",
+        json={"name": "renamed"},
+        headers=user["headers"],
+    )
+    listing = client.get("/api/v1/journal/category", headers=user["headers"])
+    assert listing.get_json()["message"][0]["name"] == "renamed"
+
+
+def test_cached_reads_are_per_user(app, client, user, category_id):
+    add_journal(client, user, category_id, title="mine")
+    client.get("/api/v1/journal", headers=user["headers"])
+    other = register(app, client)
+    listing = client.get("/api/v1/journal", headers=other["headers"])
+    assert listing.get_json()["message"] == []
@@ -0,0 +1,61 @@
+from conftest import add_journal, journal_ids
+
+
+def revalidate(client, user, path, etag):
+    return client.get(path, headers={**user["headers"], "If-None-Match": etag})
+
+
+def test_unchanged_reads_are_answered_with_304(client, user, category_id):
+    add_journal(client, user, category_id)
+    response = client.get("/api/v1/journal", headers=user["headers"])
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    assert "Last-Modified" in response.headers
+    again = revalidate(client, user, "/api/v1/journal", response.headers["ETag"])
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == response.headers["ETag"]
+
+
+def test_the_etag_depends_on_the_query_string(client, user, category_id):
+    add_journal(client, user, category_id)
+    etag = client.get("/api/v1/journal", headers=user["headers"]).headers["ETag"]
+    other = revalidate(client, user, "/api/v1/journal?limit=5", etag)
+    assert other.status_code == 200
+    assert other.headers["ETag"] != etag
+
+
+def test_writes_change_the_etag(client, user, category_id):
+    add_journal(client, user, category_id, title="before")
+    (journal_id,) = journal_ids(client, user)
+    paths = [
+        "/api/v1/journal",
+        f"/api/v1/journal/{journal_id}",
+        "/api/v1/journal/category",
+    ]
+    etags = {
+        path: client.get(path, headers=user["headers"]).headers["ETag"]
+        for path in paths
+    }
+    client.put(
+        f"/api/v1/journal/{journal_id}",
+        json={"title": "after"},
+        headers=user["headers"],
+    )
+    for path in paths:
+        response = revalidate(client, user, path, etags[path])
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etags[path]
+    entry = client.get(f"/api/v1/journal/{journal_id}", headers=user["headers"])
+    assert entry.get_json()["message"]["title"] == "after"
+
+    etag = client.get("/api/v1/journal", headers=user["headers"]).headers["ETag"]
+    client.delete(f"/api/v1/journal/{journal_id}", headers=user["headers"])
+    response = revalidate(client, user, "/api/v1/journal", etag)
+    assert response.status_code == 200
+    assert response.get_json()["message"] == []
+
+
+def test_errors_carry_no_etag(client, user):
+    response = client.get("/api/v1/journal/999999", headers=user["headers"])
+    assert response.status_code == 404
+    assert "ETag" not in response.headers
@@ -0,0 +1,52 @@
+import json
+import pytest
+from conftest import add_journal, register
+
+
+def export(client, user, export_format="ndjson"):
+    response = client.get(
+        f"/api/v1/journal/export?format={export_format}", headers=user["headers"]
+    )
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+
+def test_exports_write_dates_like_the_api(client, user, category_id):
+    add_journal(client, user, category_id)
+    (exported,) = [json.loads(line) for line in export(client, user).splitlines()]
+    listed = client.get("/api/v1/journal", headers=user["headers"]).get_json()
+    assert exported["date"].endswith("+00:00")
+    assert exported["date"] == listed["message"][0]["date"]
+
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv"])
+def test_an_export_imports_with_the_same_dates(
+    app, client, user, category_id, export_format
+):
+    add_journal(client, user, category_id, title="first")
+    add_journal(client, user, category_id, title="second")
+    body = export(client, user, export_format)
+    other = register(app, client)
+    response = client.post(
+        f"/api/v1/journal/import?format={export_format}",
+        data=body,
+        headers=other["headers"],
+    )
+    assert response.status_code == 200
+
+    def dated(account):
+        listing = client.get("/api/v1/journal", headers=account["headers"])
+        entries = listing.get_json()["message"]
+        return [(entry["title"], entry["date"]) for entry in entries]
+
+    assert dated(other) == dated(user)
+
+
+def test_imported_offsets_are_converted_to_utc(client, user):
+    line = {"title": "abroad", "content": "words", "date": "2024-05-01T11:30:00+02:00"}
+    response = client.post(
+        "/api/v1/journal/import", data=json.dumps(line) + "\n", headers=user["headers"]
+    )
+    assert response.status_code == 200
+    listing = client.get("/api/v1/journal", headers=user["headers"]).get_json()
+    assert listing["message"][0]["date"] == "2024-05-01T09:30:00+00:00"
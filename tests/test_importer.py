@@ -0,0 +1,22 @@
+import os
+from api.importer import UploadStore
+
+
+def test_unknown_uploads_are_not_found(client, user):
+    for upload_id in ("not-a-uuid", "0" * 32):
+        response = client.post(
+            f"/api/v1/journal/import/uploads/{upload_id}/complete",
+            headers=user["headers"],
+        )
+        assert response.status_code == 404
+
+
+def test_expire_skips_uploads_removed_meanwhile(tmp_path, monkeypatch):
+    store = UploadStore(str(tmp_path), 1024, ttl=0)
+    upload_id = store.create(1)
+    entries = list(os.scandir(tmp_path))
+    # the import finishes and discards the upload between scandir and stat
+    store.discard(1, upload_id)
+    monkeypatch.setattr(os, "scandir", lambda directory: iter(entries))
+    store.expire()
+    assert store.offset(1, upload_id) is None
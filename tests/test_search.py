@@ -0,0 +1,36 @@
+from api.search import search_index
+from conftest import add_journal, journal_ids
+
+
+def search(client, user, query):
+    response = client.get(
+        f"/api/v1/journal/search?q={query}", headers=user["headers"]
+    )
+    assert response.status_code == 200
+    return [entry["title"] for entry in response.get_json()["message"]]
+
+
+def test_the_index_follows_writes(client, user, category_id):
+    add_journal(client, user, category_id, title="apples", content="red apples")
+    assert search(client, user, "apples") == ["apples"]
+    assert search_index.is_loaded(user["id"])
+
+    add_journal(client, user, category_id, title="pears", content="green pears")
+    (apples, pears) = sorted(journal_ids(client, user))
+    client.put(
+        f"/api/v1/journal/{pears}",
+        json={"content": "yellow pears"},
+        headers=user["headers"],
+    )
+    # deleting an entry that isn't there still moves the version on
+    client.delete("/api/v1/journal/999999", headers=user["headers"])
+    client.delete(f"/api/v1/journal/{apples}", headers=user["headers"])
+    # every write above was applied to the index instead of dropping it
+    assert search_index.is_loaded(user["id"])
+    assert search(client, user, "yellow") == ["pears"]
+    assert search(client, user, "apples") == []
+
+
+def test_journal_routes_take_numeric_ids(client, user):
+    for method in (client.get, client.put, client.delete):
+        assert method("/api/v1/journal/abc", headers=user["headers"]).status_code == 404
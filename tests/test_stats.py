@@ -0,0 +1,103 @@
+from sqlalchemy import select, func
+from models.models import Journal, JournalDailyStats
+from conftest import add_journal, journal_ids
+
+
+def rollups(user_id):
+    from main import session
+
+    try:
+        return {
+            row.day.isoformat(): (row.entries, row.words)
+            for row in session.execute(
+                select(
+                    JournalDailyStats.day,
+                    JournalDailyStats.entries,
+                    JournalDailyStats.words,
+                ).where(
+                    JournalDailyStats.user_id == user_id, JournalDailyStats.entries > 0
+                )
+            )
+        }
+    finally:
+        session.close()
+
+
+def recounted(user_id):
+    """the rollups rebuilt from the entries, DATE() is a string on sqlite"""
+    from main import session
+
+    day = func.date(Journal.date_created)
+    try:
+        return {
+            row.day: (row.entries, row.words)
+            for row in session.execute(
+                select(
+                    day.label("day"),
+                    func.count().label("entries"),
+                    func.sum(Journal.word_count).label("words"),
+                )
+                .where(Journal.user_id == user_id)
+                .group_by(day)
+            )
+        }
+    finally:
+        session.close()
+
+
+def totals(client, user):
+    stats = client.get("/api/v1/journal/stats", headers=user["headers"]).get_json()
+    return stats["message"]["total_entries"], stats["message"]["total_words"]
+
+
+def test_rollups_follow_creates_updates_and_deletes(client, user, category_id):
+    add_journal(client, user, category_id, content="one two three")
+    add_journal(client, user, category_id, content="four five")
+    assert totals(client, user) == (2, 5)
+    first, second = sorted(journal_ids(client, user))
+
+    client.put(
+        f"/api/v1/journal/{first}",
+        json={"content": "just one"},
+        headers=user["headers"],
+    )
+    assert totals(client, user) == (2, 4)
+    # a title change leaves the words alone
+    client.put(
+        f"/api/v1/journal/{second}", json={"title": "renamed"}, headers=user["headers"]
+    )
+    assert totals(client, user) == (2, 4)
+
+    client.delete(f"/api/v1/journal/{second}", headers=user["headers"])
+    assert totals(client, user) == (1, 2)
+    assert rollups(user["id"]) == recounted(user["id"])
+
+
+def test_rollups_follow_batches(client, user, category_id):
+    add_journal(client, user, category_id, content="one two three")
+    add_journal(client, user, category_id, content="four five")
+    first, second = sorted(journal_ids(client, user))
+    client.post(
+        "/api/v1/journal/batch",
+        json={
+            "operations": [
+                {"op": "create", "data": {"title": "t", "content": "a b c d"}},
+                {"op": "update", "id": first, "data": {"content": "x"}},
+                {"op": "delete", "id": second},
+                {"op": "delete", "id": 999999},
+            ]
+        },
+        headers=user["headers"],
+    )
+    assert totals(client, user) == (2, 5)
+    assert rollups(user["id"]) == recounted(user["id"])
+
+
+def test_missing_entries_leave_the_rollups_alone(client, user, category_id):
+    add_journal(client, user, category_id, content="one two")
+    client.delete("/api/v1/journal/999999", headers=user["headers"])
+    client.put(
+        "/api/v1/journal/999999", json={"content": "a b c"}, headers=user["headers"]
+    )
+    assert totals(client, user) == (1, 2)
+    assert rollups(user["id"]) == recounted(user["id"])
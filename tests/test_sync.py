@@ -0,0 +1,88 @@
+from conftest import add_journal, journal_ids
+
+
+def sync(client, user, since=None):
+    path = "/api/v1/journal/sync"
+    if since is not None:
+        path += f"?since={since}"
+    response = client.get(path, headers=user["headers"])
+    assert response.status_code == 200
+    return response.get_json()["message"]
+
+
+def test_first_sync_is_full(client, user, category_id):
+    add_journal(client, user, category_id, title="first")
+    changes = sync(client, user)
+    assert changes["full"] is True
+    assert [entry["title"] for entry in changes["journals"]] == ["first"]
+    assert [category["id"] for category in changes["categories"]] == [category_id]
+
+
+def test_delta_sync_sends_changes_and_tombstones(client, user, category_id):
+    add_journal(client, user, category_id, title="kept")
+    add_journal(client, user, category_id, title="edited")
+    add_journal(client, user, category_id, title="deleted")
+    kept, edited, deleted = sorted(journal_ids(client, user))
+    token = sync(client, user)["token"]
+
+    client.put(
+        f"/api/v1/journal/{edited}",
+        json={"title": "edited again"},
+        headers=user["headers"],
+    )
+    client.delete(f"/api/v1/journal/{deleted}", headers=user["headers"])
+    client.post(
+        "/api/v1/journal/new_category", json={"name": "gone"}, headers=user["headers"]
+    )
+    gone = max(
+        category["id"]
+        for category in client.get(
+            "/api/v1/journal/category", headers=user["headers"]
+        ).get_json()["message"]
+    )
+    client.delete(f"/api/v1/journal/category/{gone}", headers=user["headers"])
+
+    changes = sync(client, user, token)
+    assert changes["full"] is False
+    assert [entry["id"] for entry in changes["journals"]] == [edited]
+    assert changes["journals"][0]["title"] == "edited again"
+    assert changes["categories"] == []
+    assert changes["deleted"] == {"journals": [deleted], "categories": [gone]}
+    assert int(changes["token"]) > int(token)
+
+    # nothing happened since the last token
+    latest = sync(client, user, changes["token"])
+    assert latest["journals"] == latest["categories"] == []
+    assert latest["deleted"] == {"journals": [], "categories": []}
+    assert latest["token"] == changes["token"]
+
+
+def test_batch_writes_are_synced(client, user, category_id):
+    add_journal(client, user, category_id, title="updated")
+    add_journal(client, user, category_id, title="deleted")
+    updated, deleted = sorted(journal_ids(client, user))
+    token = sync(client, user)["token"]
+    client.post(
+        "/api/v1/journal/batch",
+        json={
+            "operations": [
+                {"op": "update", "id": updated, "data": {"title": "batched"}},
+                {"op": "delete", "id": deleted},
+            ]
+        },
+        headers=user["headers"],
+    )
+    changes = sync(client, user, token)
+    assert [entry["title"] for entry in changes["journals"]] == ["batched"]
+    assert changes["deleted"]["journals"] == [deleted]
+
+
+def test_unknown_tokens_fall_back_to_a_full_sync(client, user, category_id):
+    add_journal(client, user, category_id)
+    token = int(sync(client, user)["token"])
+    assert sync(client, user, token + 100)["full"] is True
+    for bad in ("abc", "-1"):
+        response = client.get(
+            f"/api/v1/journal/sync?since={bad}", headers=user["headers"]
+        )
+        assert response.status_code == 400
@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import select, type_coerce, LargeBinary
+from models.models import Journal
+from models.types import ZLIB, RAW, compress_text, decompress_text, is_compressed
+from conftest import add_journal, journal_ids
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["", "short", "ünïcödé ✓ " * 200, "the same sentence again. " * 1000],
+)
+def test_round_trip(text):
+    stored = compress_text(text)
+    assert is_compressed(stored)
+    assert decompress_text(stored) == text
+
+
+def test_only_shrinking_values_are_compressed():
+    assert compress_text("short").startswith(RAW)
+    repetitive = compress_text("words " * 500)
+    assert repetitive.startswith(ZLIB)
+    assert len(repetitive) < len("words " * 500)
+
+
+def test_values_written_before_compression_read_back_as_they_are():
+    assert not is_compressed("plain text")
+    assert not is_compressed(b"plain bytes")
+    assert decompress_text("plain text") == "plain text"
+    assert decompress_text(b"plain bytes") == "plain bytes"
+
+
+def test_content_column_is_stored_compressed(client, user, category_id):
+    from main import session
+
+    content = "a long entry that compresses well. " * 300
+    add_journal(client, user, category_id, content=content)
+    (journal_id,) = journal_ids(client, user)
+    try:
+        stored = session.execute(
+            select(type_coerce(Journal.content, LargeBinary)).where(
+                Journal.id == journal_id
+            )
+        ).scalar()
+    finally:
+        session.close()
+    assert bytes(stored).startswith(ZLIB)
+    assert len(stored) < len(content)
+    entry = client.get(f"/api/v1/journal/{journal_id}", headers=user["headers"])
+    assert entry.get_json()["message"]["content"] == content
@@ -0,0 +1,149 @@
+from functools import wraps
+from flask_jwt_extended import decode_token
+from jwt import ExpiredSignatureError, InvalidTokenError
+from starlette.routing import Route
+from api.async_journal import AsyncJournalHandler
+from api.async_users import AsyncUsers
+from main import app
+from main.aio import jsonify
+
+
+def jwt_required(refresh=False):
+    """
+    starlette counterpart of flask_jwt_extended's jwt_required, the wrapped
+    endpoint gets the token identity as its second argument
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(request):
+            header = request.headers.get("Authorization")
+            if header is None:
+                return jsonify({"msg": "Missing Authorization Header"}, 401)
+            scheme, _, token = header.partition(" ")
+            if scheme != "Bearer" or not token:
+                return jsonify(
+                    {
+                        "msg": "Bad Authorization header. Expected 'Authorization: Bearer <JWT>'"  # noqa
+                    },
+                    422,
+                )
+            try:
+                with app.app_context():
+                    decoded = decode_token(token)
+            except ExpiredSignatureError:
+                return jsonify({"msg": "Token has expired"}, 401)
+            except InvalidTokenError as e:
+                return jsonify({"msg": str(e)}, 422)
+            if refresh and decoded["type"] != "refresh":
+                return jsonify({"msg": "Only refresh tokens are allowed"}, 422)
+            if not refresh and decoded["type"] == "refresh":
+                return jsonify({"msg": "Only non-refresh tokens are allowed"}, 422)
+            return await fn(request, decoded["sub"])
+
+        return wrapper
+
+    return decorator
+
+
+@jwt_required()
+async def journals(request, identity):
+    if request.method == "POST":
+        return await AsyncJournalHandler().create_journal(request, identity["id"])
+    return await AsyncJournalHandler.fetch_journals(request, identity["id"])
+
+
+@jwt_required()
+async def create_category(request, identity):
+    return await AsyncJournalHandler().create_category(request, identity["id"])
+
+
+@jwt_required()
+async def fetch_categories(request, identity):
+    return await AsyncJournalHandler.fetch_category_details(request, identity["id"])
+
+
+@jwt_required()
+async def journal(request, identity):
+    user_id = identity["id"]
+    journal_id = request.path_params["journal_id"]
+    if request.method == "PUT":
+        return await AsyncJournalHandler().update_journal_entry(
+            request, user_id, journal_id
+        )
+    if request.method == "DELETE":
+        return await AsyncJournalHandler.delete_journal(user_id, journal_id)
+    return await AsyncJournalHandler.fetch_journal(request, user_id, journal_id)
+
+
+@jwt_required()
+async def category(request, identity):
+    user_id = identity["id"]
+    category_id = request.path_params["category_id"]
+    if request.method == "PUT":
+        return await AsyncJournalHandler().update_journal_category(
+            request, user_id, category_id
+        )
+    if request.method == "DELETE":
+        return await AsyncJournalHandler.delete_category(user_id, category_id)
+    return await AsyncJournalHandler.fetch_journal_by_category(
+        request, user_id, category_id
+    )
+
+
+async def register(request):
+    return await AsyncUsers().register(request)
+
+
+async def login(request):
+    return await AsyncUsers().login(request)
+
+
+@jwt_required()
+async def password_reset(request, identity):
+    return await AsyncUsers().password_reset(request, identity["email"])
+
+
+@jwt_required()
+async def update_details(request, identity):
+    return await AsyncUsers().update_user_details(request, identity["id"])
+
+
+@jwt_required()
+async def fetch_user_details(request, identity):
+    return await AsyncUsers.fetch_user_details(request.path_params["user_id"])
+
+
+@jwt_required(refresh=True)
+async def refresh(request, identity):
+    return await AsyncUsers.refresh_token(identity["id"])
+
+
+JOURNAL = "/api/v1/journal"
+AUTHENTICATION = "/api/v1/authentication"
+
+# same urls as the journal and auth blueprints, anything not listed here
+# (search, batch, account activation, ...) is served by the flask app
+routes = [
+    Route(JOURNAL, journals, methods=["GET", "POST"]),
+    Route(f"{JOURNAL}/new_category", create_category, methods=["POST"]),
+    Route(f"{JOURNAL}/category", fetch_categories, methods=["GET"]),
+    Route(
+        f"{JOURNAL}/category/{{category_id:int}}",
+        category,
+        methods=["GET", "PUT", "DELETE"],
+    ),
+    Route(
+        f"{JOURNAL}/{{journal_id:int}}", journal, methods=["GET", "PUT", "DELETE"]
+    ),
+    Route(f"{AUTHENTICATION}/signup", register, methods=["POST"]),
+    Route(f"{AUTHENTICATION}/login", login, methods=["POST"]),
+    Route(f"{AUTHENTICATION}/reset_password", password_reset, methods=["POST"]),
+    Route(f"{AUTHENTICATION}/update_details", update_details, methods=["PUT"]),
+    Route(
+        f"{AUTHENTICATION}/get_details/{{user_id}}",
+        fetch_user_details,
+        methods=["GET"],
+    ),
+    Route(f"{AUTHENTICATION}/refresh", refresh, methods=["GET"]),
+]
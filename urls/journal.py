@@ -1,12 +1,73 @@
+import click
 from flask import Blueprint
 from flask_jwt_extended import get_jwt_identity
-from api.journal import JournalHandler
+from api.journal import (
+    JournalHandler,
+    backfill_snippets,
+    backfill_search_text,
+    compress_contents,
+)
+from api.stats import backfill_daily_stats
 from flask_jwt_extended import jwt_required
+from models.models import User
+from main import session
 
 
 journal_bp = Blueprint("journal", __name__)
 
 
+@journal_bp.cli.command("import")
+@click.argument("email")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "import_format", type=click.Choice(["ndjson", "csv"]))
+def import_journal_file(email, path, import_format):
+    """import journal entries for EMAIL from an NDJSON or CSV file"""
+    try:
+        user_id = session.query(User.id).filter_by(email=email).scalar()
+    finally:
+        session.close()
+    if user_id is None:
+        raise click.ClickException(f"no user with email {email}")
+    if import_format is None:
+        import_format = "csv" if path.lower().endswith(".csv") else "ndjson"
+    with open(path, "rb") as f:
+        report = JournalHandler.import_file(user_id, f, import_format)
+    for error in report["errors"]:
+        click.echo(f"line {error['line']}: {error['error']}", err=True)
+    click.echo(
+        f"imported {report['imported']}, failed {report['failed']}, "
+        f"created {report['categories_created']} categories"
+    )
+
+
+@journal_bp.cli.command("backfill-snippets")
+@click.option("--batch-size", default=1000)
+def backfill_journal_snippets(batch_size):
+    """compute the list view snippet of entries that don't have one yet"""
+    click.echo(f"filled {backfill_snippets(batch_size)} snippets")
+
+
+@journal_bp.cli.command("backfill-search-text")
+@click.option("--batch-size", default=1000)
+def backfill_journal_search_text(batch_size):
+    """copy the content of older entries into the MySQL full-text column"""
+    click.echo(f"filled the search text of {backfill_search_text(batch_size)} entries")
+
+
+@journal_bp.cli.command("backfill-stats")
+@click.option("--batch-size", default=1000)
+def backfill_journal_stats(batch_size):
+    """count words of older entries and rebuild every user's daily rollups"""
+    click.echo(f"rebuilt the stats of {backfill_daily_stats(batch_size)} users")
+
+
+@journal_bp.cli.command("compress-content")
+@click.option("--batch-size", default=1000)
+def compress_journal_content(batch_size):
+    """compress entries written before content was stored compressed"""
+    click.echo(f"compressed {compress_contents(batch_size)} entries")
+
+
 @journal_bp.route("", methods=["POST"])
 @jwt_required(optional=False)
 def create_journal():
@@ -15,6 +76,14 @@ def create_journal():
     return JournalHandler().create_journal(user_id)
 
 
+@journal_bp.route("/batch", methods=["POST"])
+@jwt_required(optional=False)
+def batch_journals():
+    current_identity = get_jwt_identity()
+    user_id = current_identity["id"]
+    return JournalHandler().batch_journals(user_id)
+
+
 @journal_bp.route("new_category", methods=["POST"])
 @jwt_required(optional=False)
 def create_category():
@@ -23,7 +92,7 @@ def create_category():
     return JournalHandler().create_category(user_id)
 
 
-@journal_bp.route("/<journal_id>", methods=["PUT"])
+@journal_bp.route("/<int:journal_id>", methods=["PUT"])
 @jwt_required(optional=False)
 def update_journal(journal_id):
     current_identity = get_jwt_identity()
@@ -47,7 +116,79 @@ def fetch_journals():
     return JournalHandler.fetch_journals(user_id)
 
 
-@journal_bp.route("/<journal_id>", methods=["GET"])
+@journal_bp.route("/search", methods=["GET"])
+@jwt_required(optional=False)
+def search_journals():
+    current_identity = get_jwt_identity()
+    user_id = current_identity["id"]
+    return JournalHandler.search_journals(user_id)
+
+
+@journal_bp.route("/import", methods=["POST"])
+@jwt_required(optional=False)
+def import_journals():
+    current_identity = get_jwt_identity()
+    user_id = current_identity["id"]
+    return JournalHandler.import_journal_entries(user_id)
+
+
+@journal_bp.route("/import/uploads", methods=["POST"])
+@jwt_required(optional=False)
+def create_import_upload():
+    current_identity = get_jwt_identity()
+    user_id = current_identity["id"]
+    return JournalHandler.create_import_upload(user_id)
+
+
+@journal_bp.route("/import/uploads/<upload_id>", methods=["GET"])
+@jwt_required(optional=False)
+def fetch_import_upload(upload_id):
+    current_identity = get_jwt_identity()
+    user_id = current_identity["id"]
+    return JournalHandler.fetch_import_upload(user_id, upload_id)
+
+
+@journal_bp.route("/import/uploads/<upload_id>", methods=["PATCH"])
+@jwt_required(optional=False)
+def append_import_upload(upload_id):
+    current_identity = get_jwt_identity()
+    user_id = current_identity["id"]
+    return JournalHandler.append_import_upload(user_id, upload_id)
+
+
+@journal_bp.route("/import/uploads/<upload_id>/complete", methods=["POST"])
+@jwt_required(optional=False)
+def complete_import_upload(upload_id):
+    current_identity = get_jwt_identity()
+    user_id = current_identity["id"]
+    return JournalHandler.complete_import_upload(user_id, upload_id)
+
+
+@journal_bp.route("/export", methods=["GET"])
+@jwt_required(optional=False)
+def export_journals():
+    current_identity = get_jwt_identity()
+    user_id = current_identity["id"]
+    return JournalHandler.export_journals(user_id)
+
+
+@journal_bp.route("/stats", methods=["GET"])
+@jwt_required(optional=False)
+def fetch_stats():
+    current_identity = get_jwt_identity()
+    user_id = current_identity["id"]
+    return JournalHandler.fetch_stats(user_id)
+
+
+@journal_bp.route("/sync", methods=["GET"])
+@jwt_required(optional=False)
+def sync_journals():
+    current_identity = get_jwt_identity()
+    user_id = current_identity["id"]
+    return JournalHandler.sync_journals(user_id)
+
+
+@journal_bp.route("/<int:journal_id>", methods=["GET"])
 @jwt_required(optional=False)
 def fetch_journal(journal_id):
     current_identity = get_jwt_identity()
@@ -71,7 +212,7 @@ def fetch_categories():
     return JournalHandler.fetch_category_details(user_id)
 
 
-@journal_bp.route("/<journal_id>", methods=["DELETE"])
+@journal_bp.route("/<int:journal_id>", methods=["DELETE"])
 @jwt_required(optional=False)
 def delete_journal(journal_id):
     current_identity = get_jwt_identity()
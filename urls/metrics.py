@@ -0,0 +1,53 @@
+from flask import Blueprint, Response
+from api.cache import journal_cache
+from jobs.job_handler import executor
+from main.metrics import registry, Gauge
+
+
+metrics_bp = Blueprint("metrics", __name__)
+
+registry.register(
+    Gauge(
+        "journal_cache_hits_total",
+        "Read-through cache hits.",
+        lambda: journal_cache.hits,
+        kind="counter",
+    )
+)
+registry.register(
+    Gauge(
+        "journal_cache_misses_total",
+        "Read-through cache misses.",
+        lambda: journal_cache.misses,
+        kind="counter",
+    )
+)
+registry.register(
+    Gauge(
+        "journal_jobs_queue_depth",
+        "Background jobs waiting for a worker.",
+        lambda: executor.queue.qsize(),
+    )
+)
+for name in ("submitted", "completed", "failed", "rejected"):
+    registry.register(
+        Gauge(
+            f"journal_jobs_{name}_total",
+            f"Background jobs {name}.",
+            lambda name=name: executor.metrics()[name],
+            kind="counter",
+        )
+    )
+registry.register(
+    Gauge(
+        "journal_jobs_wait_seconds_total",
+        "Time background jobs spent queued.",
+        lambda: executor.metrics()["wait_seconds_total"],
+        kind="counter",
+    )
+)
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
@@ -1,6 +1,8 @@
-from flask import Blueprint
+import click
+from flask import Blueprint, jsonify
 from flask_jwt_extended import get_jwt_identity
 from api.users import Users
+from auth.hashing import HashingBusy, calibrate
 from flask_jwt_extended import jwt_required
 
 
@@ -8,6 +10,21 @@ from flask_jwt_extended import jwt_required
 bp = Blueprint("auth", __name__)
 
 
+@bp.errorhandler(HashingBusy)
+def hashing_busy(e):
+    return jsonify({"error": "server is busy, try again later"}), 503
+
+
+@bp.cli.command("calibrate-bcrypt")
+@click.option("--target-ms", default=250, help="latency budget for one hash")
+def calibrate_bcrypt(target_ms):
+    """benchmark bcrypt cost factors and suggest BCRYPT_LOG_ROUNDS"""
+    timings, rounds = calibrate(target_ms)
+    for cost, ms in timings:
+        click.echo(f"rounds={cost:<3} {ms:8.1f} ms")
+    click.echo(f"BCRYPT_LOG_ROUNDS={rounds}")
+
+
 @bp.route("/signup", methods=["POST"])
 def register():
     return Users().register()
@@ -0,0 +1,11 @@
+"""
+production entry point, gunicorn picks up its settings from
+gunicorn.conf.py next to this file:
+
+    gunicorn wsgi:app
+
+run.py stays the development server.
+"""
+from main import create_app
+
+app = create_app()